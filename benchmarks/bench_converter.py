@@ -0,0 +1,58 @@
+"""Micro-benchmark: markdown conversion with and without converter reuse.
+
+Run from the repository root::
+
+    python benchmarks/bench_converter.py
+
+Building a converter (markdownify's option processing plus its per-tag
+lookup cache) is a fixed cost per page, so it matters most on small pages.
+"""
+
+import timeit
+
+from wit.converter import WitMarkdownConverter
+
+PAGES = {
+    "tiny": "<main><h1>Title</h1><p>One paragraph.</p></main>",
+    "small": (
+        "<main><h1>Title</h1><p>Intro with <a href='/a?utm_source=x'>a link</a>.</p>"
+        "<ul><li>one</li><li>two</li></ul><pre><code>print('hi')</code></pre></main>"
+    ),
+    "medium": "<main>" + "<h2>Section</h2><p>Some <b>text</b> and <a href='/x'>links</a>.</p>" * 50 + "</main>",
+}
+
+
+def new_converter() -> WitMarkdownConverter:
+    """Build a converter the way html_to_markdown did for every page."""
+    return WitMarkdownConverter(
+        heading_style="atx",
+        strip_links=False,
+        include_images=True,
+        code_language="auto",
+        normalize_urls=True,
+        bullets="-",
+        autolinks=True,
+        escape_asterisks=False,
+        escape_underscores=False,
+    )
+
+
+def best(fn, runs: int) -> float:
+    """Best time per call in microseconds."""
+    return min(timeit.repeat(fn, number=runs, repeat=7)) / runs * 1e6
+
+
+def main(runs: int = 2000) -> None:
+    print(f"converter construction: {best(new_converter, runs):.1f} us")
+    print()
+    print(f"{'page':<8} {'new converter':>15} {'reused':>10} {'saved':>10}")
+    for name, html in PAGES.items():
+        n = runs if name != "medium" else runs // 20
+        fresh = best(lambda: new_converter().convert(html), n)
+        converter = new_converter()
+        reused = best(lambda: converter.convert(html), n)
+        print(f"{name:<8} {fresh:>12.1f} us {reused:>7.1f} us {(fresh - reused) / fresh:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Micro-benchmark: code language detection for <pre> blocks.
+
+Run from the repository root::
+
+    python benchmarks/bench_detect_language.py
+
+API reference pages have hundreds of code blocks, many of them repeated
+from page to page (install commands, imports, boilerplate).
+"""
+
+import re
+import timeit
+
+from wit.converter import _LANGUAGE_PATTERNS, _detect_language
+
+SNIPPETS = [
+    "pip install wit",
+    "import wit\n\nconfig = wit.load_config('wit.yaml')",
+    "const client = new Client({ token });\nawait client.pages.list();",
+    "curl -s https://api.example.com/v1/pages | jq '.items[]'",
+    "{\n  \"id\": 42,\n  \"title\": \"Getting started\",\n  \"tags\": [\"docs\"]\n}",
+    "SELECT id, title FROM pages WHERE site = 'docs' ORDER BY id;",
+    "site:\n  name: docs\n  base_url: https://docs.example.com",
+    "x = client.get('/pages')\nfor page in x:\n    handle(page)",
+]
+
+# A page worth of blocks: 200 blocks, 40 of them distinct
+PAGE = [f"{SNIPPETS[i % len(SNIPPETS)]}\n# example {i % 5}" for i in range(200)]
+
+
+def detect_sequentially(code: str) -> str:
+    """The previous implementation: one re.search per language."""
+    code = code.strip()
+    for pattern, lang in _LANGUAGE_PATTERNS:
+        if re.search(pattern, code, re.MULTILINE | re.IGNORECASE):
+            return lang
+    return ""
+
+
+def best(fn, runs: int) -> float:
+    """Best time per call in milliseconds."""
+    return min(timeit.repeat(fn, number=runs, repeat=7)) / runs * 1e3
+
+
+def main(runs: int = 20) -> None:
+    uncached = _detect_language.__wrapped__
+
+    assert [detect_sequentially(code) for code in PAGE] == [uncached(code) for code in PAGE]
+
+    def cached():
+        _detect_language.cache_clear()
+        for code in PAGE:
+            _detect_language(code)
+
+    print(f"{len(PAGE)} code blocks, {len(set(PAGE))} distinct, per page:")
+    print(f"  one search per language: {best(lambda: [detect_sequentially(c) for c in PAGE], runs):7.2f} ms")
+    print(f"  combined pattern:        {best(lambda: [uncached(c) for c in PAGE], runs):7.2f} ms")
+    print(f"  combined + cache:        {best(cached, runs):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,10 @@
 __version__ = "1.0.0"
 
 from wit.config import WitConfig, load_config, create_default_config
-from wit.scraper import fetch_page, extract_content
-from wit.converter import html_to_markdown, add_metadata
+from wit.scraper import fetch_page, extract_content, extract_content_tree
+from wit.converter import html_to_markdown, soup_to_markdown, add_metadata
 from wit.discovery import discover_pages
-from wit.git import has_changes, get_changed_files, commit_changes
+from wit.git import has_changes, get_changed_files, commit_changes, commit_paths
 
 __all__ = [
     "__version__",
@@ -15,10 +15,13 @@ __all__ = [
     "create_default_config",
     "fetch_page",
     "extract_content",
+    "extract_content_tree",
     "html_to_markdown",
+    "soup_to_markdown",
     "add_metadata",
     "discover_pages",
     "has_changes",
     "get_changed_files",
     "commit_changes",
+    "commit_paths",
 ]
@@ -0,0 +1,252 @@
+"""asyncio fetch engine for wit - many in-flight requests on one event loop."""
+
+import asyncio
+import inspect
+from typing import TYPE_CHECKING, Any, Callable
+
+from wit.cache import PageNotModified, ValidatorStore
+from wit.scraper import ScrapingError, fetch_page
+from wit.throttle import fetch_slot_async, get_host_limiter
+from wit.utils import get_logger
+
+if TYPE_CHECKING:
+    from wit.config import SiteConfig
+
+
+def scrape_urls_async(
+    site: "SiteConfig",
+    urls: list[str],
+    process_page: Callable[["SiteConfig", str, str], Any],
+    fetch_func: Callable | None = None,
+    validators: ValidatorStore | None = None,
+) -> list:
+    """Scrape URLs concurrently on a single event loop.
+
+    Up to ``scraping.concurrency`` requests are in flight at once, each host
+    is rate limited by its token bucket, and fetched pages are handed to
+    ``process_page`` in a worker thread so extraction and conversion never
+    stall the event loop.
+
+    Args:
+        site: Site configuration (``site.scraping`` is the same dict the
+            blocking engine uses).
+        urls: URLs to scrape.
+        process_page: Called as ``process_page(site, url, html)`` for each
+            fetched page.
+        fetch_func: Optional custom fetch function for testing. May be a
+            plain function or a coroutine function.
+        validators: Optional validator store for conditional requests.
+
+    Returns:
+        One outcome per URL, in URL order: the value returned by
+        ``process_page`` or the exception raised while scraping that URL.
+
+    Raises:
+        ScrapingError: If the async HTTP client is not available.
+    """
+    return asyncio.run(_scrape_urls(site, urls, process_page, fetch_func, validators))
+
+
+async def _scrape_urls(
+    site: "SiteConfig",
+    urls: list[str],
+    process_page: Callable,
+    fetch_func: Callable | None,
+    validators: ValidatorStore | None,
+) -> list:
+    """Run all page tasks and gather their outcomes."""
+    scraping_config = site.scraping
+    semaphore = asyncio.Semaphore(max(1, scraping_config.get("concurrency", 1)))
+
+    session = None if fetch_func else _create_client_session(scraping_config)
+
+    try:
+        tasks = [
+            _scrape_one(site, url, process_page, semaphore, session, fetch_func, validators)
+            for url in urls
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if session is not None:
+            await session.close()
+
+
+async def _scrape_one(
+    site: "SiteConfig",
+    url: str,
+    process_page: Callable,
+    semaphore: asyncio.Semaphore,
+    session,
+    fetch_func: Callable | None,
+    validators: ValidatorStore | None,
+):
+    """Fetch one page, then process it off the event loop."""
+    logger = get_logger()
+
+    async with semaphore:
+        await get_host_limiter(url, site.scraping).acquire_async()
+        logger.info(f"[{site.name}] Scraping {url}")
+        html = await fetch_page_async(url, site.scraping, session, fetch_func, validators)
+
+    # Release the fetch slot before the CPU-bound stage so other requests proceed
+    return await asyncio.to_thread(process_page, site, url, html)
+
+
+async def fetch_page_async(
+    url: str,
+    scraping_config: dict,
+    session=None,
+    fetch_func: Callable | None = None,
+    validators: ValidatorStore | None = None,
+) -> str:
+    """Fetch page HTML without blocking the event loop.
+
+    Async counterpart of ``fetch_page``, accepting the same scraping config.
+    JavaScript rendering is delegated to the blocking renderer in a worker
+    thread.
+
+    Args:
+        url: URL to fetch.
+        scraping_config: Scraping configuration dict (see ``fetch_page``).
+        session: aiohttp ClientSession used for static fetches.
+        fetch_func: Optional custom fetch function for testing.
+        validators: Optional validator store for conditional requests.
+
+    Returns:
+        HTML content as string.
+
+    Raises:
+        ScrapingError: If fetching fails after retries.
+        PageNotModified: If the server answered a conditional request with 304.
+    """
+    if fetch_func:
+        result = fetch_func(url)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    if scraping_config.get("javascript", False):
+        return await asyncio.to_thread(fetch_page, url, scraping_config)
+
+    # JavaScript renders take their budget slot in fetch_page
+    async with fetch_slot_async():
+        return await _fetch_static_async(
+            url,
+            scraping_config.get("timeout", 30),
+            scraping_config.get("user_agent", "wit/1.0"),
+            scraping_config.get("retries", 3),
+            session,
+            validators,
+        )
+
+
+async def _fetch_static_async(
+    url: str,
+    timeout: int,
+    user_agent: str,
+    retries: int,
+    session,
+    validators: ValidatorStore | None = None,
+) -> str:
+    """Fetch page using aiohttp with async retries and backoff.
+
+    Args:
+        url: URL to fetch.
+        timeout: Request timeout in seconds.
+        user_agent: User agent string.
+        retries: Number of retry attempts.
+        session: aiohttp ClientSession.
+        validators: Optional validator store for conditional requests.
+
+    Returns:
+        HTML content.
+
+    Raises:
+        ScrapingError: If fetching fails.
+        PageNotModified: If the server answered with 304.
+    """
+    import aiohttp
+
+    logger = get_logger()
+    headers = {"User-Agent": user_agent}
+    if validators is not None:
+        headers.update(validators.request_headers(url))
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    last_error = None
+
+    for attempt in range(retries):
+        try:
+            async with session.get(url, headers=headers, timeout=client_timeout) as response:
+                # Handle rate limiting
+                if response.status == 429:
+                    retry_after = int(response.headers.get("Retry-After", 60))
+                    logger.warning(f"Rate limited, waiting {retry_after}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+
+                # Handle server errors with retry
+                if response.status >= 500:
+                    wait_time = 2 ** attempt  # Exponential backoff
+                    logger.warning(f"Server error {response.status}, retrying in {wait_time}s")
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                # Handle 404
+                if response.status == 404:
+                    raise ScrapingError(f"Page not found: {url}")
+
+                # Unchanged since the validators were recorded
+                if response.status == 304 and validators is not None:
+                    raise PageNotModified(url)
+
+                response.raise_for_status()
+                html = await response.text()
+                if validators is not None:
+                    validators.stage(url, response.headers)
+                return html
+
+        except asyncio.TimeoutError as e:
+            last_error = e
+            wait_time = 2 ** attempt
+            logger.warning(f"Timeout fetching {url}, retrying in {wait_time}s (attempt {attempt + 1}/{retries})")
+            await asyncio.sleep(wait_time)
+
+        except aiohttp.ClientError as e:
+            last_error = e
+            if attempt < retries - 1:
+                wait_time = 2 ** attempt
+                logger.warning(f"Error fetching {url}: {e}, retrying in {wait_time}s")
+                await asyncio.sleep(wait_time)
+
+    raise ScrapingError(f"Failed to fetch {url} after {retries} attempts: {last_error}")
+
+
+def _create_client_session(scraping_config: dict):
+    """Create the aiohttp session shared by all requests of a run.
+
+    Must be called from inside the running event loop.
+
+    Args:
+        scraping_config: Scraping configuration dict.
+
+    Returns:
+        aiohttp.ClientSession.
+
+    Raises:
+        ScrapingError: If aiohttp is not installed.
+    """
+    try:
+        import aiohttp
+    except ImportError:
+        raise ScrapingError(
+            "The async engine requires aiohttp. "
+            "Install with: pip install 'wit[async]'"
+        )
+
+    connector = aiohttp.TCPConnector(
+        limit=max(1, scraping_config.get("concurrency", 1)),
+        limit_per_host=0,
+        force_close=not scraping_config.get("keep_alive", True),
+    )
+    return aiohttp.ClientSession(connector=connector)
@@ -0,0 +1,409 @@
+"""Persistent Playwright browser pool for JavaScript rendering."""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from wit.utils import get_logger, matches_pattern
+
+
+@dataclass
+class ResourcePolicy:
+    """Which subresources the browser should not download.
+
+    The extractor only needs the DOM, so images, fonts, media and tracking
+    scripts are pure overhead when rendering.
+    """
+
+    types: set[str] = field(default_factory=set)
+    domains: set[str] = field(default_factory=set)
+    patterns: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_config(cls, config: dict | None) -> "ResourcePolicy":
+        """Build a policy from the ``block_resources`` scraping option.
+
+        Args:
+            config: Dict with optional keys:
+                - types: Playwright resource types (image, font, media,
+                  stylesheet, script, ...)
+                - domains: Hosts to block, including their subdomains
+                - patterns: Glob patterns (``*`` wildcard) matched against
+                  the full request URL
+
+        Returns:
+            ResourcePolicy instance.
+        """
+        config = config or {}
+        return cls(
+            types={t.lower() for t in config.get("types", [])},
+            domains={d.lower().lstrip(".") for d in config.get("domains", [])},
+            patterns=list(config.get("patterns", [])),
+        )
+
+    @property
+    def active(self) -> bool:
+        """Whether the policy blocks anything at all."""
+        return bool(self.types or self.domains or self.patterns)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """Check if a request should be aborted.
+
+        Args:
+            url: Request URL.
+            resource_type: Playwright resource type of the request.
+
+        Returns:
+            True if the request should not be sent.
+        """
+        # Never block the page itself
+        if resource_type == "document":
+            return False
+
+        if resource_type in self.types:
+            return True
+
+        if self.domains:
+            host = (urlparse(url).hostname or "").lower()
+            parts = host.split(".")
+            for i in range(len(parts) - 1):
+                if ".".join(parts[i:]) in self.domains:
+                    return True
+
+        return any(matches_pattern(url, pattern) for pattern in self.patterns)
+
+
+@dataclass
+class RenderStats:
+    """Network accounting for a single rendered page."""
+
+    blocked: dict[str, int] = field(default_factory=dict)
+    loaded_requests: int = 0
+    loaded_bytes: int = 0
+
+    @property
+    def blocked_count(self) -> int:
+        """Total number of aborted requests."""
+        return sum(self.blocked.values())
+
+    def summary(self) -> str:
+        """Human-readable one-line summary."""
+        by_type = ", ".join(f"{t}: {n}" for t, n in sorted(self.blocked.items()))
+        blocked = f"blocked {self.blocked_count} requests" + (f" ({by_type})" if by_type else "")
+        return f"{blocked}, loaded {self.loaded_requests} requests ({self.loaded_bytes / 1024:.1f} KB)"
+
+
+# Launch attempts when restarting the browser before the pool gives up
+RELAUNCH_ATTEMPTS = 2
+
+
+class BrowserPool:
+    """One long-lived Chromium instance rendering pages on reusable tabs.
+
+    Playwright objects are bound to the event loop that created them, so the
+    pool owns a private event loop running in a background thread. Callers
+    from any thread submit renders with ``render()``, which blocks until the
+    page is done. Up to ``size`` pages render in parallel, each on its own
+    browser context and tab that is reused for later URLs. After
+    ``recycle_after`` renders the browser is restarted to bound memory
+    growth from long-lived renderer processes. If the browser can't be
+    relaunched, the pool is broken and every later render raises.
+    """
+
+    def __init__(self, size: int = 4, recycle_after: int = 200, user_agent: str | None = None):
+        self.size = max(1, size)
+        self.recycle_after = recycle_after
+        self.user_agent = user_agent
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="wit-browser", daemon=True)
+        self._thread.start()
+
+        # Event-loop state (only touched from the pool thread)
+        self._playwright = None
+        self._browser = None
+        self._slots: asyncio.Queue | None = None
+        self._start_lock: asyncio.Lock | None = None
+        self._rendered = 0
+        self._recycling = False
+        self._needs_restart = False
+        self._launch_error: Exception | None = None
+        self.launches = 0
+
+    def render(
+        self,
+        url: str,
+        timeout: float,
+        wait_until: str = "load",
+        wait_delay: float = 0,
+        policy: ResourcePolicy | None = None,
+    ) -> str:
+        """Render a URL and return the resulting HTML.
+
+        Args:
+            url: URL to render.
+            timeout: Page load timeout in seconds.
+            wait_until: Navigation event to wait for (see ``fetch_page``).
+            wait_delay: Additional delay in seconds after page load.
+            policy: Optional policy for subresources to block.
+
+        Returns:
+            Rendered HTML content.
+
+        Raises:
+            RuntimeError: If the browser could not be relaunched.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._render(url, timeout, wait_until, wait_delay, policy), self._loop
+        )
+        return future.result()
+
+    def close(self) -> None:
+        """Shut down the browser, Playwright and the pool thread."""
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _render(
+        self,
+        url: str,
+        timeout: float,
+        wait_until: str,
+        wait_delay: float,
+        policy: ResourcePolicy | None,
+    ) -> str:
+        """Render a URL on the next free slot."""
+        await self._ensure_started()
+        slot = await self._slots.get()
+        if slot is None:
+            # Broken pool; leave the marker for the next waiter
+            self._slots.put_nowait(None)
+            raise RuntimeError(f"Browser could not be relaunched: {self._launch_error}")
+        page = slot[1]
+        stats = RenderStats()
+        blocking = policy is not None and policy.active
+
+        async def route_request(route, request):
+            if policy.should_block(request.url, request.resource_type):
+                stats.blocked[request.resource_type] = stats.blocked.get(request.resource_type, 0) + 1
+                await route.abort()
+            else:
+                await route.continue_()
+
+        async def count_loaded(request):
+            try:
+                sizes = await request.sizes()
+            except Exception:
+                return
+            stats.loaded_requests += 1
+            stats.loaded_bytes += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+
+        try:
+            # Playwright uses milliseconds
+            page.set_default_timeout(timeout * 1000)
+            if blocking:
+                await page.route("**/*", route_request)
+                page.on("requestfinished", count_loaded)
+
+            await page.goto(url, wait_until=wait_until)
+
+            # Additional delay for JS-heavy sites to finish rendering
+            if wait_delay > 0:
+                await page.wait_for_timeout(int(wait_delay * 1000))
+
+            html = await page.content()
+            if blocking:
+                get_logger().debug(f"Rendered {url}: {stats.summary()}")
+            return html
+        except Exception:
+            # Don't hand a tab in an unknown state to the next URL
+            slot = await self._replace_slot(slot)
+            raise
+        finally:
+            if blocking and slot[1] is page:
+                try:
+                    page.remove_listener("requestfinished", count_loaded)
+                    await page.unroute("**/*", route_request)
+                except Exception:
+                    slot = await self._replace_slot(slot)
+            self._release_slot(slot)
+
+    def _release_slot(self, slot: tuple) -> None:
+        """Return a slot to the pool and trigger recycling when due."""
+        self._slots.put_nowait(slot)
+        self._rendered += 1
+        due = self.recycle_after and self._rendered >= self.recycle_after
+        if (due or self._needs_restart) and not self._recycling:
+            self._recycling = True
+            asyncio.ensure_future(self._recycle())
+
+    async def _ensure_started(self) -> None:
+        """Launch Playwright and the browser on first use.
+
+        If the launch fails, Playwright is stopped again so the next render
+        starts from scratch instead of leaking a driver per attempt.
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self._browser is not None:
+                return
+
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            self._slots = asyncio.Queue()
+            try:
+                await self._launch()
+            except BaseException:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+                raise
+
+    async def _launch(self) -> None:
+        """Start a browser and fill the pool with fresh slots.
+
+        All or nothing: if a slot can't be created, the browser is closed
+        again and ``_browser`` left as None, so a failed launch never leaves
+        a browser without slots.
+        """
+        browser = await self._playwright.chromium.launch(headless=True)
+        self._browser = browser
+        slots = []
+        try:
+            for _ in range(self.size):
+                slots.append(await self._new_slot())
+        except BaseException:
+            for context, _ in slots:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            self._browser = None
+            raise
+
+        self.launches += 1
+        self._rendered = 0
+        for slot in slots:
+            self._slots.put_nowait(slot)
+        get_logger().debug(f"Launched browser with {self.size} pages")
+
+    async def _new_slot(self) -> tuple:
+        """Create a browser context with a single reusable page."""
+        context_options = {}
+        if self.user_agent:
+            context_options["user_agent"] = self.user_agent
+        context = await self._browser.new_context(**context_options)
+        page = await context.new_page()
+        return context, page
+
+    async def _replace_slot(self, slot: tuple) -> tuple:
+        """Close a slot's context and create a fresh one in its place.
+
+        If no new context can be created the browser is likely gone, so the
+        old slot is kept (to preserve the pool size) and a restart is queued.
+        """
+        try:
+            await slot[0].close()
+        except Exception:
+            pass
+        try:
+            return await self._new_slot()
+        except Exception:
+            self._needs_restart = True
+            return slot
+
+    async def _recycle(self) -> None:
+        """Restart the browser once all in-flight renders have finished.
+
+        A failed launch is retried once. If that fails too, the pool is
+        marked broken: waiting and later renders raise instead of blocking
+        on a pool without slots.
+        """
+        logger = get_logger()
+        logger.debug(f"Recycling browser after {self._rendered} pages")
+
+        # Taking every slot out of the pool waits for in-flight renders
+        slots = [await self._slots.get() for _ in range(self.size)]
+        for context, _ in slots:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        try:
+            await self._browser.close()
+        except Exception:
+            pass
+
+        for attempt in range(RELAUNCH_ATTEMPTS):
+            try:
+                await self._launch()
+                break
+            except Exception as e:
+                logger.warning(f"Failed to relaunch browser (attempt {attempt + 1}/{RELAUNCH_ATTEMPTS}): {e}")
+                self._launch_error = e
+        else:
+            self._slots.put_nowait(None)
+
+        self._needs_restart = False
+        self._recycling = False
+
+    async def _shutdown(self) -> None:
+        """Close the browser and stop Playwright."""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+# One pool per user agent, shared by all sites for the whole run
+_pools: dict[str | None, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(scraping_config: dict) -> BrowserPool:
+    """Get the shared browser pool for a scraping config.
+
+    Args:
+        scraping_config: Scraping configuration dict with:
+            - user_agent: User agent for browser contexts
+            - browser_pages: Number of pages rendered in parallel
+            - browser_recycle_after: Restart the browser after this many pages
+
+    Returns:
+        BrowserPool instance.
+    """
+    user_agent = scraping_config.get("user_agent")
+
+    with _pools_lock:
+        pool = _pools.get(user_agent)
+        if pool is None:
+            pool = BrowserPool(
+                size=scraping_config.get("browser_pages", 4),
+                recycle_after=scraping_config.get("browser_recycle_after", 200),
+                user_agent=user_agent,
+            )
+            _pools[user_agent] = pool
+        return pool
+
+
+def close_browser_pools() -> None:
+    """Close all browser pools."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,217 @@
+"""Caches that let wit skip work for unchanged pages."""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from wit.state import StateStore
+from wit.utils import parse_lastmod
+
+
+class PageNotModified(Exception):
+    """Raised when the server confirms a page is unchanged (HTTP 304)."""
+    pass
+
+
+class ValidatorStore(StateStore):
+    """Persistent ETag / Last-Modified validators keyed by URL.
+
+    Validators from a fresh response are only staged by the fetcher. They
+    are committed once the page has been written, so a page that fails
+    after fetching is fetched in full again on the next run.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending: dict[str, dict] = {}
+        self._pending_lock = threading.Lock()
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        """Build conditional request headers for a URL.
+
+        Args:
+            url: URL about to be fetched.
+
+        Returns:
+            Dict with If-None-Match and/or If-Modified-Since, or empty.
+        """
+        validators = self.get(url) or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def stage(self, url: str, response_headers) -> None:
+        """Remember the validators of a full response until it is committed.
+
+        Args:
+            url: URL that was fetched.
+            response_headers: Response headers (case-insensitive mapping).
+        """
+        validators = {}
+        if response_headers.get("ETag"):
+            validators["etag"] = response_headers["ETag"]
+        if response_headers.get("Last-Modified"):
+            validators["last_modified"] = response_headers["Last-Modified"]
+
+        with self._pending_lock:
+            self._pending[url] = validators
+
+    def commit(self, url: str) -> None:
+        """Persist the staged validators of a page that was fully processed.
+
+        Args:
+            url: URL whose output has been written.
+        """
+        with self._pending_lock:
+            validators = self._pending.pop(url, None)
+
+        if validators is None:
+            return
+        if validators:
+            self.set(url, validators)
+        else:
+            self.discard(url)
+
+
+def content_hash(text: str) -> str:
+    """Hash page text for change detection.
+
+    BLAKE2b is several times faster than SHA-256 on large pages, and
+    128 bits are plenty to tell versions of one page apart.
+
+    Args:
+        text: Text to hash.
+
+    Returns:
+        32-character hex digest.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PageHashStore(StateStore):
+    """Persistent hashes of each URL's raw body and extracted content.
+
+    Many servers send no ETag or Last-Modified, so conditional GET can't
+    tell that a page is unchanged. Comparing hashes with the previous run
+    can: an identical body skips parsing and conversion altogether, and an
+    identical content region (when only the page chrome changed, e.g. a
+    nonce or a "generated at" footer) skips conversion and writing.
+    Entries are keyed by URL and hold ``{"body": ..., "region": ...}``.
+    """
+
+    def body_unchanged(self, url: str, body_hash: str) -> bool:
+        """Check a raw body hash against the previous run.
+
+        Args:
+            url: URL that was fetched.
+            body_hash: ``content_hash`` of the response body.
+
+        Returns:
+            True if the page was processed with the same body before.
+        """
+        return (self.get(url) or {}).get("body") == body_hash
+
+    def region_hash(self, url: str) -> str | None:
+        """Get the content region hash of the previous run, if any."""
+        return (self.get(url) or {}).get("region")
+
+    def record(self, url: str, body_hash: str, region_hash: str | None) -> None:
+        """Remember the hashes of a page whose output is up to date.
+
+        Args:
+            url: URL whose output has been written (or kept).
+            body_hash: ``content_hash`` of the response body.
+            region_hash: Hash of the extracted content region.
+        """
+        self.set(url, {"body": body_hash, "region": region_hash})
+
+
+class OutputManifest(StateStore):
+    """Body hashes of a site's output files, keyed by path relative to it.
+
+    Deciding whether a page changed then needs no read of the old file.
+    Each entry also records the file's size and modification time; an entry
+    is only trusted while both still match, so a file edited, checked out
+    or deleted since is compared the slow way and its entry refreshed. A
+    missing manifest fills itself in the same way during the next run.
+    """
+
+    def __init__(self, path: Path, root: Path):
+        super().__init__(path)
+        self.root = Path(root)
+
+    def _key(self, filepath: Path) -> str:
+        return Path(filepath).relative_to(self.root).as_posix()
+
+    def body_hash(self, filepath: Path) -> str | None:
+        """Get the recorded body hash of an output file.
+
+        Args:
+            filepath: Output file.
+
+        Returns:
+            The hash, or None if there is no entry or the file changed since.
+        """
+        entry = self.get(self._key(filepath))
+        if entry is None:
+            return None
+
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+
+        body_hash, size, mtime_ns = entry
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            return None
+        return body_hash
+
+    def record(self, filepath: Path, body_hash: str) -> None:
+        """Remember the body hash of an output file as it is now on disk.
+
+        Args:
+            filepath: Output file, just written or compared.
+            body_hash: ``content_hash`` of its body without the timestamp.
+        """
+        stat = os.stat(filepath)
+        self.set(self._key(filepath), [body_hash, stat.st_size, stat.st_mtime_ns])
+
+
+class LastmodStore(StateStore):
+    """Sitemap ``<lastmod>`` of each URL at its last successful scrape.
+
+    A page whose sitemap lastmod is no newer than the recorded one hasn't
+    changed and needn't be fetched. Comparing lastmod with lastmod, rather
+    than with the local clock, is immune to clock skew and to sitemaps that
+    only give the day of a change.
+    """
+
+    def unmodified(self, url: str, lastmod: str | None) -> bool:
+        """Check whether a page is unchanged since its last scrape.
+
+        Args:
+            url: Page URL.
+            lastmod: The page's lastmod in the current sitemap.
+
+        Returns:
+            True if both lastmods are known and the current one isn't newer.
+        """
+        current = parse_lastmod(lastmod)
+        previous = parse_lastmod(self.get(url))
+        return current is not None and previous is not None and current <= previous
+
+    def record(self, url: str, lastmod: str | None) -> None:
+        """Remember the lastmod of a page that was scraped successfully.
+
+        Args:
+            url: Page URL.
+            lastmod: The page's lastmod in the sitemap, if any.
+        """
+        if lastmod:
+            self.set(url, lastmod)
+        else:
+            self.discard(url)
@@ -1,16 +1,29 @@
 """CLI entry point for wit."""
 
 import sys
-import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
 import click
 
+from wit.async_engine import scrape_urls_async
+from wit.browser import close_browser_pools
+from wit.cache import LastmodStore, OutputManifest, PageHashStore, PageNotModified, ValidatorStore, content_hash
 from wit.config import SiteConfig, WitConfig, load_config, create_default_config
-from wit.converter import html_to_markdown, add_metadata
-from wit.discovery import discover_pages_for_site
-from wit.git import commit_changes, get_changed_files, has_changes, is_git_repo
-from wit.scraper import ScrapingError, fetch_page, extract_content
+from wit.converter import add_metadata, soup_to_markdown
+from wit.discovery import SitemapEntry, discover_pages_for_site
+from wit.git import GitError, commit_paths, get_changed_files, has_changes, is_git_repo
+from wit.pipeline import CpuPool, RenderedPage, render_page
+from wit.replay import replay_history
+from wit.scheduler import FairScheduler
+from wit.scraper import ScrapingError, fetch_page, extract_content_tree
+from wit.sessions import close_sessions
+from wit.snapshots import SnapshotStore
+from wit.state import COMMITTED_STATE_KINDS, config_fingerprint, site_state_path
+from wit.throttle import get_host_limiter, reset_host_limiters, set_fetch_budget
 from wit.utils import format_commit_message, get_logger, setup_logging, url_to_filepath
 
 
@@ -88,50 +101,109 @@ def scrape(ctx: click.Context, config: str, commit: bool, site: list[str] | None
     total_failed = 0
     all_changed_files = []
     
-    # Scrape each site
-    for site_config in sites:
-        scraped, changed, failed, changed_files = _scrape_site(site_config, logger)
-        total_scraped += scraped
-        total_changed += changed
-        total_failed += failed
-        all_changed_files.extend(changed_files)
+    # Scrape sites concurrently; their pages share one fairly scheduled worker
+    # budget (HTTP sessions are pooled for the whole run). The same budget
+    # caps every request in flight, including discovery and the async engine.
+    # With cpu_workers, fetched pages are extracted and converted in worker
+    # processes.
+    set_fetch_budget(cfg.workers)
+    try:
+        with ExitStack() as stack:
+            scheduler = stack.enter_context(FairScheduler(cfg.workers))
+            cpu_pool = stack.enter_context(CpuPool(sites, cfg.cpu_workers)) if cfg.cpu_workers else None
+            site_executor = stack.enter_context(ThreadPoolExecutor(max_workers=len(sites)))
+            futures = [
+                site_executor.submit(_scrape_site, site_config, logger, scheduler, cpu_pool)
+                for site_config in sites
+            ]
+            # Merge in config order so the commit is the same however sites finish
+            for future in futures:
+                scraped, changed, failed, changed_files = future.result()
+                total_scraped += scraped
+                total_changed += changed
+                total_failed += failed
+                all_changed_files.extend(changed_files)
+    finally:
+        close_sessions()
+        close_browser_pools()
+        reset_host_limiters()
+        set_fetch_budget(None)
     
     # Summary
     if len(sites) > 1:
         logger.info(f"Total: {total_scraped} pages, {total_changed} changed, {total_failed} failed")
     
     # Commit if requested
-    if commit and total_changed > 0:
-        try:
-            message = format_commit_message(cfg.git["message_template"], all_changed_files)
-            sha = commit_changes(
-                message=message,
-                author_name=cfg.git["author_name"],
-                author_email=cfg.git["author_email"],
-            )
-            if sha:
-                logger.info(f'Committed: {sha} "{message}"')
-        except Exception as e:
-            logger.error(f"Failed to commit: {e}")
-            sys.exit(1)
-    elif commit and total_changed == 0:
+    if commit:
+        _commit_files(cfg, all_changed_files, logger)
+
+
+def _commit_files(cfg: WitConfig, changed_files: list[str], logger) -> None:
+    """Commit changed output files using the configured git settings.
+    
+    Only the changed files and the small run state kinds are staged, so
+    the rest of the repository is never scanned.
+    
+    Args:
+        cfg: Loaded configuration.
+        changed_files: Files written during this run.
+        logger: Logger instance.
+    """
+    if not changed_files:
         logger.info("No changes to commit")
+        return
+    
+    try:
+        message = format_commit_message(cfg.git["message_template"], changed_files)
+        # Run state lets the next run skip unchanged pages (see README)
+        state_paths = [cfg.state_dir / kind for kind in COMMITTED_STATE_KINDS]
+        paths = changed_files + [str(path) for path in state_paths if path.is_dir()]
+        sha = commit_paths(
+            paths,
+            message=message,
+            author_name=cfg.git["author_name"],
+            author_email=cfg.git["author_email"],
+        )
+        if sha:
+            logger.info(f'Committed: {sha} "{message}"')
+    except Exception as e:
+        logger.error(f"Failed to commit: {e}")
+        sys.exit(1)
 
 
-def _scrape_site(site: SiteConfig, logger) -> tuple[int, int, int, list[str]]:
+def _scrape_site(
+    site: SiteConfig,
+    logger,
+    scheduler: FairScheduler | None = None,
+    cpu_pool: CpuPool | None = None,
+) -> tuple[int, int, int, list[str]]:
     """Scrape a single site.
     
     Args:
         site: Site configuration.
         logger: Logger instance.
+        scheduler: Optional worker budget shared with other sites. Without
+            one, the site gets its own pool of ``scraping.concurrency``
+            workers.
+        cpu_pool: Optional worker processes to extract and convert pages
+            in. Without one, the fetching workers do it themselves.
         
     Returns:
         Tuple of (scraped_count, changed_count, failed_count, changed_files).
     """
+    if site.pages.get("crawl", {}).get("single_pass", False):
+        return _crawl_and_scrape_site(site, logger, scheduler, cpu_pool)
+    
     logger.info(f"[{site.name}] Discovering pages from {site.base_url}...")
     
+    lastmods = _open_lastmods(site)
+    sitemap_lastmods: dict[str, str | None] = {}
+    
+    def on_sitemap_entry(entry: SitemapEntry) -> None:
+        sitemap_lastmods.setdefault(entry.loc, entry.lastmod)
+    
     try:
-        urls = discover_pages_for_site(site)
+        urls = discover_pages_for_site(site, on_sitemap_entry=on_sitemap_entry)
     except Exception as e:
         logger.error(f"[{site.name}] Failed to discover pages: {e}")
         return 0, 0, 0, []
@@ -142,66 +214,634 @@ def _scrape_site(site: SiteConfig, logger) -> tuple[int, int, int, list[str]]:
         logger.warning(f"[{site.name}] No pages to scrape")
         return 0, 0, 0, []
     
+    if lastmods is not None:
+        urls = _drop_unmodified(site, urls, sitemap_lastmods, lastmods, logger)
+    
     # Create output directory
     site.output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Scrape pages
+    # Scrape pages. Workers fetch concurrently while finished pages are
+    # extracted, converted and written; politeness is enforced per host.
+    validators = _open_validators(site, urls)
+    snapshots = SnapshotStore.for_site(site) if site.scraping.get("snapshots", False) else None
+    page_hashes = _open_page_hashes(site)
+    manifest = _open_manifest(site)
+    process_page = partial(
+        _process_page,
+        validators=validators,
+        snapshots=snapshots,
+        cpu_pool=cpu_pool,
+        page_hashes=page_hashes,
+        manifest=manifest,
+    )
+    
+    with ExitStack() as stack:
+        for store in (validators, snapshots, page_hashes, manifest, lastmods):
+            if store is not None:
+                stack.callback(store.save)
+        
+        if site.scraping.get("engine", "sync") == "async":
+            try:
+                outcomes = scrape_urls_async(site, urls, process_page, validators=validators)
+            except ScrapingError as e:
+                logger.error(f"[{site.name}] {e}")
+                return 0, 0, len(urls), []
+        else:
+            concurrency = max(1, site.scraping.get("concurrency", 1))
+            if scheduler is not None:
+                futures = [
+                    _submit_scrape(scheduler, site, url, logger, process_page, validators, concurrency)
+                    for url in urls
+                ]
+            else:
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=concurrency))
+                futures = [
+                    executor.submit(_scrape_page, site, url, logger, process_page, validators)
+                    for url in urls
+                ]
+            outcomes = (_future_outcome(future) for future in futures)
+        
+        def on_scraped(url: str) -> None:
+            if lastmods is not None:
+                lastmods.record(url, sitemap_lastmods.get(url))
+        
+        # Collect in discovery order so stats and changed_files are stable
+        return _collect_outcomes(site, urls, outcomes, logger, on_scraped)
+
+
+def _crawl_and_scrape_site(
+    site: SiteConfig,
+    logger,
+    scheduler: FairScheduler | None = None,
+    cpu_pool: CpuPool | None = None,
+) -> tuple[int, int, int, list[str]]:
+    """Scrape a crawled site in a single pass.
+    
+    The crawler fetches each page once and hands its HTML straight to the
+    processing workers while it keeps following links. Pages found by other
+    discovery methods, and pages the crawler failed to fetch, are then
+    scraped as usual. Conditional GET is not used: the crawler needs every
+    page body to find links.
+    
+    Args:
+        site: Site configuration.
+        logger: Logger instance.
+        scheduler: Optional worker budget shared with other sites.
+        cpu_pool: Optional worker processes to extract and convert pages in.
+        
+    Returns:
+        Tuple of (scraped_count, changed_count, failed_count, changed_files).
+    """
+    logger.info(f"[{site.name}] Crawling and scraping {site.base_url}...")
+    
+    site.output_dir.mkdir(parents=True, exist_ok=True)
+    
+    snapshots = SnapshotStore.for_site(site) if site.scraping.get("snapshots", False) else None
+    page_hashes = _open_page_hashes(site)
+    manifest = _open_manifest(site)
+    process_page = partial(
+        _process_page, snapshots=snapshots, cpu_pool=cpu_pool, page_hashes=page_hashes, manifest=manifest
+    )
+    futures: dict[str, Future] = {}
+    
+    with ExitStack() as stack:
+        for store in (snapshots, page_hashes, manifest):
+            if store is not None:
+                stack.callback(store.save)
+        
+        concurrency = max(1, site.scraping.get("concurrency", 1))
+        if scheduler is not None:
+            submit = partial(scheduler.submit, site.name, limit=concurrency)
+            scrape = partial(_submit_scrape, scheduler, limit=concurrency)
+        else:
+            submit = stack.enter_context(ThreadPoolExecutor(max_workers=concurrency)).submit
+            scrape = partial(submit, _scrape_page)
+        
+        def on_page(url: str, html: str) -> None:
+            logger.info(f"[{site.name}] Scraping {url}")
+            futures[url] = submit(process_page, site, url, html)
+        
+        try:
+            urls = discover_pages_for_site(site, on_page=on_page)
+        except Exception as e:
+            logger.error(f"[{site.name}] Failed to discover pages: {e}")
+            urls = []
+        
+        logger.info(f"[{site.name}] Discovered {len(urls)} pages ({len(futures)} fetched while crawling)")
+        
+        for url in urls:
+            if url not in futures:
+                futures[url] = scrape(site, url, logger, process_page)
+        
+        outcomes = (_future_outcome(futures[url]) for url in urls)
+        return _collect_outcomes(site, urls, outcomes, logger)
+
+
+def _collect_outcomes(
+    site: SiteConfig,
+    urls: list[str],
+    outcomes,
+    logger,
+    on_scraped: Callable[[str], None] | None = None,
+) -> tuple[int, int, int, list[str]]:
+    """Tally per-page outcomes and log the site summary.
+    
+    Args:
+        site: Site configuration.
+        urls: Scraped URLs.
+        outcomes: One outcome per URL, in the same order: the changed file
+            path, None if unchanged, or the exception raised for the page.
+            A future stands for the outcome it settles to.
+        logger: Logger instance.
+        on_scraped: Optional callback receiving each URL scraped
+            successfully, changed or not.
+        
+    Returns:
+        Tuple of (scraped_count, changed_count, failed_count, changed_files).
+    """
     scraped_count = 0
     changed_count = 0
     failed_count = 0
     changed_files = []
     
-    delay = site.scraping.get("delay", 1.0)
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, Future):
+            outcome = _future_outcome(outcome)
+        if isinstance(outcome, PageNotModified):
+            logger.debug(f"[{site.name}] Not modified: {url}")
+            scraped_count += 1
+            if on_scraped is not None:
+                on_scraped(url)
+        elif isinstance(outcome, ScrapingError):
+            logger.warning(f"[{site.name}] Skipping {url} ({outcome})")
+            failed_count += 1
+        elif isinstance(outcome, Exception):
+            logger.warning(f"[{site.name}] Failed to scrape {url}: {outcome}")
+            failed_count += 1
+        else:
+            if outcome:
+                changed_count += 1
+                changed_files.append(outcome)
+            scraped_count += 1
+            if on_scraped is not None:
+                on_scraped(url)
+    
+    # Summary for this site
+    logger.info(f"[{site.name}] Complete: {scraped_count} pages, {changed_count} changed, {failed_count} failed")
     
-    for i, url in enumerate(urls):
-        if i > 0:
-            time.sleep(delay)
+    return scraped_count, changed_count, failed_count, changed_files
+
+
+def _future_outcome(future: Future):
+    """Get a future's result, or the exception it raised.
+    
+    A page handed to the CPU pool resolves to a second future for its
+    written output, which is waited for as well.
+    """
+    try:
+        result = future.result()
+    except Exception as e:
+        return e
+    return _future_outcome(result) if isinstance(result, Future) else result
+
+
+def _open_validators(site: SiteConfig, urls: list[str]) -> ValidatorStore | None:
+    """Open the conditional GET validator store for a site, if enabled.
+    
+    Args:
+        site: Site configuration.
+        urls: URLs about to be scraped.
         
-        filepath = url_to_filepath(url, site.base_url, site.output_dir)
-        logger.info(f"[{site.name}] Scraping {url} -> {filepath}")
+    Returns:
+        ValidatorStore, or None if conditional requests are disabled.
+    """
+    if not site.scraping.get("conditional_get", False):
+        return None
+    
+    validators = ValidatorStore(site_state_path(site, "validators"), config_fingerprint(site))
+    
+    # A 304 is only useful while the previous output is still on disk
+    for url in urls:
+        if url in validators and not url_to_filepath(url, site.base_url, site.output_dir).exists():
+            validators.discard(url)
+    
+    return validators
+
+
+def _open_page_hashes(site: SiteConfig) -> PageHashStore | None:
+    """Open the raw body and content hash store for a site, if enabled.
+    
+    Args:
+        site: Site configuration.
         
-        try:
-            # Fetch page
-            html = fetch_page(url, site.scraping)
-            
-            # Extract content
-            content_html, title = extract_content(html, site.selectors)
-            
-            # Convert to markdown
-            markdown = html_to_markdown(content_html, site.markdown)
-            
-            # Add metadata
-            markdown = add_metadata(markdown, url, title, site.metadata)
+    Returns:
+        PageHashStore, or None if skip_unchanged is disabled.
+    """
+    if not site.scraping.get("skip_unchanged", False):
+        return None
+    
+    return PageHashStore(site_state_path(site, "hashes"), config_fingerprint(site))
+
+
+def _open_manifest(site: SiteConfig) -> OutputManifest | None:
+    """Open the output file manifest for a site, if enabled.
+    
+    Args:
+        site: Site configuration.
+        
+    Returns:
+        OutputManifest, or None if the manifest is disabled.
+    """
+    if not site.scraping.get("manifest", True):
+        return None
+    
+    return OutputManifest(site_state_path(site, "manifest"), site.output_dir)
+
+
+def _open_lastmods(site: SiteConfig) -> LastmodStore | None:
+    """Open the sitemap lastmod store for a site, if enabled.
+    
+    Args:
+        site: Site configuration.
+        
+    Returns:
+        LastmodStore, or None if incremental scraping is disabled.
+    """
+    if not site.scraping.get("incremental", False):
+        return None
+    
+    return LastmodStore(site_state_path(site, "lastmod"), config_fingerprint(site))
+
+
+def _drop_unmodified(
+    site: SiteConfig,
+    urls: list[str],
+    sitemap_lastmods: dict[str, str | None],
+    lastmods: LastmodStore,
+    logger,
+) -> list[str]:
+    """Leave out pages whose sitemap lastmod hasn't changed since they were scraped.
+    
+    Pages without a lastmod, never scraped before, or whose output file is
+    missing are kept.
+    
+    Args:
+        site: Site configuration.
+        urls: Discovered URLs.
+        sitemap_lastmods: lastmod of each URL listed in the sitemap.
+        lastmods: Lastmods recorded at each page's last scrape.
+        logger: Logger instance.
+        
+    Returns:
+        URLs still to be scraped, in the same order.
+    """
+    remaining = [
+        url for url in urls
+        if not lastmods.unmodified(url, sitemap_lastmods.get(url))
+        or not url_to_filepath(url, site.base_url, site.output_dir).exists()
+    ]
+    
+    skipped = len(urls) - len(remaining)
+    if skipped:
+        logger.info(f"[{site.name}] Skipping {skipped} pages not modified since their last scrape (sitemap lastmod)")
+    
+    return remaining
+
+
+def _scrape_page(
+    site: SiteConfig,
+    url: str,
+    logger,
+    process_page: Callable | None = None,
+    validators: ValidatorStore | None = None,
+    rate_limit: bool = True,
+) -> str | None:
+    """Fetch, convert and write a single page.
+    
+    Args:
+        site: Site configuration.
+        url: URL of the page to scrape.
+        logger: Logger instance.
+        process_page: Processing stage for the fetched HTML
+            (default: _process_page).
+        validators: Optional validator store for conditional requests.
+        rate_limit: Wait for the host's rate limit first. The scheduler
+            throttles its tasks itself (see _submit_scrape).
+        
+    Returns:
+        Path of the written file if its content changed, None otherwise.
+        
+    Raises:
+        ScrapingError: If the page could not be fetched.
+        PageNotModified: If the server reported the page as unchanged.
+    """
+    filepath = url_to_filepath(url, site.base_url, site.output_dir)
+    
+    # Wait for this host's rate limit before fetching
+    if rate_limit:
+        get_host_limiter(url, site.scraping).acquire()
+    logger.info(f"[{site.name}] Scraping {url} -> {filepath}")
+    
+    # Fetch page
+    html = fetch_page(url, site.scraping, validators=validators)
+    
+    return (process_page or _process_page)(site, url, html)
+
+
+def _submit_scrape(
+    scheduler: FairScheduler,
+    site: SiteConfig,
+    url: str,
+    logger,
+    process_page: Callable | None = None,
+    validators: ValidatorStore | None = None,
+    limit: int | None = None,
+) -> Future:
+    """Schedule a page scrape on the shared worker budget.
+    
+    The host's rate limit is waited for by the scheduler, so a worker is
+    only taken once the page may be fetched.
+    
+    Args:
+        scheduler: Worker budget shared by all sites.
+        site: Site configuration.
+        url: URL of the page to scrape.
+        logger: Logger instance.
+        process_page: Processing stage for the fetched HTML.
+        validators: Optional validator store for conditional requests.
+        limit: Maximum pages of the site scraped at once.
+        
+    Returns:
+        Future for the result of _scrape_page.
+    """
+    return scheduler.submit(
+        site.name, _scrape_page, site, url, logger, process_page, validators,
+        limit=limit,
+        throttle=get_host_limiter(url, site.scraping).reserve,
+        rate_limit=False,
+    )
+
+
+def _process_page(
+    site: SiteConfig,
+    url: str,
+    html: str,
+    validators: ValidatorStore | None = None,
+    snapshots: SnapshotStore | None = None,
+    cpu_pool: CpuPool | None = None,
+    page_hashes: PageHashStore | None = None,
+    manifest: OutputManifest | None = None,
+) -> str | None | Future:
+    """Convert fetched HTML and write it if the content changed.
+    
+    Args:
+        site: Site configuration.
+        url: URL the HTML was fetched from.
+        html: Raw page HTML.
+        validators: Optional validator store; the page's new validators are
+            committed once its output is up to date.
+        snapshots: Optional snapshot store to keep the raw HTML in.
+        cpu_pool: Optional worker processes to convert the page in. The
+            calling worker is then free to fetch again straight away.
+        page_hashes: Optional hash store to skip pages whose body or
+            content region is the same as in the previous run.
+        manifest: Optional output manifest to detect changes with.
+        
+    Returns:
+        Path of the written file if its content changed, None otherwise.
+        With a CPU pool, a future for that path instead.
+    """
+    # Keep the raw HTML so output can be rebuilt without refetching
+    if snapshots is not None:
+        snapshots.record(url, html)
+    
+    # A body processed before needs no parsing or conversion, as long as
+    # its output is still there
+    body_hash = None
+    previous_region = None
+    if page_hashes is not None:
+        body_hash = content_hash(html)
+        if url_to_filepath(url, site.base_url, site.output_dir).exists():
+            if page_hashes.body_unchanged(url, body_hash):
+                if validators is not None:
+                    validators.commit(url)
+                return None
+            previous_region = page_hashes.region_hash(url)
+    
+    write_page = partial(
+        _write_page,
+        site,
+        url,
+        validators=validators,
+        page_hashes=page_hashes,
+        body_hash=body_hash,
+        manifest=manifest,
+    )
+    if cpu_pool is not None:
+        return cpu_pool.submit(site, url, html, previous_region, then=write_page)
+    
+    return write_page(render_page(site, url, html, previous_region))
+
+
+def _write_page(
+    site: SiteConfig,
+    url: str,
+    page: RenderedPage,
+    validators: ValidatorStore | None = None,
+    page_hashes: PageHashStore | None = None,
+    body_hash: str | None = None,
+    manifest: OutputManifest | None = None,
+) -> str | None:
+    """Write a page's markdown if the content changed.
+    
+    Args:
+        site: Site configuration.
+        url: URL the page was fetched from.
+        page: Rendered page (see render_page).
+        validators: Optional validator store; the page's new validators are
+            committed once its output is up to date.
+        page_hashes: Optional hash store to record the page's hashes in.
+        body_hash: Hash of the raw body, recorded with page_hashes.
+        manifest: Optional output manifest. Its recorded hash of the old
+            file replaces reading the file back for the comparison.
+        
+    Returns:
+        Path of the written file if its content changed, None otherwise.
+    """
+    filepath = url_to_filepath(url, site.base_url, site.output_dir)
+    markdown = page.markdown
+    
+    # Check if content changed (an unchanged content region was not even
+    # converted, and its file is left as it is)
+    content_changed = markdown is not None
+    if content_changed:
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+    
+    if content_changed and manifest is not None:
+        # Compare hashes ignoring the timestamp line; the old file is only
+        # read when the manifest has no up-to-date entry for it
+        new_hash = content_hash(_strip_timestamp(markdown))
+        old_hash = manifest.body_hash(filepath)
+        if old_hash is None and filepath.exists():
+            old_hash = content_hash(_strip_timestamp(filepath.read_text(encoding="utf-8")))
+            manifest.record(filepath, old_hash)
+        content_changed = old_hash != new_hash
+    elif content_changed and filepath.exists():
+        existing = filepath.read_text(encoding="utf-8")
+        # Compare ignoring timestamp line
+        existing_body = _strip_timestamp(existing)
+        new_body = _strip_timestamp(markdown)
+        content_changed = existing_body != new_body
+    
+    if content_changed:
+        filepath.write_text(markdown, encoding="utf-8")
+        if manifest is not None:
+            manifest.record(filepath, new_hash)
+    
+    if validators is not None:
+        validators.commit(url)
+    if page_hashes is not None:
+        page_hashes.record(url, body_hash, page.region_hash)
+    
+    return str(filepath) if content_changed else None
+
+
+@cli.command()
+@click.option("--config", "-c", default="wit.yaml", help="Config file path")
+@click.option("--commit", is_flag=True, help="Commit changes to git")
+@click.option("--site", "-s", type=SITE_TYPE, help="Site(s) to rebuild (comma-separated names, default: all)")
+@click.option("--workers", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+@click.pass_context
+def rebuild(ctx: click.Context, config: str, commit: bool, site: list[str] | None, workers: int | None):
+    """Regenerate markdown from cached HTML snapshots (no fetching)."""
+    logger = get_logger()
+    
+    # Load config
+    try:
+        cfg = load_config(Path(config))
+    except FileNotFoundError:
+        logger.error(f"Config file not found: {config}")
+        sys.exit(1)
+    except ValueError as e:
+        logger.error(f"Invalid config: {e}")
+        sys.exit(1)
+    
+    if commit and not is_git_repo():
+        logger.error("Not in a git repository. Cannot commit changes.")
+        sys.exit(1)
+    
+    sites = cfg.get_sites(site)
+    
+    if not sites:
+        if site:
+            logger.error(f"No sites found matching: {', '.join(site)}")
+            logger.info(f"Available sites: {', '.join(cfg.site_names)}")
+        else:
+            logger.error("No sites configured")
+        sys.exit(1)
+    
+    all_changed_files = []
+    
+    # Conversion is CPU-bound, so spread pages across processes
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for site_config in sites:
+            snapshots = SnapshotStore.for_site(site_config)
+            latest = snapshots.latest()
             
-            # Check if content changed
-            filepath.parent.mkdir(parents=True, exist_ok=True)
+            if not latest:
+                logger.warning(f"[{site_config.name}] No snapshots found (enable scraping.snapshots and scrape first)")
+                continue
             
-            content_changed = True
-            if filepath.exists():
-                existing = filepath.read_text(encoding="utf-8")
-                # Compare ignoring timestamp line
-                existing_body = _strip_timestamp(existing)
-                new_body = _strip_timestamp(markdown)
-                content_changed = existing_body != new_body
+            logger.info(f"[{site_config.name}] Rebuilding {len(latest)} pages from snapshots")
             
-            if content_changed:
-                filepath.write_text(markdown, encoding="utf-8")
-                changed_count += 1
-                changed_files.append(str(filepath))
+            urls = sorted(latest)
+            futures = [
+                executor.submit(_rebuild_page, site_config, url, snapshots.root, latest[url])
+                for url in urls
+            ]
             
-            scraped_count += 1
+            changed_count = 0
+            failed_count = 0
+            for url, future in zip(urls, futures):
+                try:
+                    changed_file = future.result()
+                except Exception as e:
+                    logger.warning(f"[{site_config.name}] Failed to rebuild {url}: {e}")
+                    failed_count += 1
+                    continue
+                if changed_file:
+                    changed_count += 1
+                    all_changed_files.append(changed_file)
             
-        except ScrapingError as e:
-            logger.warning(f"[{site.name}] Skipping {url} ({e})")
-            failed_count += 1
-        except Exception as e:
-            logger.warning(f"[{site.name}] Failed to scrape {url}: {e}")
-            failed_count += 1
+            logger.info(f"[{site_config.name}] Complete: {len(urls)} pages, {changed_count} changed, {failed_count} failed")
     
-    # Summary for this site
-    logger.info(f"[{site.name}] Complete: {scraped_count} pages, {changed_count} changed, {failed_count} failed")
+    if commit:
+        _commit_files(cfg, all_changed_files, logger)
+
+
+def _rebuild_page(site: SiteConfig, url: str, snapshot_root: Path, digest: str) -> str | None:
+    """Regenerate one page from its snapshot (runs in a worker process).
     
-    return scraped_count, changed_count, failed_count, changed_files
+    Args:
+        site: Site configuration.
+        url: URL the snapshot was fetched from.
+        snapshot_root: Root directory of the snapshot store.
+        digest: Digest of the page's latest snapshot.
+        
+    Returns:
+        Path of the written file if its content changed, None otherwise.
+    """
+    html = SnapshotStore(snapshot_root).get(digest)
+    return _process_page(site, url, html)
+
+
+@cli.command()
+@click.option("--config", "-c", default="wit.yaml", help="Config file path")
+@click.option("--branch", "-b", required=True, help="Branch to import into (created if missing)")
+@click.option("--per", type=click.Choice(["run", "day"]), default="run", help="One commit per scrape run or per day")
+@click.option("--site", "-s", type=SITE_TYPE, help="Site(s) to replay (comma-separated names, default: all)")
+@click.option("--workers", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+@click.pass_context
+def replay(ctx: click.Context, config: str, branch: str, per: str, site: list[str] | None, workers: int | None):
+    """Import snapshot history into a git branch as commits (no checkout)."""
+    logger = get_logger()
+    
+    # Load config
+    try:
+        cfg = load_config(Path(config))
+    except FileNotFoundError:
+        logger.error(f"Config file not found: {config}")
+        sys.exit(1)
+    except ValueError as e:
+        logger.error(f"Invalid config: {e}")
+        sys.exit(1)
+    
+    if not is_git_repo():
+        logger.error("Not in a git repository. Cannot import history.")
+        sys.exit(1)
+    
+    sites = cfg.get_sites(site)
+    
+    if not sites:
+        if site:
+            logger.error(f"No sites found matching: {', '.join(site)}")
+            logger.info(f"Available sites: {', '.join(cfg.site_names)}")
+        else:
+            logger.error("No sites configured")
+        sys.exit(1)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            commits, pages = replay_history(sites, branch, executor, cfg.git, per)
+    except GitError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    
+    if not commits:
+        logger.warning("No snapshots found (enable scraping.snapshots and scrape first)")
+        return
+    
+    logger.info(f"Imported {commits} commits ({pages} page versions) into {branch}")
 
 
 @cli.command("scrape-url")
@@ -248,10 +888,10 @@ def scrape_url(ctx: click.Context, url: str, output: str, javascript: bool):
         html = fetch_page(url, scraping_config)
         
         # Extract content
-        content_html, title = extract_content(html, selectors)
+        content, title = extract_content_tree(html, selectors)
         
         # Convert to markdown
-        markdown = html_to_markdown(content_html, markdown_options)
+        markdown = soup_to_markdown(content, markdown_options)
         
         # Add metadata
         markdown = add_metadata(markdown, url, title, metadata_config)
@@ -269,6 +909,9 @@ def scrape_url(ctx: click.Context, url: str, output: str, javascript: bool):
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
+    finally:
+        close_sessions()
+        close_browser_pools()
 
 
 @cli.command()
@@ -328,28 +971,31 @@ def list_pages(ctx: click.Context, config: str, site: list[str] | None):
     
     total_pages = 0
     
-    for site_config in sites:
-        # Discover pages for this site
-        try:
-            urls = discover_pages_for_site(site_config)
-        except Exception as e:
-            logger.error(f"[{site_config.name}] Failed to discover pages: {e}")
-            continue
-        
-        total_pages += len(urls)
-        
-        # Print site header
-        if len(sites) > 1:
-            click.echo(f"\n{site_config.name} ({site_config.base_url}):")
-            click.echo(f"  Found {len(urls)} pages\n")
-        else:
-            click.echo(f"Found {len(urls)} pages:\n")
-        
-        for url in urls:
-            filepath = url_to_filepath(url, site_config.base_url, site_config.output_dir)
-            click.echo(f"  {url}")
-            click.echo(f"    -> {filepath}")
-            click.echo()
+    try:
+        for site_config in sites:
+            # Discover pages for this site
+            try:
+                urls = discover_pages_for_site(site_config)
+            except Exception as e:
+                logger.error(f"[{site_config.name}] Failed to discover pages: {e}")
+                continue
+            
+            total_pages += len(urls)
+            
+            # Print site header
+            if len(sites) > 1:
+                click.echo(f"\n{site_config.name} ({site_config.base_url}):")
+                click.echo(f"  Found {len(urls)} pages\n")
+            else:
+                click.echo(f"Found {len(urls)} pages:\n")
+            
+            for url in urls:
+                filepath = url_to_filepath(url, site_config.base_url, site_config.output_dir)
+                click.echo(f"  {url}")
+                click.echo(f"    -> {filepath}")
+                click.echo()
+    finally:
+        close_sessions()
     
     if len(sites) > 1:
         click.echo(f"\nTotal: {total_pages} pages across {len(sites)} sites")
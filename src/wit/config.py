@@ -2,10 +2,13 @@
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, TYPE_CHECKING
 from urllib.parse import urlparse
 import yaml
 
+if TYPE_CHECKING:
+    from wit.parsers import RemovalMatcher
+
 
 def _get_default_selectors(custom: dict) -> dict:
     """Get selectors with defaults applied."""
@@ -20,12 +23,27 @@ def _get_default_scraping(custom: dict) -> dict:
     """Get scraping config with defaults applied."""
     return {
         "delay": custom.get("delay", 1.0),
+        "burst": custom.get("burst", 1),
+        "concurrency": custom.get("concurrency", 1),
+        "engine": custom.get("engine", "sync"),
         "timeout": custom.get("timeout", 30),
         "user_agent": custom.get("user_agent", "wit/1.0 (+https://github.com/open-veezoo/wit)"),
         "javascript": custom.get("javascript", False),
         "retries": custom.get("retries", 3),
         "wait_until": custom.get("wait_until", "load"),
         "wait_delay": custom.get("wait_delay", 0),
+        "browser_pages": custom.get("browser_pages", 4),
+        "browser_recycle_after": custom.get("browser_recycle_after", 200),
+        "block_resources": custom.get("block_resources", {}),
+        "pool_connections": custom.get("pool_connections", 10),
+        "pool_maxsize": custom.get("pool_maxsize", 10),
+        "keep_alive": custom.get("keep_alive", True),
+        "conditional_get": custom.get("conditional_get", False),
+        "skip_unchanged": custom.get("skip_unchanged", False),
+        "manifest": custom.get("manifest", True),
+        "incremental": custom.get("incremental", False),
+        "snapshots": custom.get("snapshots", False),
+        "parser": custom.get("parser", "bs4"),
     }
 
 
@@ -84,21 +102,39 @@ class SiteConfig:
     scraping: dict = field(default_factory=dict)
     markdown: dict = field(default_factory=dict)
     metadata: dict = field(default_factory=dict)
+    state_dir: Path = field(default_factory=lambda: Path(".wit"))
+    _removal_matcher: Any = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validate and normalize site configuration."""
         # Ensure base_url doesn't have trailing slash
         self.base_url = self.base_url.rstrip("/")
         
-        # Convert output_dir to Path if string
+        # Convert output_dir and state_dir to Path if string
         if isinstance(self.output_dir, str):
             self.output_dir = Path(self.output_dir)
+        if isinstance(self.state_dir, str):
+            self.state_dir = Path(self.state_dir)
         
         # Apply defaults
         self.selectors = _get_default_selectors(self.selectors)
         self.scraping = _get_default_scraping(self.scraping)
         self.markdown = _get_default_markdown(self.markdown)
         self.metadata = _get_default_metadata(self.metadata)
+    
+    @property
+    def removal_matcher(self) -> "RemovalMatcher":
+        """The ``selectors.remove`` list compiled for single-pass removal.
+        
+        Compiled on first use and reused for every page of the site;
+        recompiled if the remove list is changed.
+        """
+        from wit.parsers import RemovalMatcher
+        
+        remove = self.selectors.get("remove", [])
+        if self._removal_matcher is None or self._removal_matcher.selectors != remove:
+            self._removal_matcher = RemovalMatcher(remove)
+        return self._removal_matcher
 
 
 @dataclass
@@ -116,12 +152,24 @@ class WitConfig:
     scraping: dict = field(default_factory=dict)
     markdown: dict = field(default_factory=dict)
     metadata: dict = field(default_factory=dict)
+    state_dir: Path = field(default_factory=lambda: Path(".wit"))
+    workers: int = 8
+    cpu_workers: int = 0
     
     def __post_init__(self):
         """Validate and normalize configuration."""
         # Apply git defaults
         self.git = _get_default_git(self.git)
         
+        if not isinstance(self.workers, int) or self.workers < 1:
+            raise ValueError("'workers' must be a positive integer")
+        
+        if not isinstance(self.cpu_workers, int) or self.cpu_workers < 0:
+            raise ValueError("'cpu_workers' must be a non-negative integer")
+        
+        if isinstance(self.state_dir, str):
+            self.state_dir = Path(self.state_dir)
+        
         # Handle legacy single-site config
         if self.base_url and not self.sites:
             # Convert to single-site list for unified handling
@@ -140,6 +188,7 @@ class WitConfig:
                 scraping=self.scraping,
                 markdown=self.markdown,
                 metadata=self.metadata,
+                state_dir=self.state_dir,
             )
             self.sites = [site]
     
@@ -208,6 +257,9 @@ def load_config(path: Path | str = Path("wit.yaml")) -> WitConfig:
     global_scraping = data.get("scraping", {})
     global_markdown = data.get("markdown", {})
     global_metadata = data.get("metadata", {})
+    state_dir = Path(data.get("state_dir", ".wit"))
+    workers = data.get("workers", 8)
+    cpu_workers = data.get("cpu_workers", 0)
     
     # Check for multi-site format
     if "sites" in data:
@@ -254,10 +306,13 @@ def load_config(path: Path | str = Path("wit.yaml")) -> WitConfig:
                 scraping=site_scraping,
                 markdown=site_markdown,
                 metadata=site_metadata,
+                state_dir=state_dir,
             )
             sites.append(site)
         
-        return WitConfig(sites=sites, git=global_git)
+        return WitConfig(
+            sites=sites, git=global_git, state_dir=state_dir, workers=workers, cpu_workers=cpu_workers
+        )
     
     # Single-site (legacy) format
     if "base_url" not in data:
@@ -272,6 +327,9 @@ def load_config(path: Path | str = Path("wit.yaml")) -> WitConfig:
         markdown=data.get("markdown", {}),
         git=global_git,
         metadata=data.get("metadata", {}),
+        state_dir=state_dir,
+        workers=workers,
+        cpu_workers=cpu_workers,
     )
 
 
@@ -322,6 +380,10 @@ pages:
   #   exclude:
   #     - /admin/*
   #     - /api/*
+  #   single_pass: false  # scrape pages while crawling instead of refetching them
+  #   concurrency: 4      # pages fetched at once (default: scraping.concurrency)
+  #   query:              # query parameters that identify a page
+  #     drop: [session, sort]  # or keep: [page] to drop everything else
 
 # Content extraction selectors
 selectors:
@@ -350,12 +412,29 @@ selectors:
 
 # Scraping behavior
 scraping:
-  delay: 1.0              # seconds between requests
+  delay: 1.0              # seconds between requests to the same host
+  concurrency: 1          # pages (and child sitemaps of an index) fetched in parallel
+  engine: sync            # sync (threads) or async (asyncio, requires aiohttp)
   timeout: 30             # request timeout in seconds
   user_agent: "wit/1.0"   # custom user agent
   javascript: false       # enable JS rendering (requires playwright)
   wait_until: load        # JS only: load, domcontentloaded, networkidle, commit
   wait_delay: 0           # JS only: extra delay (seconds) after page load
+  browser_pages: 4        # JS only: pages rendered in parallel (needs concurrency >= this)
+  browser_recycle_after: 200  # JS only: restart the browser after this many pages
+  # block_resources:      # JS only: subresources not to download
+  #   types: [image, font, media]
+  #   domains: [google-analytics.com, googletagmanager.com]
+  #   patterns: ["*.mp4"]
+  pool_connections: 10    # number of host connection pools to keep
+  pool_maxsize: 10        # keep-alive connections per host
+  keep_alive: true        # reuse connections across requests
+  conditional_get: false  # send ETag/Last-Modified validators, skip pages answered with 304
+  skip_unchanged: false   # skip pages whose body or content region hashes as last run
+  manifest: true          # track output file hashes instead of re-reading old files
+  incremental: false      # skip sitemap pages whose lastmod hasn't changed since last scrape
+  snapshots: false        # keep compressed raw HTML so `wit rebuild` can re-convert offline
+  parser: bs4             # HTML parser: bs4, lxml (pip install 'wit[lxml]') or selectolax
 
 # Markdown conversion options
 markdown:
@@ -457,5 +536,13 @@ git:
   author_name: wit[bot]
   author_email: wit[bot]@users.noreply.github.com
   message_template: "Update {{changed_count}} page(s): {{changed_files}}"
+
+# Pages fetched at once across all sites. Sites are scraped concurrently and
+# share these workers fairly; each site uses at most scraping.concurrency.
+workers: 8
+
+# Processes extracting and converting fetched pages, so conversion uses more
+# than one core (0 = convert in the fetching workers)
+cpu_workers: 0
 """
     return config
@@ -1,13 +1,64 @@
 """HTML to markdown conversion for wit."""
 
+import re
+import threading
 from datetime import datetime, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable
 
+from bs4 import BeautifulSoup
 from markdownify import markdownify as md, MarkdownConverter
 
 from wit.utils import get_logger, strip_tracking_params
 
 
+# Patterns of lines typical for a language, in order of precedence
+_LANGUAGE_PATTERNS = [
+    # Python
+    (r"^(import |from .+ import |def |class |if __name__|print\()", "python"),
+    # JavaScript/TypeScript
+    (r"^(const |let |var |function |import .+ from|export |=>)", "javascript"),
+    # Java
+    (r"^(public class |private |protected |package |import java\.)", "java"),
+    # Go
+    (r"^(package |func |import \(|var |type .+ struct)", "go"),
+    # Rust
+    (r"^(fn |let mut |use |pub |impl |struct |enum )", "rust"),
+    # Ruby
+    (r"^(require |def |class |module |end$|puts )", "ruby"),
+    # PHP
+    (r"^(<\?php|\$\w+ = |function |namespace |use )", "php"),
+    # Shell/Bash
+    (r"^(#!/bin/|#!.*bash|export |echo |if \[|\$\()", "bash"),
+    # SQL
+    (r"^(SELECT |INSERT |UPDATE |DELETE |CREATE |DROP |ALTER )", "sql"),
+    # HTML
+    (r"^<!DOCTYPE|^<html|^<head|^<body", "html"),
+    # CSS
+    (r"^(\.|#|@media|@import|body\s*\{)", "css"),
+    # JSON
+    (r'^\s*[\{\[].*[\}\]]\s*$', "json"),
+    # YAML
+    (r"^[a-zA-Z_]+:\s*$|^- [a-zA-Z]", "yaml"),
+    # XML
+    (r"^<\?xml|^<[a-zA-Z]+>", "xml"),
+]
+
+# All patterns as one alternation with a group named after each language.
+# Every pattern starts at the beginning of a line, so it is only tried at
+# line starts, and the first alternative matching there is the language
+# with the highest precedence for that line.
+_LANGUAGE_RE = re.compile(
+    "|".join(f"(?P<{lang}>{pattern})" for pattern, lang in _LANGUAGE_PATTERNS),
+    re.MULTILINE | re.IGNORECASE,
+)
+_LANGUAGE_RANK = {lang: rank for rank, (_, lang) in enumerate(_LANGUAGE_PATTERNS)}
+
+# Converters are built once per thread and set of markdown options. A
+# converter fills a tag cache while converting, so threads don't share them.
+_converters = threading.local()
+
+
 class WitMarkdownConverter(MarkdownConverter):
     """Custom markdown converter with wit-specific options."""
     
@@ -87,6 +138,36 @@ def html_to_markdown(html: str, options: dict) -> str:
             - code_language: "auto" to detect code languages
             - normalize_urls: Strip tracking parameters from URLs (default: True)
             
+    Returns:
+        Markdown string.
+    """
+    return _convert(html, options, lambda converter: converter.convert(html))
+
+
+def soup_to_markdown(soup: BeautifulSoup, options: dict) -> str:
+    """Convert an already parsed HTML tree to clean markdown.
+    
+    Produces the same output as ``html_to_markdown(str(soup), options)``
+    without serializing and reparsing the tree. The tree may be modified.
+    
+    Args:
+        soup: Parsed HTML, e.g. from ``extract_content_tree``.
+        options: Markdown conversion options (see ``html_to_markdown``).
+        
+    Returns:
+        Markdown string.
+    """
+    return _convert(soup, options, lambda converter: converter.convert_soup(soup))
+
+
+def _convert(source: Any, options: dict, convert: Callable[[MarkdownConverter], str]) -> str:
+    """Run a conversion with the configured converter and clean the result.
+    
+    Args:
+        source: HTML string or tree being converted (used by the fallback).
+        options: Markdown conversion options.
+        convert: Called with the converter to produce raw markdown.
+        
     Returns:
         Markdown string.
     """
@@ -105,21 +186,17 @@ def html_to_markdown(html: str, options: dict) -> str:
         heading_style_md = "atx"
     
     try:
-        markdown = WitMarkdownConverter(
-            heading_style=heading_style_md,
-            strip_links=strip_links,
-            include_images=include_images,
-            code_language=code_language,
-            normalize_urls=normalize_urls,
-            bullets="-",
-            autolinks=True,
-            escape_asterisks=False,
-            escape_underscores=False,
-        ).convert(html)
+        markdown = convert(_get_converter(
+            heading_style_md,
+            strip_links,
+            include_images,
+            code_language,
+            normalize_urls,
+        ))
     except Exception as e:
         logger.warning(f"Error during markdown conversion: {e}")
         # Fallback to basic conversion
-        markdown = md(html, heading_style=heading_style_md)
+        markdown = md(str(source), heading_style=heading_style_md)
     
     # Clean up the markdown
     markdown = _clean_markdown(markdown)
@@ -127,6 +204,55 @@ def html_to_markdown(html: str, options: dict) -> str:
     return markdown
 
 
+def _get_converter(
+    heading_style: str,
+    strip_links: bool,
+    include_images: bool,
+    code_language: str,
+    normalize_urls: bool,
+) -> WitMarkdownConverter:
+    """Get this thread's converter for a set of markdown options.
+    
+    Creating a converter (markdownify's option processing) and filling its
+    per-tag lookup cache is a fixed cost of some 50 us per page, so
+    converters are created once and reused. ``benchmarks/bench_converter.py``
+    shows a modest saving on tiny and small pages (around 8% in a typical
+    run, though it varies from run to run) and none measurable on larger
+    ones. Converting keeps no state on the converter apart from that
+    cache, which is per thread.
+    
+    Args:
+        heading_style: markdownify heading style.
+        strip_links: Remove hyperlinks.
+        include_images: Include image references.
+        code_language: "auto" to detect code languages.
+        normalize_urls: Strip tracking parameters from URLs.
+        
+    Returns:
+        WitMarkdownConverter for the options.
+    """
+    key = (heading_style, strip_links, include_images, code_language, normalize_urls)
+    
+    cache = getattr(_converters, "by_options", None)
+    if cache is None:
+        cache = _converters.by_options = {}
+    
+    converter = cache.get(key)
+    if converter is None:
+        converter = cache[key] = WitMarkdownConverter(
+            heading_style=heading_style,
+            strip_links=strip_links,
+            include_images=include_images,
+            code_language=code_language,
+            normalize_urls=normalize_urls,
+            bullets="-",
+            autolinks=True,
+            escape_asterisks=False,
+            escape_underscores=False,
+        )
+    return converter
+
+
 def add_metadata(
     markdown: str,
     url: str,
@@ -208,9 +334,14 @@ def _clean_markdown(markdown: str) -> str:
     return markdown
 
 
+@lru_cache(maxsize=1024)
 def _detect_language(code: str) -> str:
     """Try to detect the programming language of a code snippet.
     
+    Each line is matched once against ``_LANGUAGE_RE``; the language listed
+    first in ``_LANGUAGE_PATTERNS`` with a matching line wins. Results are
+    cached, since docs repeat the same snippets from page to page.
+    
     Args:
         code: Code snippet.
         
@@ -218,43 +349,18 @@ def _detect_language(code: str) -> str:
         Detected language or empty string.
     """
     code = code.strip()
+    best = len(_LANGUAGE_PATTERNS)
+    
+    start = 0
+    while True:
+        match = _LANGUAGE_RE.match(code, start)
+        if match is not None:
+            best = min(best, _LANGUAGE_RANK[match.lastgroup])
+            if best == 0:
+                break
+        
+        start = code.find("\n", start) + 1
+        if not start:
+            break
     
-    # Check for common patterns
-    patterns = [
-        # Python
-        (r"^(import |from .+ import |def |class |if __name__|print\()", "python"),
-        # JavaScript/TypeScript
-        (r"^(const |let |var |function |import .+ from|export |=>)", "javascript"),
-        # Java
-        (r"^(public class |private |protected |package |import java\.)", "java"),
-        # Go
-        (r"^(package |func |import \(|var |type .+ struct)", "go"),
-        # Rust
-        (r"^(fn |let mut |use |pub |impl |struct |enum )", "rust"),
-        # Ruby
-        (r"^(require |def |class |module |end$|puts )", "ruby"),
-        # PHP
-        (r"^(<\?php|\$\w+ = |function |namespace |use )", "php"),
-        # Shell/Bash
-        (r"^(#!/bin/|#!.*bash|export |echo |if \[|\$\()", "bash"),
-        # SQL
-        (r"^(SELECT |INSERT |UPDATE |DELETE |CREATE |DROP |ALTER )", "sql"),
-        # HTML
-        (r"^<!DOCTYPE|^<html|^<head|^<body", "html"),
-        # CSS
-        (r"^(\.|#|@media|@import|body\s*\{)", "css"),
-        # JSON
-        (r'^\s*[\{\[].*[\}\]]\s*$', "json"),
-        # YAML
-        (r"^[a-zA-Z_]+:\s*$|^- [a-zA-Z]", "yaml"),
-        # XML
-        (r"^<\?xml|^<[a-zA-Z]+>", "xml"),
-    ]
-    
-    import re
-    
-    for pattern, lang in patterns:
-        if re.search(pattern, code, re.MULTILINE | re.IGNORECASE):
-            return lang
-    
-    return ""
+    return _LANGUAGE_PATTERNS[best][1] if best < len(_LANGUAGE_PATTERNS) else ""
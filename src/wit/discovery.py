@@ -1,27 +1,66 @@
 """Page discovery for wit - sitemap parsing, crawling, URL expansion."""
 
+import gzip
+import io
 import re
-import time
 import xml.etree.ElementTree as ET
-from collections import deque
-from typing import Callable, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import IO, Callable, Iterator, NamedTuple, TYPE_CHECKING
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from urllib3.exceptions import HTTPError as Urllib3Error
 
 if TYPE_CHECKING:
     from wit.config import SiteConfig, WitConfig
 
-from wit.utils import get_logger, is_same_domain, matches_pattern, normalize_url
+from wit.parsers import get_parser
+from wit.scraper import fetch_page
+from wit.sessions import get_session
+from wit.throttle import fetch_slot, get_host_limiter
+from wit.utils import canonicalize_url, get_logger, is_same_domain, matches_pattern, normalize_url
 
+GZIP_MAGIC = b"\x1f\x8b"
 
-def discover_pages_for_site(site: "SiteConfig", fetch_func: Callable | None = None) -> list[str]:
+# Errors that can cut a sitemap off while it is read: malformed XML, a
+# truncated or corrupt gzip body (BadGzipFile is an OSError), or the
+# connection failing mid-download (raw reads raise urllib3's errors)
+SITEMAP_READ_ERRORS = (ET.ParseError, EOFError, OSError, requests.RequestException, Urllib3Error)
+
+# Levels of nested sitemap indexes followed below the configured sitemap
+MAX_SITEMAP_DEPTH = 3
+
+
+class SitemapEntry(NamedTuple):
+    """A ``<url>`` (or ``<sitemap>``) entry of a sitemap.
+    
+    Optional fields are None when the sitemap leaves them out. ``lastmod``
+    is kept as written; see ``parse_lastmod``.
+    """
+    
+    loc: str
+    lastmod: str | None = None
+    changefreq: str | None = None
+    priority: float | None = None
+
+
+def discover_pages_for_site(
+    site: "SiteConfig",
+    fetch_func: Callable | None = None,
+    on_page: Callable[[str, str], None] | None = None,
+    on_sitemap_entry: Callable[[SitemapEntry], None] | None = None,
+) -> list[str]:
     """Discover all pages to scrape for a single site.
     
     Args:
         site: SiteConfig instance with page discovery settings.
         fetch_func: Optional custom fetch function for testing.
+        on_page: Optional callback receiving ``(url, html)`` for every page
+            the crawler fetches (see ``discover_from_crawl``).
+        on_sitemap_entry: Optional callback receiving the SitemapEntry of
+            every page listed in the sitemap.
         
     Returns:
         List of absolute URLs to scrape.
@@ -38,7 +77,17 @@ def discover_pages_for_site(site: "SiteConfig", fetch_func: Callable | None = No
     
     # Option 2: Sitemap
     if "sitemap" in pages:
-        discovered = discover_from_sitemap(site.base_url, pages["sitemap"], site.scraping, fetch_func)
+        entries = discover_sitemap_entries(
+            site.base_url,
+            pages["sitemap"],
+            site.scraping,
+            fetch_func,
+            concurrency=site.scraping.get("concurrency", 1),
+        )
+        discovered = [entry.loc for entry in entries]
+        if on_sitemap_entry is not None:
+            for entry in entries:
+                on_sitemap_entry(entry)
         urls.update(discovered)
         logger.debug(f"Discovered {len(discovered)} pages from sitemap")
     
@@ -54,6 +103,9 @@ def discover_pages_for_site(site: "SiteConfig", fetch_func: Callable | None = No
             exclude=crawl_config.get("exclude", []),
             scraping_config=site.scraping,
             fetch_func=fetch_func,
+            on_page=on_page,
+            concurrency=crawl_config.get("concurrency", site.scraping.get("concurrency", 1)),
+            query=crawl_config.get("query"),
         )
         urls.update(discovered)
         logger.debug(f"Discovered {len(discovered)} pages from crawling")
@@ -116,11 +168,9 @@ def discover_from_urls(
             
             try:
                 html = _fetch_html(parent_url, scraping_config, fetch_func)
-                soup = BeautifulSoup(html, "lxml")
                 
                 # Find all links
-                for link in soup.find_all("a", href=True):
-                    href = link["href"]
+                for href in _extract_links(html, scraping_config):
                     full_url = normalize_url(href, base_url)
                     path = urlparse(full_url).path
                     
@@ -140,7 +190,8 @@ def discover_from_sitemap(
     base_url: str, 
     sitemap_path: str,
     scraping_config: dict,
-    fetch_func: Callable | None = None
+    fetch_func: Callable | None = None,
+    concurrency: int = 1,
 ) -> list[str]:
     """Parse sitemap.xml and extract URLs.
     
@@ -149,68 +200,240 @@ def discover_from_sitemap(
         sitemap_path: Path to sitemap (e.g., /sitemap.xml).
         scraping_config: Scraping configuration for fetching.
         fetch_func: Optional custom fetch function for testing.
+        concurrency: Number of sitemaps fetched in parallel.
         
     Returns:
         List of URLs found in sitemap.
     """
+    entries = discover_sitemap_entries(base_url, sitemap_path, scraping_config, fetch_func, concurrency)
+    return [entry.loc for entry in entries]
+
+
+def discover_sitemap_entries(
+    base_url: str, 
+    sitemap_path: str,
+    scraping_config: dict,
+    fetch_func: Callable | None = None,
+    concurrency: int = 1,
+) -> list[SitemapEntry]:
+    """Parse sitemap.xml and extract its page entries.
+    
+    Sitemaps are parsed as they are downloaded, so memory use doesn't grow
+    with their size. Gzipped sitemaps (``.xml.gz``) are decompressed on the
+    fly.
+    
+    Sitemap indexes are followed one level at a time, fetching up to
+    ``concurrency`` child sitemaps at once. Entries are returned in the
+    order a depth-first walk would find them. Each sitemap is read at most
+    once, and indexes nested deeper than ``MAX_SITEMAP_DEPTH`` are not
+    followed.
+    
+    Args:
+        base_url: Base URL of the website.
+        sitemap_path: Path to sitemap (e.g., /sitemap.xml).
+        scraping_config: Scraping configuration for fetching.
+        fetch_func: Optional custom fetch function for testing.
+        concurrency: Number of sitemaps fetched in parallel.
+        
+    Returns:
+        SitemapEntry for each same-domain URL in the sitemap.
+    """
     logger = get_logger()
     sitemap_url = normalize_url(sitemap_path, base_url)
+    read = partial(_read_sitemap, base_url=base_url, scraping_config=scraping_config, fetch_func=fetch_func)
     
-    try:
-        xml_content = _fetch_html(sitemap_url, scraping_config, fetch_func)
-        return _parse_sitemap_xml(xml_content, base_url, scraping_config, fetch_func)
-    except Exception as e:
-        logger.warning(f"Failed to fetch sitemap {sitemap_url}: {e}")
-        return []
+    # Sitemap URL -> (its page entries, child sitemaps it is responsible for)
+    sitemaps: dict[str, tuple[list[SitemapEntry], list[str]]] = {}
+    seen = {canonicalize_url(sitemap_url)}
+    level = [sitemap_url]
+    depth = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        while level:
+            next_level = []
+            
+            for url, (entries, refs) in zip(level, executor.map(read, level)):
+                children = []
+                if refs:
+                    logger.debug(f"Found sitemap index with {len(refs)} sitemaps")
+                    if depth >= MAX_SITEMAP_DEPTH:
+                        logger.warning(f"Not following sitemap index {url}: nested more than {MAX_SITEMAP_DEPTH} deep")
+                        refs = []
+                
+                for ref in refs:
+                    key = canonicalize_url(ref)
+                    if key in seen:
+                        logger.debug(f"Skipping sitemap {ref}: already read")
+                        continue
+                    seen.add(key)
+                    children.append(ref)
+                
+                sitemaps[url] = (entries, children)
+                next_level.extend(children)
+            
+            level = next_level
+            depth += 1
+    
+    # Merge in index order
+    result = []
+    stack = [sitemap_url]
+    while stack:
+        entries, children = sitemaps[stack.pop()]
+        result.extend(entries)
+        stack.extend(reversed(children))
+    
+    return result
 
 
-def _parse_sitemap_xml(
-    xml_content: str, 
+def _read_sitemap(
+    url: str,
     base_url: str,
     scraping_config: dict,
-    fetch_func: Callable | None = None
-) -> list[str]:
-    """Parse sitemap XML content and extract URLs.
+    fetch_func: Callable | None = None,
+) -> tuple[list[SitemapEntry], list[str]]:
+    """Fetch and parse one sitemap, logging failures.
+    
+    Waits for the sitemap host's rate limit first, like page fetches.
+    
+    Args:
+        url: Sitemap URL.
+        base_url: Base URL of the website.
+        scraping_config: Scraping configuration for fetching.
+        fetch_func: Optional custom fetch function.
+        
+    Returns:
+        Tuple of (page entries, child sitemap URLs); both empty if the
+        sitemap couldn't be fetched.
+    """
+    try:
+        get_host_limiter(url, scraping_config).acquire()
+        with _open_sitemap(url, scraping_config, fetch_func) as source:
+            return _parse_sitemap_xml(source, base_url)
+    except Exception as e:
+        get_logger().warning(f"Failed to fetch sitemap {url}: {e}")
+        return [], []
+
+
+def _parse_sitemap_xml(source: IO[bytes], base_url: str) -> tuple[list[SitemapEntry], list[str]]:
+    """Parse a sitemap stream into its page entries and child sitemaps.
     
-    Handles both regular sitemaps and sitemap indexes.
+    Handles both regular sitemaps and sitemap indexes. A sitemap that is
+    cut off, malformed or fails mid-download still contributes the entries
+    before the error.
     """
     logger = get_logger()
-    urls = []
+    entries = []
+    sitemap_refs = []
     
     try:
-        root = ET.fromstring(xml_content)
-    except ET.ParseError as e:
+        for kind, entry in _iter_sitemap(source):
+            if kind == "sitemap":
+                sitemap_refs.append(entry.loc)
+            elif is_same_domain(entry.loc, base_url):
+                entries.append(entry)
+    except SITEMAP_READ_ERRORS as e:
         logger.warning(f"Failed to parse sitemap XML: {e}")
-        return []
     
-    # Handle XML namespaces
-    ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-    
-    # Check if this is a sitemap index
-    sitemap_refs = root.findall(".//sm:sitemap/sm:loc", ns) or root.findall(".//sitemap/loc")
-    
-    if sitemap_refs:
-        # This is a sitemap index, recurse into each sitemap
-        logger.debug(f"Found sitemap index with {len(sitemap_refs)} sitemaps")
-        for sitemap_ref in sitemap_refs:
-            sub_sitemap_url = sitemap_ref.text.strip() if sitemap_ref.text else ""
-            if sub_sitemap_url:
-                try:
-                    sub_content = _fetch_html(sub_sitemap_url, scraping_config, fetch_func)
-                    sub_urls = _parse_sitemap_xml(sub_content, base_url, scraping_config, fetch_func)
-                    urls.extend(sub_urls)
-                except Exception as e:
-                    logger.warning(f"Failed to fetch sub-sitemap {sub_sitemap_url}: {e}")
-    else:
-        # Regular sitemap with URL entries
-        url_elements = root.findall(".//sm:url/sm:loc", ns) or root.findall(".//url/loc")
+    return entries, sitemap_refs
+
+
+def _iter_sitemap(source: IO[bytes]) -> Iterator[tuple[str, SitemapEntry]]:
+    """Stream the entries of a sitemap or sitemap index.
+    
+    Entries are matched by local tag name, so sitemaps with and without the
+    sitemaps.org namespace are read in the same pass. Each entry is dropped
+    from the tree once it has been read.
+    
+    Args:
+        source: Binary stream of sitemap XML.
+        
+    Yields:
+        ``(kind, entry)`` tuples, where kind is "url" or "sitemap".
+        
+    Raises:
+        ET.ParseError: If the XML is malformed.
+    """
+    root = None
+    
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end":
+            continue
+        
+        kind = _local_name(elem.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        
+        fields = {_local_name(child.tag): (child.text or "").strip() for child in elem}
+        if fields.get("loc"):
+            yield kind, SitemapEntry(
+                loc=fields["loc"],
+                lastmod=fields.get("lastmod") or None,
+                changefreq=fields.get("changefreq") or None,
+                priority=_parse_priority(fields.get("priority")),
+            )
+        
+        root.clear()
+
+
+def _parse_priority(value: str | None) -> float | None:
+    """Parse a sitemap ``<priority>``, ignoring invalid values."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _local_name(tag: str) -> str:
+    """Strip the ``{namespace}`` prefix from an ElementTree tag."""
+    return tag.rpartition("}")[2]
+
+
+@contextmanager
+def _open_sitemap(
+    url: str,
+    scraping_config: dict,
+    fetch_func: Callable | None = None,
+) -> Iterator[IO[bytes]]:
+    """Open a sitemap as a binary stream, decompressing gzip on the fly.
+    
+    Gzip is detected from the body itself rather than the URL, since
+    servers are inconsistent about ``.gz`` names and content types.
+    
+    Args:
+        url: Sitemap URL.
+        scraping_config: Scraping configuration.
+        fetch_func: Optional custom fetch function returning str or bytes.
         
-        for url_elem in url_elements:
-            url = url_elem.text.strip() if url_elem.text else ""
-            if url and is_same_domain(url, base_url):
-                urls.append(url)
+    Yields:
+        Readable binary stream of sitemap XML.
+    """
+    if fetch_func:
+        body = fetch_func(url)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        yield _decompressed(io.BufferedReader(io.BytesIO(body)))
+        return
     
-    return urls
+    headers = {"User-Agent": scraping_config.get("user_agent", "wit/1.0")}
+    timeout = scraping_config.get("timeout", 30)
+    
+    session = get_session(url, scraping_config)
+    with fetch_slot(), session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        # Undo Content-Encoding while reading from the socket, and keep
+        # urllib3 from closing the stream under the buffered reader
+        response.raw.decode_content = True
+        response.raw.auto_close = False
+        yield _decompressed(io.BufferedReader(response.raw))
+
+
+def _decompressed(stream: io.BufferedReader) -> IO[bytes]:
+    """Wrap a stream in a gzip reader if it starts with the gzip magic bytes."""
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
 
 
 def discover_from_crawl(
@@ -222,9 +445,27 @@ def discover_from_crawl(
     exclude: list[str],
     scraping_config: dict,
     fetch_func: Callable | None = None,
+    on_page: Callable[[str, str], None] | None = None,
+    concurrency: int = 1,
+    query: dict | None = None,
 ) -> list[str]:
     """Crawl site following links up to max_depth.
     
+    The crawl is breadth-first, one depth level at a time: the pages of a
+    level are fetched concurrently, then their links are merged in page
+    order to form the next level. The result is the same as a serial BFS
+    however fetches interleave, so the first ``max_pages`` pages are stable
+    from run to run. Fetches wait for the per-host rate limit.
+    
+    Links are canonicalized (see ``canonicalize_url``) and queued once:
+    variants differing only in a trailing slash count as one page too, and
+    the first variant found is the one crawled.
+    
+    With ``on_page``, every discovered page is fetched (including those at
+    max_depth) the way the scraper fetches it, with retries and JavaScript
+    rendering, and its HTML is handed to the callback. A caller can then
+    process pages while the crawl continues instead of fetching them again.
+    
     Args:
         base_url: Base URL of the website.
         start: Starting path to crawl from.
@@ -234,68 +475,128 @@ def discover_from_crawl(
         exclude: List of patterns to exclude.
         scraping_config: Scraping configuration for fetching.
         fetch_func: Optional custom fetch function for testing.
+        on_page: Optional callback called as ``on_page(url, html)`` for
+            each fetched page, from the crawler's worker threads.
+        concurrency: Number of pages fetched at once.
+        query: Optional query parameter rules, a dict with ``keep`` (the
+            only parameters to keep) and/or ``drop`` (parameters to remove).
         
     Returns:
-        List of discovered URLs.
+        List of discovered URLs, in BFS order.
     """
     logger = get_logger()
     
-    start_url = normalize_url(start, base_url)
+    query = query or {}
+    canonical = partial(canonicalize_url, keep_params=query.get("keep"), drop_params=query.get("drop"))
+    site_url = canonicalize_url(base_url)
+    start_url = canonical(normalize_url(start, base_url))
     
-    # BFS queue: (url, depth)
-    queue = deque([(start_url, 0)])
-    visited = set()
+    # Every URL ever queued, so each page is queued once
+    seen = {_frontier_key(start_url)}
     discovered = []
+    level = [start_url]
+    depth = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        while level and len(discovered) < max_pages:
+            # Take this level's pages in queue order, as a serial BFS would
+            pages = []
+            for url in level:
+                if len(discovered) >= max_pages:
+                    break
+                
+                # Check if URL should be included
+                path = urlparse(url).path
+                
+                if not _should_include_url(path, include, exclude):
+                    logger.debug(f"Skipping {url} (excluded by pattern)")
+                    continue
+                
+                discovered.append(url)
+                pages.append(url)
+                logger.debug(f"Discovered {url} (depth={depth})")
+            
+            # Pages at max depth are only fetched when someone wants their HTML
+            if depth >= max_depth and on_page is None:
+                break
+            
+            crawl_page = partial(
+                _crawl_page,
+                scraping_config=scraping_config,
+                fetch_func=fetch_func,
+                on_page=on_page,
+                follow_links=depth < max_depth,
+            )
+            
+            # Fetch concurrently, but queue links in page order
+            next_level = []
+            for links in executor.map(crawl_page, pages):
+                for href in links:
+                    # Skip anchors, javascript, mailto, etc.
+                    if href.startswith(("#", "javascript:", "mailto:", "tel:")):
+                        continue
+                    
+                    full_url = canonical(normalize_url(href, base_url))
+                    key = _frontier_key(full_url)
+                    
+                    # Only follow links on same domain
+                    if key not in seen and is_same_domain(full_url, site_url):
+                        seen.add(key)
+                        next_level.append(full_url)
+            
+            level = next_level
+            depth += 1
     
-    delay = scraping_config.get("delay", 1.0)
+    return discovered
+
+
+def _frontier_key(url: str) -> str:
+    """Key a canonical URL for crawl dedupe, ignoring a trailing slash."""
+    scheme_host, _, rest = url.partition("://")
+    path, sep, query = rest.partition("?")
+    if path.endswith("/") and path.count("/") > 1:
+        path = path[:-1]
+    return f"{scheme_host}://{path}{sep}{query}"
+
+
+def _crawl_page(
+    url: str,
+    scraping_config: dict,
+    fetch_func: Callable | None,
+    on_page: Callable[[str, str], None] | None,
+    follow_links: bool,
+) -> list[str]:
+    """Fetch one crawled page and get its links.
     
-    while queue and len(discovered) < max_pages:
-        url, depth = queue.popleft()
-        
-        if url in visited:
-            continue
-        
-        visited.add(url)
-        
-        # Check if URL should be included
-        path = urlparse(url).path
+    Args:
+        url: URL to fetch.
+        scraping_config: Scraping configuration for fetching.
+        fetch_func: Optional custom fetch function.
+        on_page: Optional callback for the page's HTML.
+        follow_links: Whether the page's links are needed.
         
-        if not _should_include_url(path, include, exclude):
-            logger.debug(f"Skipping {url} (excluded by pattern)")
-            continue
+    Returns:
+        Link targets in document order (empty if the fetch failed).
+    """
+    try:
+        # Wait for this host's rate limit (shared with scraping)
+        get_host_limiter(url, scraping_config).acquire()
         
-        discovered.append(url)
-        logger.debug(f"Discovered {url} (depth={depth})")
+        if on_page is not None:
+            html = fetch_func(url) if fetch_func else fetch_page(url, scraping_config)
+            on_page(url, html)
+        else:
+            html = _fetch_html(url, scraping_config, fetch_func)
         
         # Don't crawl deeper if at max depth
-        if depth >= max_depth:
-            continue
+        if not follow_links:
+            return []
         
-        # Fetch page and extract links
-        try:
-            if len(visited) > 1:  # Add delay except for first request
-                time.sleep(delay)
-            
-            html = _fetch_html(url, scraping_config, fetch_func)
-            soup = BeautifulSoup(html, "lxml")
-            
-            for link in soup.find_all("a", href=True):
-                href = link["href"]
-                
-                # Skip anchors, javascript, mailto, etc.
-                if href.startswith(("#", "javascript:", "mailto:", "tel:")):
-                    continue
-                
-                full_url = normalize_url(href, base_url)
-                
-                # Only follow links on same domain
-                if is_same_domain(full_url, base_url) and full_url not in visited:
-                    queue.append((full_url, depth + 1))
-                    
-        except Exception as e:
-            logger.warning(f"Failed to crawl {url}: {e}")
-    
-    return discovered
+        return _extract_links(html, scraping_config)
+        
+    except Exception as e:
+        get_logger().warning(f"Failed to crawl {url}: {e}")
+        return []
 
 
 def _should_include_url(path: str, include: list[str], exclude: list[str]) -> bool:
@@ -326,6 +627,19 @@ def _should_include_url(path: str, include: list[str], exclude: list[str]) -> bo
     return False
 
 
+def _extract_links(html: str, scraping_config: dict) -> list[str]:
+    """Get the href of every link on a page with the configured parser.
+    
+    Args:
+        html: Page HTML.
+        scraping_config: Scraping configuration (``parser`` setting).
+        
+    Returns:
+        Link targets in document order, as written in the page.
+    """
+    return get_parser(scraping_config.get("parser", "bs4")).links(html)
+
+
 def _fetch_html(url: str, scraping_config: dict, fetch_func: Callable | None = None) -> str:
     """Fetch HTML content from a URL.
     
@@ -343,7 +657,8 @@ def _fetch_html(url: str, scraping_config: dict, fetch_func: Callable | None = N
     headers = {"User-Agent": scraping_config.get("user_agent", "wit/1.0")}
     timeout = scraping_config.get("timeout", 30)
     
-    response = requests.get(url, headers=headers, timeout=timeout)
+    with fetch_slot():
+        response = get_session(url, scraping_config).get(url, headers=headers, timeout=timeout)
     response.raise_for_status()
     
     return response.text
@@ -1,6 +1,9 @@
 """Git operations for wit."""
 
+import os
 import subprocess
+import tempfile
+from datetime import datetime
 from pathlib import Path
 
 from wit.utils import get_logger
@@ -187,6 +190,230 @@ def commit_changes(
         raise GitError(f"Failed to commit changes: {e.stderr}")
 
 
+def commit_paths(
+    paths: list[str],
+    message: str,
+    author_name: str = "wit[bot]",
+    author_email: str = "wit[bot]@users.noreply.github.com",
+) -> str | None:
+    """Commit changes to the given paths only, without scanning the repo.
+    
+    Unlike ``commit_changes``, nothing outside ``paths`` is looked at: the
+    paths are staged with ``git update-index`` and the commit is built with
+    ``write-tree``, ``commit-tree`` and ``update-ref``. Directories are
+    expanded to the changed and untracked (not ignored) files below them.
+    Anything staged beforehand is committed too, and commit hooks don't run.
+    
+    Args:
+        paths: Files (or directories) that may have changed; deleted files
+            are removed from the commit.
+        message: Commit message.
+        author_name: Git author name.
+        author_email: Git author email.
+        
+    Returns:
+        Commit SHA if changes were committed, None if no changes.
+    """
+    logger = get_logger()
+    
+    files = [str(path) for path in paths if not Path(path).is_dir()]
+    directories = [str(path) for path in paths if Path(path).is_dir()]
+    if directories:
+        listed = _git(
+            "ls-files", "-z", "--modified", "--deleted", "--others", "--exclude-standard", "--", *directories,
+            error="Failed to list changed files",
+        )
+        files.extend(path for path in listed.split("\0") if path)
+    
+    if files:
+        _git(
+            "update-index", "--add", "--remove", "-z", "--stdin",
+            input="".join(f"{path}\0" for path in files),
+            error="Failed to stage files",
+        )
+    
+    tree = _git("write-tree", error="Failed to write tree").strip()
+    
+    # An unborn branch has no parent commit yet
+    try:
+        parent, parent_tree = _git("rev-parse", "HEAD", "HEAD^{tree}", error="").split()
+    except GitError:
+        parent = parent_tree = None
+    
+    if tree == parent_tree:
+        logger.info("No changes to commit")
+        return None
+    
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": author_name,
+        "GIT_AUTHOR_EMAIL": author_email,
+        "GIT_COMMITTER_NAME": author_name,
+        "GIT_COMMITTER_EMAIL": author_email,
+    }
+    parent_args = ["-p", parent] if parent else []
+    sha = _git(
+        "commit-tree", tree, *parent_args, "-F", "-",
+        input=message.rstrip("\n") + "\n", env=env, error="Failed to commit changes",
+    ).strip()
+    
+    # Only move HEAD if nobody else committed in the meantime
+    subject = message.splitlines()[0] if message else ""
+    old_value = [parent] if parent else []
+    _git("update-ref", "-m", f"commit: {subject}", "HEAD", sha, *old_value, error="Failed to update HEAD")
+    
+    return _git("rev-parse", "--short", sha, error="Failed to get commit SHA").strip()
+
+
+class FastImport:
+    """Stream commits into a branch with ``git fast-import``.
+    
+    One long-running process writes all blobs, trees and commits, so a
+    backfill of thousands of commits costs no more subprocesses than one.
+    Neither the index nor the working tree is touched; the branch ref is
+    only updated by ``close()``, once every commit has been written. A new
+    branch starts without history, an existing one is continued.
+    
+    Use as a context manager; leaving it with an exception aborts the
+    import and leaves the branch as it was.
+    
+    Raises:
+        GitError: If the branch is checked out.
+    """
+    
+    def __init__(self, branch: str):
+        self.ref = branch if branch.startswith("refs/") else f"refs/heads/{branch}"
+        self.commits = 0
+        
+        # Moving the checked-out branch would leave the working tree behind
+        try:
+            head = _git("symbolic-ref", "-q", "HEAD", error="").strip()
+        except GitError:
+            head = None
+        if head == self.ref:
+            raise GitError(f"Cannot import into {branch}: it is checked out")
+        
+        try:
+            self._parent = _git("rev-parse", "--verify", "-q", f"{self.ref}^{{commit}}", error="").strip()
+        except GitError:
+            self._parent = None
+        
+        # fast-import only writes to stderr on failure; a file can't fill up
+        # and stall it like an unread pipe could
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            ["git", "fast-import", "--quiet", "--done"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._stderr,
+        )
+    
+    def commit(
+        self,
+        files: dict[str, bytes | None],
+        message: str,
+        author_name: str,
+        author_email: str,
+        when: datetime,
+    ) -> None:
+        """Add a commit on top of the previous one.
+        
+        Args:
+            files: Contents by repository-relative path; None deletes the
+                file. Other files are kept as they were.
+            message: Commit message.
+            author_name: Author and committer name.
+            author_email: Author and committer email.
+            when: Author and committer date (timezone-aware).
+        """
+        identity = f"{author_name} <{author_email}> {int(when.timestamp())} {when.strftime('%z') or '+0000'}"
+        message_data = message.rstrip("\n").encode("utf-8") + b"\n"
+        
+        out = [
+            f"commit {self.ref}\n".encode(),
+            f"author {identity}\ncommitter {identity}\n".encode("utf-8"),
+            f"data {len(message_data)}\n".encode(), message_data,
+        ]
+        if self.commits == 0 and self._parent:
+            out.append(f"from {self._parent}\n".encode())
+        for path, data in files.items():
+            if data is None:
+                out.append(f"D {_quote_path(path)}\n".encode("utf-8"))
+            else:
+                out.append(f"M 100644 inline {_quote_path(path)}\ndata {len(data)}\n".encode("utf-8"))
+                out.extend((data, b"\n"))
+        out.append(b"\n")
+        
+        try:
+            self._process.stdin.write(b"".join(out))
+        except BrokenPipeError:
+            self.close()
+        self.commits += 1
+    
+    def close(self) -> None:
+        """Finish the import and update the branch.
+        
+        Raises:
+            GitError: If fast-import failed.
+        """
+        if self._process.returncode is None:
+            try:
+                self._process.stdin.write(b"done\n")
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._process.wait()
+        
+        if self._process.returncode != 0:
+            self._stderr.seek(0)
+            raise GitError(f"Failed to import commits: {self._stderr.read().decode('utf-8', 'replace')}")
+    
+    def abort(self) -> None:
+        """Stop the import without updating the branch."""
+        if self._process.returncode is None:
+            self._process.kill()
+            self._process.wait()
+    
+    def __enter__(self) -> "FastImport":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.close()
+            else:
+                self.abort()
+        finally:
+            self._stderr.close()
+
+
+def _quote_path(path: str) -> str:
+    """Quote a path for fast-import if it needs it."""
+    if path.startswith('"') or any(c in path for c in '\n\\'):
+        return '"' + path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+    return path
+
+
+def _git(*args: str, error: str, input: str | None = None, env: dict | None = None) -> str:
+    """Run a git command and return its output.
+    
+    Raises:
+        GitError: If the command fails, with ``error`` and git's message.
+    """
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            input=input,
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        )
+        return result.stdout
+    except subprocess.CalledProcessError as e:
+        raise GitError(f"{error}: {e.stderr}")
+
+
 def is_git_repo() -> bool:
     """Check if current directory is inside a git repository.
     
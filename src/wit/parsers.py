@@ -0,0 +1,927 @@
+"""HTML parser backends for content extraction and link discovery.
+
+BeautifulSoup is the reference backend. The lxml and selectolax backends
+skip building BeautifulSoup's Python object tree and serialize the content
+element the same way BeautifulSoup does, so all backends produce the same
+``(content_html, title)``. Pages a backend cannot handle identically (e.g.
+a selector it does not support) are handed to the BeautifulSoup backend.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup, Tag
+from bs4.builder import HTMLTreeBuilder
+from lxml import etree
+
+from wit.utils import get_logger
+
+PARSERS = ("bs4", "lxml", "selectolax")
+
+# Serialization rules of BeautifulSoup's "minimal" formatter
+_VOID_ELEMENTS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+_LIST_ATTRIBUTES = HTMLTreeBuilder.DEFAULT_CDATA_LIST_ATTRIBUTES
+_STRING_CONTAINERS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+_RAW_TEXT_ELEMENTS = frozenset({"script", "style"})
+_PRESERVE_WHITESPACE_ELEMENTS = frozenset(HTMLTreeBuilder.DEFAULT_PRESERVE_WHITESPACE_TAGS)
+_ASCII_SPACES = frozenset("\x20\x0a\x09\x0c\x0d")
+_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_ESCAPE_RE = re.compile(r"[<>&]")
+_NONWHITESPACE_RE = re.compile(r"\S+")
+_META_CHARSET_RE = re.compile(r"((^|;)\s*charset=)([^;]*)", re.M)
+_TABLE_RE = re.compile(r"<table\b", re.I)
+# Pseudo-classes and sibling combinators can depend on what was removed before
+_ORDER_SENSITIVE_RE = re.compile(r"[:+~]")
+_STANDARDS_DOCTYPE_RE = re.compile(r"\s*(?:<!--.*?-->\s*)*<!doctype\s+html\s*>", re.I | re.S)
+_UPPERCASE_NAME_RE = re.compile(r"""(?i:\b(?:class|id))\s*=\s*(?:"[^"]*[A-Z]|'[^']*[A-Z]|[^\s"'>]*[A-Z])""")
+_UPPERCASE_RE = re.compile(r"[A-Z]")
+_SIMPLE_SELECTOR_RE = re.compile(
+    r"(?P<tag>[a-zA-Z][a-zA-Z0-9-]*)"
+    r"|\.(?P<cls>-?[_a-zA-Z][_a-zA-Z0-9-]*)"
+    r"|#(?P<id>-?[_a-zA-Z][_a-zA-Z0-9-]*)"
+)
+_TBODY_RE = re.compile(r"<tbody\b", re.I)
+
+# Attributes libxml2 fills in with their own name when written without a value
+_LIBXML2_BOOLEAN_ATTRIBUTES = frozenset({
+    "checked", "compact", "declare", "defer", "disabled", "ismap", "multiple",
+    "nohref", "noresize", "noshade", "nowrap", "readonly", "selected",
+})
+
+DEFAULT_CONTENT_SELECTORS = ["main", "article", ".content", "body"]
+
+# Pages from this many characters on are extracted while they're parsed
+# (lxml backend), so only the content region is ever held as a tree
+STREAM_THRESHOLD = 1_000_000
+_STREAM_CHUNK_SIZE = 64 * 1024
+_DOCUMENT_ELEMENTS = frozenset({"html", "body"})
+
+
+class UnsupportedDocument(Exception):
+    """Raised when a backend cannot reproduce the reference result for a page."""
+    pass
+
+
+class RemovalMatcher:
+    """``selectors.remove`` compiled for removal in as few passes as possible.
+
+    Removing matches selector by selector walks the whole tree once per
+    selector. Instead, selectors are split into passes: a run of selectors
+    whose matches cannot change when other elements are removed forms one
+    pass, while a selector that depends on siblings or text
+    (``:first-child``, ``h2 + p``, ``:-soup-contains()`` ...) gets a pass of
+    its own, in order, so the result is the same as removing selector by
+    selector.
+
+    Within a pass, plain ``tag``, ``.class`` and ``#id`` selectors are
+    looked up in sets during a single walk of the tree, which skips the
+    subtrees it removes. Any other selectors of the pass are matched
+    together as one selector list.
+
+    Attributes:
+        selectors: The selectors as configured.
+        passes: ``RemovalPass`` tuples, in the order they must run.
+        groups: The CSS selector list of each pass, for engines that match
+            whole selector lists natively.
+    """
+
+    def __init__(self, selectors: list[str]):
+        self.selectors = list(selectors)
+        self.passes = _compile_passes(self.selectors)
+        self.groups = [", ".join(step.selectors) for step in self.passes]
+
+
+class RemovalPass(NamedTuple):
+    """One pass of a ``RemovalMatcher``."""
+
+    selectors: tuple[str, ...]
+    tags: frozenset[str]
+    classes: frozenset[str]
+    ids: frozenset[str]
+    css: str | None
+
+    @property
+    def walks(self) -> bool:
+        """Whether the pass has plain selectors to match while walking."""
+        return bool(self.tags or self.classes or self.ids)
+
+    def matches(self, name: str, classes, element_id) -> bool:
+        """Check an element against the plain selectors of the pass.
+
+        Args:
+            name: Lowercase tag name.
+            classes: The element's class names.
+            element_id: Value of the id attribute, or None.
+        """
+        return (
+            name in self.tags
+            or (element_id is not None and element_id in self.ids)
+            or not self.classes.isdisjoint(classes)
+        )
+
+
+def _compile_passes(selectors: list[str]) -> list[RemovalPass]:
+    """Split removal selectors into passes (see ``RemovalMatcher``)."""
+    passes = []
+    run = []
+    for selector in selectors:
+        if _ORDER_SENSITIVE_RE.search(selector):
+            if run:
+                passes.append(_compile_pass(run))
+                run = []
+            passes.append(_compile_pass([selector]))
+        else:
+            run.append(selector)
+    if run:
+        passes.append(_compile_pass(run))
+    return passes
+
+
+def _compile_pass(selectors: list[str]) -> RemovalPass:
+    """Sort the selectors of one pass into lookup sets and the rest."""
+    tags, classes, ids, rest = set(), set(), set(), []
+    for selector in selectors:
+        match = _SIMPLE_SELECTOR_RE.fullmatch(selector.strip())
+        if match is None:
+            rest.append(selector)
+        elif match.group("tag"):
+            # Tag names are case-insensitive in HTML, classes and ids are not
+            tags.add(match.group("tag").lower())
+        elif match.group("cls"):
+            classes.add(match.group("cls"))
+        else:
+            ids.add(match.group("id"))
+    return RemovalPass(
+        tuple(selectors),
+        frozenset(tags),
+        frozenset(classes),
+        frozenset(ids),
+        ", ".join(rest) or None,
+    )
+
+
+class ParserBackend:
+    """Base class for parser backends."""
+
+    name = ""
+
+    def extract(
+        self,
+        html: str,
+        selectors: dict,
+        removal: RemovalMatcher | None = None,
+    ) -> tuple[str, str | None]:
+        """Extract main content and optional title using selectors.
+
+        See ``wit.scraper.extract_content``. ``removal`` is the compiled
+        form of ``selectors["remove"]``; it is compiled on the fly if not
+        given.
+        """
+        raise NotImplementedError
+
+    def links(self, html: str) -> list[str]:
+        """Get the ``href`` of every ``<a>`` element, in document order."""
+        raise NotImplementedError
+
+
+class Bs4Parser(ParserBackend):
+    """Reference backend: BeautifulSoup on top of lxml."""
+
+    name = "bs4"
+
+    def extract_tree(
+        self,
+        html: str,
+        selectors: dict,
+        removal: RemovalMatcher | None = None,
+    ) -> tuple[BeautifulSoup, str | None]:
+        """Extract main content as a parsed tree.
+
+        Args:
+            html: HTML content to extract from.
+            selectors: Selector dict (see ``extract_content``).
+            removal: Optional precompiled ``selectors["remove"]``.
+
+        Returns:
+            Tuple of (content, title). Content is a BeautifulSoup document
+            whose only child is the content element.
+        """
+        logger = get_logger()
+
+        soup = BeautifulSoup(html, "lxml")
+
+        # Remove unwanted elements first
+        for step in _removal_for(selectors, removal).passes:
+            if step.walks:
+                for element in _walk_bs4(soup, step):
+                    element.decompose()
+            if step.css:
+                for element in soup.select(step.css):
+                    element.decompose()
+
+        # Extract title
+        title = None
+        title_selector = selectors.get("title", "h1")
+        if title_selector:
+            title_elem = soup.select_one(title_selector)
+            if title_elem:
+                title = title_elem.get_text(strip=True)
+
+        # Extract main content (first matching selector wins)
+        content_selectors = selectors.get("content", DEFAULT_CONTENT_SELECTORS)
+        content_elem = None
+
+        for selector in content_selectors:
+            content_elem = soup.select_one(selector)
+            if content_elem:
+                logger.debug(f"Found content using selector: {selector}")
+                break
+
+        if not content_elem:
+            # Fallback to body
+            content_elem = soup.find("body")
+            if content_elem:
+                logger.debug("Using body as fallback content")
+            else:
+                logger.debug("Using full document as fallback content")
+                return soup, title
+
+        # Move the element into a document of its own (no copy, no reparse)
+        content = BeautifulSoup("", "html.parser")
+        content.append(content_elem.extract())
+
+        return content, title
+
+    def extract(self, html, selectors, removal=None):
+        content, title = self.extract_tree(html, selectors, removal)
+        return str(content), title
+
+    def links(self, html: str) -> list[str]:
+        soup = BeautifulSoup(html, "lxml")
+        return [link["href"] for link in soup.find_all("a", href=True)]
+
+
+class LxmlParser(ParserBackend):
+    """lxml.html tree with CSS selectors translated to XPath by cssselect.
+
+    Uses the same libxml2 parser as the reference backend, so trees match
+    exactly.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        import cssselect  # noqa: F401 - fail early if missing
+
+    def extract(self, html, selectors, removal=None):
+        removal = _removal_for(selectors, removal)
+        try:
+            return self._extract(html, selectors, removal)
+        except UnsupportedDocument as e:
+            get_logger().debug(f"lxml parser fell back to BeautifulSoup: {e}")
+            return get_parser("bs4").extract(html, selectors, removal)
+
+    def _extract(self, html: str, selectors: dict, removal: RemovalMatcher) -> tuple[str, str | None]:
+        if len(html) >= STREAM_THRESHOLD and _streamable(selectors, removal):
+            result = self._extract_streaming(html, selectors, removal)
+            if result is not None:
+                return result
+
+        root = self._parse(html)
+        body = root.find("body")
+        if body is None:
+            raise UnsupportedDocument("document has no body")
+
+        # Remove unwanted elements first (tail text stays, like decompose())
+        for step in removal.passes:
+            matches = _walk_lxml(root, step) if step.walks else []
+            if step.css:
+                matches += root.xpath(_xpath(step.css))
+            for element in matches:
+                parent = element.getparent()
+                if parent is None:
+                    raise UnsupportedDocument("selector removes the whole document")
+                _drop_element(element, parent)
+
+        # Extract title
+        title = None
+        title_selector = selectors.get("title", "h1")
+        if title_selector:
+            matches = root.xpath(_xpath(title_selector))
+            if matches:
+                title = "".join(_stripped(_lxml_strings(matches[0], False)))
+
+        # Extract main content (first matching selector wins)
+        content_elem = None
+        for selector in selectors.get("content", DEFAULT_CONTENT_SELECTORS):
+            matches = root.xpath(_xpath(selector))
+            if matches:
+                content_elem = matches[0]
+                break
+
+        if content_elem is None:
+            content_elem = root.find("body")
+            if content_elem is None:
+                raise UnsupportedDocument("body was removed")
+
+        preserve = any(
+            ancestor.tag in _PRESERVE_WHITESPACE_ELEMENTS for ancestor in content_elem.iterancestors()
+        )
+        out = []
+        _serialize_lxml(content_elem, out, _BooleanAttributes(html), preserve)
+        return "".join(out), title
+
+    def _extract_streaming(
+        self,
+        html: str,
+        selectors: dict,
+        removal: RemovalMatcher,
+    ) -> tuple[str, str | None] | None:
+        """Extract content while the page is parsed, stopping once it's found.
+
+        Only open content candidates and the title element are kept in the
+        tree; everything else is freed as soon as it has been parsed, and
+        parsing stops when the first content selector's match and the title
+        are complete. Same result as ``_extract``, see ``_streamable`` for
+        which selectors this handles.
+
+        Returns:
+            ``(content_html, title)``, or None if the content turned out to
+            be the whole ``<html>`` or ``<body>`` (or nothing matched) and
+            the page needs the full parse.
+        """
+        # Elements are matched by looking up their tag, classes and id
+        content = selectors.get("content", DEFAULT_CONTENT_SELECTORS)
+        content_index: dict[tuple[str, str], list[int]] = {}
+        for index, selector in enumerate(content):
+            for key in _selector_keys(_compile_pass([selector])):
+                content_index.setdefault(key, []).append(index)
+        title_selector = selectors.get("title", "h1")
+        title_keys = _selector_keys(_compile_pass([title_selector])) if title_selector else frozenset()
+        removal_keys = frozenset().union(*(_selector_keys(step) for step in removal.passes))
+        booleans = _BooleanAttributes(html)
+
+        found: dict[int, str] = {}
+        candidates: dict = {}  # open element -> indexes of the selectors it matched
+        started: set[int] = set()
+        deferred = len(content)  # best selector matching <html> or <body>
+        title = None
+        title_element = None
+        title_done = not title_keys
+        removed = None  # outermost open element being removed
+
+        try:
+            for event, element in _pull_events(html):
+                if removed is not None:
+                    if event == "end" and element is removed:
+                        removed = None
+                        # Inside a candidate it is dropped with the candidate's other removals
+                        if not candidates and title_element is None:
+                            _free(element)
+                    continue
+
+                if event == "start":
+                    keys = _element_keys(element)
+                    if not removal_keys.isdisjoint(keys):
+                        if element.getparent() is None:
+                            raise UnsupportedDocument("selector removes the whole document")
+                        removed = element
+                        continue
+                    if not title_done and title_element is None and not title_keys.isdisjoint(keys):
+                        title_element = element
+                    matched = sorted(
+                        {index for key in keys for index in content_index.get(key, ()) if index not in started}
+                    )
+                    if matched:
+                        started.update(matched)
+                        if element.tag in _DOCUMENT_ELEMENTS:
+                            # Keeping these would keep everything; the full
+                            # parse handles pages that end up needing them
+                            deferred = min(deferred, *matched)
+                        else:
+                            candidates[element] = matched
+                    continue
+
+                if element is title_element:
+                    _remove_within(element, removal)
+                    title = "".join(_stripped(_lxml_strings(element, False)))
+                    title_element = None
+                    title_done = True
+                if element in candidates:
+                    _remove_within(element, removal)
+                    preserve = any(
+                        ancestor.tag in _PRESERVE_WHITESPACE_ELEMENTS for ancestor in element.iterancestors()
+                    )
+                    out = []
+                    _serialize_lxml(element, out, booleans, preserve)
+                    for index in candidates.pop(element):
+                        found[index] = "".join(out)
+                if 0 in found and title_done:
+                    return found[0], title
+                if not candidates and title_element is None:
+                    _free(element)
+        except etree.XMLSyntaxError:
+            # Nothing to parse
+            return None
+
+        if not found or min(found) > deferred:
+            return None
+        return found[min(found)], title
+
+    def links(self, html: str) -> list[str]:
+        try:
+            root = self._parse(html)
+        except UnsupportedDocument:
+            return []
+        return [href for href in root.xpath("//a/@href")]
+
+    def _parse(self, html: str):
+        """Parse a document the way BeautifulSoup's lxml builder does."""
+        try:
+            root = etree.fromstring(html, etree.HTMLParser())
+        except ValueError:
+            # Unicode input may not carry an XML encoding declaration
+            root = etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+        if root is None:
+            raise UnsupportedDocument("empty document")
+        return root
+
+
+class SelectolaxParser(ParserBackend):
+    """selectolax bindings to the lexbor HTML5 parser.
+
+    lexbor follows the HTML5 tree construction rules, while the reference
+    backend uses libxml2. Well-formed documents give the same trees, but
+    malformed markup may be repaired differently, and tables always get
+    the ``<tbody>`` HTML5 inserts.
+    """
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_class = LexborHTMLParser
+
+    def extract(self, html, selectors, removal=None):
+        removal = _removal_for(selectors, removal)
+        try:
+            return self._extract(html, selectors, removal)
+        except UnsupportedDocument as e:
+            get_logger().debug(f"selectolax parser fell back to BeautifulSoup: {e}")
+            return get_parser("bs4").extract(html, selectors, removal)
+
+    def _extract(self, html: str, selectors: dict, removal: RemovalMatcher) -> tuple[str, str | None]:
+        tree = self._parser_class(html)
+        # HTML5 always creates a <body>; libxml2 does not for empty documents
+        if tree.body is None or tree.body.child is None:
+            raise UnsupportedDocument("document has no body")
+
+        # Without a standards doctype, lexbor matches classes and ids
+        # case-insensitively, which only matters if either has capitals
+        if not _STANDARDS_DOCTYPE_RE.match(html) and (
+            _UPPERCASE_NAME_RE.search(html) or _has_uppercase(selectors, removal)
+        ):
+            raise UnsupportedDocument("quirks mode class or id with capitals")
+
+        # HTML5 inserts <tbody> into tables, libxml2 does not
+        implied_tbody = False
+        if _TABLE_RE.search(html):
+            written = len(_TBODY_RE.findall(html))
+            built = len(tree.css("tbody"))
+            if written == 0:
+                implied_tbody = built > 0
+            elif written != built:
+                raise UnsupportedDocument("mix of written and implied <tbody>")
+
+        # Remove unwanted elements first. decompose() frees the whole subtree,
+        # so matches nested inside another match are skipped.
+        for group in removal.groups:
+            matches = _lexbor_select(tree, group)
+            matched = {node.mem_id for node in matches}
+            for node in [node for node in matches if not _has_ancestor_in(node, matched)]:
+                node.decompose()
+
+        # Extract title
+        title = None
+        title_selector = selectors.get("title", "h1")
+        if title_selector:
+            matches = _lexbor_select(tree, title_selector)
+            if matches:
+                title = "".join(_stripped(_lexbor_strings(matches[0], False)))
+
+        # Extract main content (first matching selector wins)
+        content_node = None
+        for selector in selectors.get("content", DEFAULT_CONTENT_SELECTORS):
+            matches = _lexbor_select(tree, selector)
+            if matches:
+                content_node = matches[0]
+                break
+
+        if content_node is None:
+            content_node = tree.body
+
+        preserve = False
+        parent = content_node.parent
+        while parent is not None:
+            preserve = preserve or parent.tag in _PRESERVE_WHITESPACE_ELEMENTS
+            parent = parent.parent
+        out = []
+        _serialize_lexbor(content_node, out, preserve, implied_tbody)
+        return "".join(out), title
+
+    def links(self, html: str) -> list[str]:
+        tree = self._parser_class(html)
+        return [node.attributes.get("href") or "" for node in tree.css("a[href]")]
+
+
+_parsers: dict[str, ParserBackend] = {}
+
+
+def get_parser(name: str = "bs4") -> ParserBackend:
+    """Get a parser backend by name.
+
+    Args:
+        name: One of ``PARSERS``.
+
+    Returns:
+        Shared ParserBackend instance.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+        ScrapingError: If the backend's library is not installed.
+    """
+    if name in _parsers:
+        return _parsers[name]
+
+    backends = {"bs4": Bs4Parser, "lxml": LxmlParser, "selectolax": SelectolaxParser}
+    if name not in backends:
+        raise ValueError(f"Unknown parser '{name}' (choose from: {', '.join(PARSERS)})")
+
+    try:
+        parser = backends[name]()
+    except ImportError:
+        from wit.scraper import ScrapingError
+
+        raise ScrapingError(
+            f"The {name} parser requires extra packages. "
+            f"Install with: pip install 'wit[{name}]'"
+        )
+
+    _parsers[name] = parser
+    return parser
+
+
+def _removal_for(selectors: dict, removal: RemovalMatcher | None) -> RemovalMatcher:
+    """Get the compiled removal selectors, compiling them if not given."""
+    if removal is None:
+        removal = _compile_removal(tuple(selectors.get("remove", [])))
+    return removal
+
+
+@lru_cache(maxsize=64)
+def _compile_removal(selectors: tuple[str, ...]) -> RemovalMatcher:
+    """Compile removal selectors for callers without a SiteConfig."""
+    return RemovalMatcher(list(selectors))
+
+
+@lru_cache(maxsize=256)
+def _xpath(selector: str) -> str:
+    """Translate a CSS selector to XPath (cached per selector)."""
+    from cssselect import HTMLTranslator, SelectorError
+
+    try:
+        return HTMLTranslator().css_to_xpath(selector)
+    except SelectorError as e:
+        raise UnsupportedDocument(f"selector {selector!r} not supported by cssselect: {e}")
+
+
+def _lexbor_select(tree, selector: str) -> list:
+    """Select nodes, treating selectors lexbor rejects as unsupported."""
+    from selectolax.lexbor import SelectolaxError
+
+    try:
+        return tree.css(selector)
+    except SelectolaxError as e:
+        raise UnsupportedDocument(f"selector {selector!r} not supported by lexbor: {e}")
+
+
+def _has_uppercase(selectors: dict, removal: RemovalMatcher) -> bool:
+    """Check whether any selector used for a page has capital letters."""
+    used = [*selectors.get("content", DEFAULT_CONTENT_SELECTORS), selectors.get("title") or "", *removal.selectors]
+    return any(_UPPERCASE_RE.search(selector) for selector in used)
+
+
+def _walk_bs4(soup: BeautifulSoup, step: RemovalPass) -> list:
+    """Find the elements matching a pass's plain selectors in one walk.
+
+    Subtrees of matches are not entered, they go with the match.
+    """
+    found = []
+    stack = list(soup.contents)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Tag):
+            continue
+        if step.matches(node.name, node.get("class") or (), node.get("id")):
+            found.append(node)
+        else:
+            stack.extend(node.contents)
+    return found
+
+
+def _streamable(selectors: dict, removal: RemovalMatcher) -> bool:
+    """Check whether every selector can be decided when an element starts.
+
+    Plain tag, class and id selectors only look at the element itself, so
+    streaming extraction can match them before the element's content has
+    been parsed.
+    """
+    content = selectors.get("content", DEFAULT_CONTENT_SELECTORS)
+    title = selectors.get("title", "h1")
+    return (
+        bool(content)
+        and content[0].strip().lower() not in _DOCUMENT_ELEMENTS
+        and all(_SIMPLE_SELECTOR_RE.fullmatch(selector.strip()) for selector in content)
+        and (not title or _SIMPLE_SELECTOR_RE.fullmatch(title.strip()) is not None)
+        and all(step.css is None for step in removal.passes)
+    )
+
+
+def _pull_events(html: str):
+    """Parse a page chunk by chunk, yielding lxml's start and end events."""
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    for offset in range(0, len(html), _STREAM_CHUNK_SIZE):
+        parser.feed(html[offset:offset + _STREAM_CHUNK_SIZE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _selector_keys(step: RemovalPass) -> frozenset[tuple[str, str]]:
+    """Get the lookup keys of a pass's plain selectors (see ``_element_keys``)."""
+    return frozenset(
+        [("tag", name) for name in step.tags]
+        + [("class", name) for name in step.classes]
+        + [("id", name) for name in step.ids]
+    )
+
+
+def _element_keys(element) -> list[tuple[str, str]]:
+    """Get the keys plain selectors matching an lxml element would have."""
+    keys = [("tag", element.tag)]
+    classes = element.get("class")
+    if classes:
+        keys.extend(("class", name) for name in _NONWHITESPACE_RE.findall(classes))
+    element_id = element.get("id")
+    if element_id is not None:
+        keys.append(("id", element_id))
+    return keys
+
+
+def _lxml_matches(step: RemovalPass, element) -> bool:
+    """Check an lxml element against the plain selectors of a pass."""
+    # Comments and processing instructions have a callable tag
+    if not isinstance(element.tag, str):
+        return False
+    classes = element.get("class")
+    classes = _NONWHITESPACE_RE.findall(classes) if classes else ()
+    return step.matches(element.tag, classes, element.get("id"))
+
+
+def _remove_within(element, removal: RemovalMatcher) -> None:
+    """Apply plain removal selectors to the descendants of an element."""
+    for step in removal.passes:
+        for match in _walk_lxml(element, step):
+            _drop_element(match, match.getparent())
+
+
+def _free(element) -> None:
+    """Free a parsed element and the earlier siblings it leaves behind."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def _walk_lxml(root, step: RemovalPass) -> list:
+    """Find the elements matching a pass's plain selectors in one walk.
+
+    Subtrees of matches are not entered, they go with the match.
+    """
+    found = []
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        if _lxml_matches(step, element):
+            found.append(element)
+        elif isinstance(element.tag, str):
+            stack.extend(element)
+    return found
+
+
+def _has_ancestor_in(node, mem_ids: set) -> bool:
+    """Check whether any ancestor of a lexbor node is in a set of node ids."""
+    parent = node.parent
+    while parent is not None:
+        if parent.mem_id in mem_ids:
+            return True
+        parent = parent.parent
+    return False
+
+
+def _drop_element(element, parent) -> None:
+    """Remove an element but keep the text that follows it.
+
+    The element is swapped for a processing instruction holding its tail,
+    so the text before and after it stays two strings as after
+    ``decompose()``. libxml2's HTML parser never creates processing
+    instructions and selectors don't match them, so they only mark
+    removals.
+    """
+    marker = etree.ProcessingInstruction("wit-removed")
+    marker.tail = element.tail
+    parent.replace(element, marker)
+
+
+def _stripped(strings) -> list[str]:
+    """Strip strings and drop empty ones, like ``get_text(strip=True)``."""
+    return [text for text in (s.strip() for s in strings) if text]
+
+
+def _escape(text: str) -> str:
+    """Escape text the way BeautifulSoup's minimal formatter does."""
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group()], text)
+
+
+def _format_start_tag(name: str, attributes: list[tuple[str, str]], void: bool) -> str:
+    """Format a start tag with BeautifulSoup's attribute rules."""
+    parts = ["<", name]
+    list_attributes = _LIST_ATTRIBUTES.get(name, set()) | _LIST_ATTRIBUTES["*"]
+
+    meta_charset = name == "meta" and any(key == "charset" for key, _ in attributes)
+    meta_content = name == "meta" and not meta_charset and any(
+        key == "http-equiv" and value.lower() == "content-type" for key, value in attributes
+    )
+
+    for key, value in sorted(attributes):
+        if key in list_attributes:
+            value = " ".join(_NONWHITESPACE_RE.findall(value))
+        elif meta_charset and key == "charset":
+            value = "utf-8"
+        elif meta_content and key == "content":
+            value = _META_CHARSET_RE.sub(lambda m: m.group(1) + "utf-8", value)
+
+        value = _escape(value)
+        quote = '"'
+        if '"' in value:
+            if "'" in value:
+                value = value.replace('"', "&quot;")
+            else:
+                quote = "'"
+        parts.append(f" {key}={quote}{value}{quote}")
+
+    parts.append("/>" if void else ">")
+    return "".join(parts)
+
+
+class _BooleanAttributes:
+    """Recover how boolean attributes were written in the source.
+
+    libxml2 reports ``<input disabled>`` as ``disabled="disabled"`` while
+    BeautifulSoup sees ``disabled=""``. The raw HTML tells which form the
+    page used; if it uses both, the page is left to the reference backend.
+    """
+
+    def __init__(self, html: str):
+        self._html = html
+        self._explicit: dict[str, bool] = {}
+
+    def value(self, name: str) -> str:
+        """Get BeautifulSoup's value for an attribute libxml2 set to its name."""
+        if name not in self._explicit:
+            explicit = re.search(rf"\b{name}\s*=\s*[\"']?{name}\b", self._html, re.I) is not None
+            if explicit and re.search(rf"\b{name}\b(?!\s*=)", self._html, re.I):
+                raise UnsupportedDocument(f"ambiguous boolean attribute {name!r}")
+            self._explicit[name] = explicit
+        return name if self._explicit[name] else ""
+
+
+def _text(text: str, raw: bool, preserve: bool) -> str:
+    """Prepare a text node for output like BeautifulSoup would.
+
+    BeautifulSoup collapses whitespace-only strings to a single newline or
+    space unless they are inside <pre> or <textarea>.
+    """
+    if not preserve and _ASCII_SPACES.issuperset(text):
+        text = "\n" if "\n" in text else " "
+    return text if raw else _escape(text)
+
+
+def _serialize_lxml(element, out: list[str], booleans: _BooleanAttributes, preserve: bool) -> None:
+    """Serialize an lxml element (without its tail) like ``str(tag)``."""
+    tag = element.tag
+
+    if not isinstance(tag, str):
+        if tag is etree.ProcessingInstruction:
+            # Removed element (see _drop_element)
+            return
+        # libxml2 turns processing instructions into comments as well
+        if tag is not etree.Comment:
+            raise UnsupportedDocument(f"unexpected node {element!r}")
+        out.append(f"<!--{element.text or ''}-->")
+        return
+
+    attributes = [
+        (key, booleans.value(key) if key in _LIBXML2_BOOLEAN_ATTRIBUTES and value == key else value)
+        for key, value in element.items()
+    ]
+    children = list(element)
+
+    if tag in _VOID_ELEMENTS and not children and not element.text:
+        out.append(_format_start_tag(tag, attributes, void=True))
+        return
+
+    out.append(_format_start_tag(tag, attributes, void=False))
+    raw = tag in _RAW_TEXT_ELEMENTS
+    preserve = preserve or tag in _PRESERVE_WHITESPACE_ELEMENTS
+
+    if element.text:
+        out.append(_text(element.text, raw, preserve))
+    for child in children:
+        _serialize_lxml(child, out, booleans, preserve)
+        if child.tail:
+            out.append(_text(child.tail, raw, preserve))
+
+    out.append(f"</{tag}>")
+
+
+def _lxml_strings(element, in_container: bool):
+    """Yield the text BeautifulSoup's ``get_text()`` would see, in order."""
+    if not isinstance(element.tag, str):
+        return
+
+    inside = in_container or element.tag in _STRING_CONTAINERS
+    if element.text and not inside:
+        yield element.text
+    for child in element:
+        yield from _lxml_strings(child, inside)
+        if child.tail and not inside:
+            yield child.tail
+
+
+def _serialize_lexbor(node, out: list[str], preserve: bool, implied_tbody: bool) -> None:
+    """Serialize a lexbor node like ``str(tag)``.
+
+    With ``implied_tbody``, <tbody> elements are left out (their rows are
+    kept) because the page never wrote them.
+    """
+    tag = node.tag
+
+    if tag == "-comment":
+        out.append(node.html)
+        return
+    if tag.startswith("-") or tag == "template":
+        # Template contents live in a separate fragment lexbor does not expose
+        raise UnsupportedDocument(f"unsupported node {tag}")
+
+    # libxml2 lowercases names, including camelCase SVG ones
+    tag = tag.lower()
+    attributes = [(key.lower(), value or "") for key, value in node.attributes.items()]
+    children = list(node.iter(include_text=True))
+    unwrap = implied_tbody and tag == "tbody"
+
+    if tag in _VOID_ELEMENTS and not children:
+        out.append(_format_start_tag(tag, attributes, void=True))
+        return
+
+    if not unwrap:
+        out.append(_format_start_tag(tag, attributes, void=False))
+    raw = tag in _RAW_TEXT_ELEMENTS
+    preserve = preserve or tag in _PRESERVE_WHITESPACE_ELEMENTS
+
+    for child in children:
+        if child.tag == "-text":
+            if child.text_content:
+                out.append(_text(child.text_content, raw, preserve))
+        else:
+            _serialize_lexbor(child, out, preserve, implied_tbody)
+
+    if not unwrap:
+        out.append(f"</{tag}>")
+
+
+def _lexbor_strings(node, in_container: bool):
+    """Yield the text BeautifulSoup's ``get_text()`` would see, in order."""
+    if node.tag == "template":
+        raise UnsupportedDocument("unsupported node template")
+
+    inside = in_container or node.tag in _STRING_CONTAINERS
+    for child in node.iter(include_text=True):
+        if child.tag == "-text":
+            if not inside:
+                yield child.text_content or ""
+        elif not child.tag.startswith("-"):
+            yield from _lexbor_strings(child, inside)
@@ -0,0 +1,193 @@
+"""CPU stage of the scrape pipeline - extraction and conversion in processes."""
+
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from wit.cache import content_hash
+from wit.converter import add_metadata, html_to_markdown, soup_to_markdown
+from wit.scraper import extract_content, extract_content_tree
+
+if TYPE_CHECKING:
+    from wit.config import SiteConfig
+
+
+class RenderedPage(NamedTuple):
+    """A page rendered by ``render_page``.
+
+    ``markdown`` is None when the content region was unchanged.
+    ``region_hash`` is only computed with ``scraping.skip_unchanged``.
+    """
+
+    markdown: str | None
+    region_hash: str | None
+
+
+def render_page(
+    site: "SiteConfig",
+    url: str,
+    html: str,
+    previous_region: str | None = None,
+) -> RenderedPage:
+    """Extract a page's content and convert it to markdown with metadata.
+
+    With ``scraping.skip_unchanged``, the extracted content is hashed first
+    and conversion is skipped when it matches the previous run.
+
+    Args:
+        site: Site configuration.
+        url: URL the HTML was fetched from.
+        html: Raw page HTML.
+        previous_region: Region hash the page had in the previous run.
+
+    Returns:
+        RenderedPage with the markdown and the content region's hash.
+    """
+    hash_region = site.scraping.get("skip_unchanged", False)
+    region_hash = None
+
+    # BeautifulSoup trees go to the converter as they are; other parser
+    # backends hand over an HTML string
+    parser = site.scraping.get("parser", "bs4")
+    if parser == "bs4":
+        content, title = extract_content_tree(html, site.selectors, site.removal_matcher)
+        if hash_region:
+            region_hash = content_hash(f"{title}\0{content}")
+    else:
+        content_html, title = extract_content(html, site.selectors, parser, site.removal_matcher)
+        if hash_region:
+            region_hash = content_hash(f"{title}\0{content_html}")
+
+    if region_hash is not None and region_hash == previous_region:
+        return RenderedPage(None, region_hash)
+
+    if parser == "bs4":
+        markdown = soup_to_markdown(content, site.markdown)
+    else:
+        markdown = html_to_markdown(content_html, site.markdown)
+
+    return RenderedPage(add_metadata(markdown, url, title, site.metadata), region_hash)
+
+
+class CpuPool:
+    """Worker processes rendering fetched pages to markdown.
+
+    Extraction and conversion are pure Python, so threads can't spread them
+    over more than one core. Fetching threads hand pages to this pool
+    instead and move on to the next request. Site configurations are sent
+    to each worker once when it starts; a page then only costs its UTF-8
+    body on the way in and the markdown on the way out.
+
+    At most two pages per worker are queued at a time, so fetching can't
+    pile up pages in memory faster than they are converted.
+
+    The worker processes are started when the pool is created, before the
+    run's fetching threads exist. The executor would otherwise fork them on
+    the first submit, from a process full of threads holding locks.
+
+    Rendered pages are handed to the pool's own writer threads, never
+    processed on the process pool's result thread, which would hold up
+    results from every worker.
+    """
+
+    def __init__(self, sites: list["SiteConfig"], max_workers: int):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(2 * max_workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(sites,),
+        )
+        self._writers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wit-writer")
+        for started in [self._executor.submit(_noop) for _ in range(max_workers)]:
+            started.result()
+
+    def submit(
+        self,
+        site: "SiteConfig",
+        url: str,
+        html: str,
+        previous_region: str | None = None,
+        then: Callable[[RenderedPage], Any] | None = None,
+    ) -> Future:
+        """Queue a page for rendering, waiting while the queue is full.
+
+        Args:
+            site: Site configuration (one of the pool's sites).
+            url: URL the HTML was fetched from.
+            html: Raw page HTML.
+            previous_region: Region hash the page had in the previous run.
+            then: Optional function to run on the RenderedPage in a writer
+                thread, e.g. to write it out. The page keeps its queue slot
+                until it returns.
+
+        Returns:
+            Future for the page's RenderedPage (see ``render_page``), or for
+            the return value of ``then``.
+        """
+        self._slots.acquire()
+        try:
+            rendered = self._executor.submit(
+                _render_in_worker, site.name, url, html.encode("utf-8"), previous_region
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+
+        if then is None:
+            rendered.add_done_callback(lambda _: self._slots.release())
+            return rendered
+
+        result = Future()
+
+        def hand_over(done: Future) -> None:
+            try:
+                self._writers.submit(self._finish, result, then, done)
+            except BaseException as e:
+                self._slots.release()
+                result.set_exception(e)
+
+        rendered.add_done_callback(hand_over)
+        return result
+
+    def _finish(self, result: Future, then: Callable[[RenderedPage], Any], rendered: Future) -> None:
+        """Run ``then`` on a rendered page and settle the page's future."""
+        try:
+            result.set_result(then(rendered.result()))
+        except BaseException as e:
+            result.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes and writer threads.
+
+        Args:
+            wait: Block until queued pages have been rendered and handled.
+        """
+        self._executor.shutdown(wait=wait)
+        self._writers.shutdown(wait=wait)
+
+    def __enter__(self) -> "CpuPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown(wait=True)
+
+
+# Site configurations of this worker process, by name
+_worker_sites: dict[str, "SiteConfig"] = {}
+
+
+def _init_worker(sites: list["SiteConfig"]) -> None:
+    """Keep the run's site configurations in a new worker process."""
+    _worker_sites.update((site.name, site) for site in sites)
+
+
+def _noop() -> None:
+    """Task used to start the worker processes."""
+
+
+def _render_in_worker(site_name: str, url: str, body: bytes, previous_region: str | None) -> RenderedPage:
+    """Render one page in a worker process."""
+    return render_page(_worker_sites[site_name], url, body.decode("utf-8"), previous_region)
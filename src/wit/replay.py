@@ -0,0 +1,214 @@
+"""Replay snapshot history into a git branch."""
+
+import re
+from collections import deque
+from concurrent.futures import Executor, Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, NamedTuple
+
+from wit.cache import content_hash
+from wit.git import FastImport, get_repo_root
+from wit.pipeline import render_page
+from wit.snapshots import SnapshotStore
+from wit.utils import format_commit_message, get_logger, url_to_filepath
+
+if TYPE_CHECKING:
+    from wit.config import SiteConfig
+
+# Fetches further apart than this belong to different scrape runs
+RUN_GAP = timedelta(minutes=30)
+
+# Groups rendered ahead of the one being committed
+RENDER_AHEAD = 2
+
+_TIMESTAMP_RE = re.compile(r"^scraped_at: .*$", re.MULTILINE)
+
+
+class SnapshotEvent(NamedTuple):
+    """One fetch of a page recorded in a site's snapshot index."""
+
+    fetched_at: str
+    site: "SiteConfig"
+    url: str
+    digest: str
+
+
+def history_events(sites: list["SiteConfig"]) -> list[SnapshotEvent]:
+    """Collect every recorded fetch of the given sites, oldest first.
+
+    Args:
+        sites: Site configurations.
+
+    Returns:
+        Events sorted by fetch time, then site order and URL.
+    """
+    keyed = []
+    for index, site in enumerate(sites):
+        snapshots = SnapshotStore.for_site(site)
+        for url in snapshots.index.keys():
+            for fetched_at, digest in snapshots.history(url):
+                keyed.append(((fetched_at, index, url), SnapshotEvent(fetched_at, site, url, digest)))
+
+    keyed.sort(key=lambda item: item[0])
+    return [event for _, event in keyed]
+
+
+def group_events(events: list[SnapshotEvent], per: str = "run") -> list[list[SnapshotEvent]]:
+    """Split events into the commits they should be replayed as.
+
+    Args:
+        events: Events sorted by fetch time.
+        per: ``"run"`` starts a new commit after a gap of ``RUN_GAP``
+            between fetches; ``"day"`` makes one commit per UTC day.
+
+    Returns:
+        Groups of events, oldest first.
+
+    Raises:
+        ValueError: If ``per`` is unknown.
+    """
+    if per not in ("run", "day"):
+        raise ValueError(f"Unknown grouping: {per!r} (expected 'run' or 'day')")
+
+    groups: list[list[SnapshotEvent]] = []
+    previous = None
+    for event in events:
+        if per == "day":
+            new_group = previous is None or event.fetched_at[:10] != previous.fetched_at[:10]
+        else:
+            new_group = previous is None or _parse_time(event.fetched_at) - _parse_time(previous.fetched_at) > RUN_GAP
+        if new_group:
+            groups.append([])
+        groups[-1].append(event)
+        previous = event
+
+    return groups
+
+
+def replay_history(
+    sites: list["SiteConfig"],
+    branch: str,
+    executor: Executor,
+    git_config: dict,
+    per: str = "run",
+) -> tuple[int, int]:
+    """Render all snapshots and import them as commits into a branch.
+
+    Each group of fetches (see ``group_events``) becomes one commit dated
+    at its last fetch, containing the pages whose markdown changed. Pages
+    carry their fetch time as ``scraped_at``. Commits are streamed into
+    ``git fast-import``, so the working tree and index are not touched.
+    Only a few groups are rendered ahead of the one being committed, so
+    memory use doesn't grow with the length of the history.
+
+    Args:
+        sites: Site configurations (with snapshots enabled).
+        branch: Branch to import into; created if missing, else continued.
+        executor: Executor to render pages in, in parallel.
+        git_config: Git settings (author and message template).
+        per: Commit grouping, ``"run"`` or ``"day"``.
+
+    Returns:
+        Tuple of (commit_count, page_count).
+
+    Raises:
+        GitError: If the import failed.
+    """
+    logger = get_logger()
+    root = get_repo_root()
+    groups = group_events(history_events(sites), per)
+
+    roots = {site.name: SnapshotStore.for_site(site).root for site in sites}
+
+    def submit(event: SnapshotEvent) -> Future:
+        return executor.submit(
+            _render_snapshot, event.site, event.url, roots[event.site.name], event.digest, event.fetched_at
+        )
+
+    body_hashes: dict[str, str] = {}
+    page_count = 0
+    # Check the branch before rendering anything
+    with FastImport(branch) as fast_import:
+        for group, group_futures in _render_ahead(groups, submit, RENDER_AHEAD):
+            files: dict[str, bytes] = {}
+            for event, future in zip(group, group_futures):
+                try:
+                    body_hash, markdown = future.result()
+                except Exception as e:
+                    logger.warning(f"[{event.site.name}] Failed to replay {event.url} ({event.fetched_at}): {e}")
+                    continue
+
+                filepath = url_to_filepath(event.url, event.site.base_url, event.site.output_dir)
+                path = filepath.resolve().relative_to(root).as_posix()
+                if body_hashes.get(path) != body_hash:
+                    body_hashes[path] = body_hash
+                    files[path] = markdown
+
+            if not files:
+                continue
+
+            fast_import.commit(
+                files,
+                message=format_commit_message(git_config["message_template"], list(files)),
+                author_name=git_config["author_name"],
+                author_email=git_config["author_email"],
+                when=_parse_time(group[-1].fetched_at),
+            )
+            page_count += len(files)
+
+    return fast_import.commits, page_count
+
+
+def _render_ahead(
+    groups: list[list[SnapshotEvent]],
+    submit: Callable[[SnapshotEvent], Future],
+    ahead: int,
+) -> Iterator[tuple[list[SnapshotEvent], list[Future]]]:
+    """Submit groups for rendering in a window that moves as they are consumed.
+
+    Pages render in parallel but are consumed in order, one commit at a
+    time. Renders still pending when the consumer stops are cancelled.
+
+    Yields:
+        Tuples of (group, one future per event), in group order.
+    """
+    window: deque[tuple[list[SnapshotEvent], list[Future]]] = deque()
+    remaining = iter(groups)
+    try:
+        while True:
+            for group in remaining:
+                window.append((group, [submit(event) for event in group]))
+                if len(window) > ahead:
+                    break
+            if not window:
+                return
+            yield window.popleft()
+    finally:
+        for _, futures in window:
+            for future in futures:
+                future.cancel()
+
+
+def _render_snapshot(
+    site: "SiteConfig",
+    url: str,
+    snapshot_root: Path,
+    digest: str,
+    fetched_at: str,
+) -> tuple[str, bytes]:
+    """Render one snapshot as it was fetched (runs in a worker process).
+
+    Returns:
+        Tuple of (body hash without the timestamp, UTF-8 markdown).
+    """
+    html = SnapshotStore(snapshot_root).get(digest)
+    markdown = render_page(site, url, html).markdown
+    body_hash = content_hash(_TIMESTAMP_RE.sub("", markdown, count=1))
+    markdown = _TIMESTAMP_RE.sub(f"scraped_at: {fetched_at}", markdown, count=1)
+    return body_hash, markdown.encode("utf-8")
+
+
+def _parse_time(timestamp: str) -> datetime:
+    """Parse a snapshot fetch time like ``2024-01-31T12:00:00Z``."""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
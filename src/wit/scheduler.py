@@ -0,0 +1,190 @@
+"""Fair scheduling of page tasks from many sites on one worker budget."""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class FairScheduler:
+    """Thread pool shared by several sites with per-site limits.
+
+    Tasks are queued per key (the site name). Idle workers take the next
+    task round-robin across keys, skipping keys that already have their
+    limit of tasks running, so one site with thousands of pages cannot
+    starve the others and a slow site never holds more than its share of
+    the budget.
+
+    A task can be throttled, e.g. by a host rate limit. Its throttle is asked
+    for a delay when the task is picked, and a task that has to wait is set
+    aside until it is due instead of holding a worker, so rate-limited sites
+    don't take workers from the others while they sleep. A key waits for at
+    most one task at a time, and that task still counts towards its limit.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._queues: dict[str, deque] = {}
+        self._limits: dict[str, int] = {}
+        self._running: dict[str, int] = {}
+        self._order: deque[str] = deque()
+        # Throttled tasks waiting to be due: (due time, sequence, key, task)
+        self._waiting: list[tuple[float, int, str, tuple]] = []
+        self._waiting_keys: set[str] = set()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable,
+        *args,
+        limit: int | None = None,
+        throttle: Callable[[], float] | None = None,
+        **kwargs,
+    ) -> Future:
+        """Queue ``fn(*args, **kwargs)`` for a key.
+
+        Args:
+            key: Scheduling key, e.g. the site name.
+            fn: Callable to run in a worker thread.
+            *args: Positional arguments for ``fn``.
+            limit: Maximum tasks of this key running at once (default: the
+                whole budget). The latest value given for a key applies.
+            throttle: Optional callable returning how many seconds the task
+                has to wait before it may run, such as ``TokenBucket.reserve``.
+                It is called once, when the task is picked.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            Future for the task's result.
+
+        Raises:
+            RuntimeError: If the scheduler has been shut down.
+        """
+        future = Future()
+
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new tasks after shutdown")
+
+            if key not in self._queues:
+                self._queues[key] = deque()
+                self._running[key] = 0
+                # A newly arrived key gets the next turn
+                self._order.appendleft(key)
+            if limit is not None:
+                self._limits[key] = max(1, limit)
+
+            self._queues[key].append((future, fn, args, kwargs, throttle))
+            self._start_workers()
+            self._cond.notify()
+
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting tasks; workers exit once the queues are drained.
+
+        Args:
+            wait: Block until all queued tasks have run.
+        """
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "FairScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown(wait=True)
+
+    def _start_workers(self) -> None:
+        """Start the worker threads on first use (lock held)."""
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"wit-worker-{len(self._threads)}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_task(self) -> tuple[str, tuple] | None:
+        """Pick the next runnable task round-robin across keys (lock held).
+
+        Throttled tasks that have become due go first.
+        """
+        now = time.monotonic()
+        if self._waiting and self._waiting[0][0] <= now:
+            _, _, key, task = heapq.heappop(self._waiting)
+            self._waiting_keys.discard(key)
+            return key, task
+
+        for _ in range(len(self._order)):
+            key = self._order[0]
+            self._order.rotate(-1)
+
+            queue = self._queues[key]
+            if (
+                queue
+                and key not in self._waiting_keys
+                and self._running[key] < self._limits.get(key, self.max_workers)
+            ):
+                self._running[key] += 1
+                task = queue.popleft()
+                throttle = task[4]
+                delay = throttle() if throttle is not None else 0
+                if delay <= 0:
+                    return key, task
+                heapq.heappush(self._waiting, (now + delay, next(self._sequence), key, task))
+                self._waiting_keys.add(key)
+                # Wake an idle worker to time the wait for it
+                self._cond.notify()
+
+        return None
+
+    def _wait_timeout(self) -> float | None:
+        """Seconds until the next throttled task is due, if any (lock held)."""
+        if not self._waiting:
+            return None
+        return max(0.0, self._waiting[0][0] - time.monotonic())
+
+    def _worker(self) -> None:
+        """Run tasks until shut down with nothing left to do."""
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    if self._shutdown and not self._waiting and not any(self._queues.values()):
+                        return
+                    self._cond.wait(self._wait_timeout())
+                    task = self._next_task()
+
+            key, (future, fn, args, kwargs, _) = task
+            self._run(future, fn, args, kwargs)
+
+            with self._cond:
+                self._running[key] -= 1
+                # A slot of this key opened up, which may unblock any worker
+                self._cond.notify_all()
+
+    @staticmethod
+    def _run(future: Future, fn: Callable, args: tuple, kwargs: dict[str, Any]) -> None:
+        """Run one task and settle its future."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
@@ -6,6 +6,11 @@ from typing import Callable
 import requests
 from bs4 import BeautifulSoup
 
+from wit.browser import ResourcePolicy, get_browser_pool
+from wit.cache import PageNotModified, ValidatorStore
+from wit.parsers import RemovalMatcher, get_parser
+from wit.sessions import get_session
+from wit.throttle import fetch_slot
 from wit.utils import get_logger
 
 
@@ -18,6 +23,7 @@ def fetch_page(
     url: str, 
     scraping_config: dict,
     fetch_func: Callable | None = None,
+    validators: ValidatorStore | None = None,
 ) -> str:
     """Fetch page HTML, optionally with JS rendering.
     
@@ -32,13 +38,20 @@ def fetch_page(
               Options: "load" (default), "domcontentloaded", "networkidle", "commit"
             - wait_delay: Additional delay in seconds after page load (JS only).
               Useful for JS-heavy sites that continue rendering after load.
+            - browser_pages: Pages rendered in parallel by the shared browser (JS only)
+            - browser_recycle_after: Restart the browser after this many pages (JS only)
+            - block_resources: Subresources not to download (JS only), a dict
+              with "types", "domains" and "patterns" lists
         fetch_func: Optional custom fetch function for testing.
+        validators: Optional validator store. Static fetches then send
+            If-None-Match / If-Modified-Since and stage the new validators.
         
     Returns:
         HTML content as string.
         
     Raises:
         ScrapingError: If fetching fails after retries.
+        PageNotModified: If the server answered a conditional request with 304.
     """
     logger = get_logger()
     
@@ -50,15 +63,28 @@ def fetch_page(
     use_javascript = scraping_config.get("javascript", False)
     retries = scraping_config.get("retries", 3)
     
-    if use_javascript:
-        wait_until = scraping_config.get("wait_until", "load")
-        wait_delay = scraping_config.get("wait_delay", 0)
-        return _fetch_with_javascript(url, timeout, retries, wait_until, wait_delay, user_agent)
-    else:
-        return _fetch_static(url, timeout, user_agent, retries)
+    # Hold a slot of the run-wide request budget (see wit.throttle)
+    with fetch_slot():
+        if use_javascript:
+            wait_until = scraping_config.get("wait_until", "load")
+            wait_delay = scraping_config.get("wait_delay", 0)
+            return _fetch_with_javascript(
+                url, timeout, retries, wait_until, wait_delay, user_agent, scraping_config
+            )
+        else:
+            return _fetch_static(
+                url, timeout, user_agent, retries, get_session(url, scraping_config), validators
+            )
 
 
-def _fetch_static(url: str, timeout: int, user_agent: str, retries: int) -> str:
+def _fetch_static(
+    url: str,
+    timeout: int,
+    user_agent: str,
+    retries: int,
+    session: requests.Session | None = None,
+    validators: ValidatorStore | None = None,
+) -> str:
     """Fetch page using requests (no JS rendering).
     
     Args:
@@ -66,21 +92,27 @@ def _fetch_static(url: str, timeout: int, user_agent: str, retries: int) -> str:
         timeout: Request timeout in seconds.
         user_agent: User agent string.
         retries: Number of retry attempts.
+        session: Optional pooled session to reuse connections.
+        validators: Optional validator store for conditional requests.
         
     Returns:
         HTML content.
         
     Raises:
         ScrapingError: If fetching fails.
+        PageNotModified: If the server answered with 304.
     """
     logger = get_logger()
     headers = {"User-Agent": user_agent}
+    if validators is not None:
+        headers.update(validators.request_headers(url))
+    http = session or requests
     
     last_error = None
     
     for attempt in range(retries):
         try:
-            response = requests.get(url, headers=headers, timeout=timeout)
+            response = http.get(url, headers=headers, timeout=timeout)
             
             # Handle rate limiting
             if response.status_code == 429:
@@ -100,7 +132,13 @@ def _fetch_static(url: str, timeout: int, user_agent: str, retries: int) -> str:
             if response.status_code == 404:
                 raise ScrapingError(f"Page not found: {url}")
             
+            # Unchanged since the validators were recorded
+            if response.status_code == 304 and validators is not None:
+                raise PageNotModified(url)
+            
             response.raise_for_status()
+            if validators is not None:
+                validators.stage(url, response.headers)
             return response.text
             
         except requests.exceptions.Timeout as e:
@@ -126,6 +164,7 @@ def _fetch_with_javascript(
     wait_until: str = "load",
     wait_delay: float = 0,
     user_agent: str | None = None,
+    scraping_config: dict | None = None,
 ) -> str:
     """Fetch page with JavaScript rendering using Playwright.
     
@@ -140,6 +179,9 @@ def _fetch_with_javascript(
             - "commit": Wait for network response and document loading
         wait_delay: Additional delay in seconds after page load for JS rendering.
         user_agent: Optional user agent string for the browser context.
+        scraping_config: Scraping configuration used to size the shared
+            browser pool (browser_pages, browser_recycle_after) and to pick
+            subresources to block (block_resources).
         
     Returns:
         Rendered HTML content.
@@ -150,41 +192,23 @@ def _fetch_with_javascript(
     logger = get_logger()
     
     try:
-        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+        from playwright.async_api import TimeoutError as PlaywrightTimeout
     except ImportError:
         raise ScrapingError(
             "JavaScript rendering requires playwright. "
             "Install with: pip install 'wit[js]' && playwright install chromium"
         )
     
+    # The browser stays up for the whole run; each attempt only opens a page
+    scraping_config = scraping_config or {"user_agent": user_agent}
+    pool = get_browser_pool(scraping_config)
+    policy = ResourcePolicy.from_config(scraping_config.get("block_resources"))
+    
     last_error = None
     
     for attempt in range(retries):
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                
-                # Create browser context with user agent if provided
-                context_options = {}
-                if user_agent:
-                    context_options["user_agent"] = user_agent
-                context = browser.new_context(**context_options)
-                page = context.new_page()
-                
-                # Set timeout (playwright uses milliseconds)
-                page.set_default_timeout(timeout * 1000)
-                
-                page.goto(url, wait_until=wait_until)
-                
-                # Additional delay for JS-heavy sites to finish rendering
-                if wait_delay > 0:
-                    page.wait_for_timeout(int(wait_delay * 1000))
-                
-                html = page.content()
-                
-                context.close()
-                browser.close()
-                return html
+            return pool.render(url, timeout, wait_until, wait_delay, policy)
                 
         except PlaywrightTimeout as e:
             last_error = e
@@ -202,7 +226,12 @@ def _fetch_with_javascript(
     raise ScrapingError(f"Failed to render {url} after {retries} attempts: {last_error}")
 
 
-def extract_content(html: str, selectors: dict) -> tuple[str, str | None]:
+def extract_content(
+    html: str,
+    selectors: dict,
+    parser: str = "bs4",
+    removal: RemovalMatcher | None = None,
+) -> tuple[str, str | None]:
     """Extract main content and optional title using selectors.
     
     Args:
@@ -211,49 +240,37 @@ def extract_content(html: str, selectors: dict) -> tuple[str, str | None]:
             - content: List of CSS selectors for main content
             - remove: List of CSS selectors to remove
             - title: CSS selector for title
+        parser: Parser backend ("bs4", "lxml" or "selectolax"). All
+            backends return the same result.
+        removal: Optional ``selectors["remove"]`` compiled ahead of time
+            (see ``SiteConfig.removal_matcher``).
             
     Returns:
         Tuple of (content_html, title).
         Content is the extracted HTML string.
         Title is the extracted title text or None.
     """
-    logger = get_logger()
-    
-    soup = BeautifulSoup(html, "lxml")
-    
-    # Remove unwanted elements first
-    remove_selectors = selectors.get("remove", [])
-    for selector in remove_selectors:
-        for element in soup.select(selector):
-            element.decompose()
-    
-    # Extract title
-    title = None
-    title_selector = selectors.get("title", "h1")
-    if title_selector:
-        title_elem = soup.select_one(title_selector)
-        if title_elem:
-            title = title_elem.get_text(strip=True)
-    
-    # Extract main content (first matching selector wins)
-    content_selectors = selectors.get("content", ["main", "article", ".content", "body"])
-    content_html = None
+    return get_parser(parser).extract(html, selectors, removal)
+
+
+def extract_content_tree(
+    html: str,
+    selectors: dict,
+    removal: RemovalMatcher | None = None,
+) -> tuple[BeautifulSoup, str | None]:
+    """Extract main content as a parsed tree, without serializing it.
     
-    for selector in content_selectors:
-        content_elem = soup.select_one(selector)
-        if content_elem:
-            content_html = str(content_elem)
-            logger.debug(f"Found content using selector: {selector}")
-            break
+    Same as ``extract_content`` but returns the pruned content element in a
+    document of its own, ready for ``soup_to_markdown``, so the page is
+    parsed only once on its way to markdown.
     
-    if not content_html:
-        # Fallback to body
-        body = soup.find("body")
-        if body:
-            content_html = str(body)
-            logger.debug("Using body as fallback content")
-        else:
-            content_html = str(soup)
-            logger.debug("Using full document as fallback content")
-    
-    return content_html, title
+    Args:
+        html: HTML content to extract from.
+        selectors: Selector dict (see ``extract_content``).
+        removal: Optional precompiled ``selectors["remove"]``.
+        
+    Returns:
+        Tuple of (content, title). Content is a BeautifulSoup document whose
+        only child is the content element.
+    """
+    return get_parser("bs4").extract_tree(html, selectors, removal)
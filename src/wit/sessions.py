@@ -0,0 +1,83 @@
+"""Pooled HTTP sessions for wit - connection reuse across a whole run."""
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from wit.utils import get_logger
+
+
+# One session per (scheme, host), shared by every site and module that talks
+# to that host. Sessions keep their connection pools alive for the whole run.
+_sessions: dict[tuple[str, str], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str, scraping_config: dict) -> requests.Session:
+    """Get the pooled session for the host of a URL.
+
+    Sessions are created on first use and reused for every later request to
+    the same scheme and host, so TCP and TLS handshakes are paid once per
+    connection instead of once per page. Sites that share a host share a
+    session (the first site to use the host decides the pool settings).
+
+    Args:
+        url: URL that is about to be fetched.
+        scraping_config: Scraping configuration dict with:
+            - pool_connections: Number of host pools to cache per session
+            - pool_maxsize: Maximum connections kept alive per host
+            - keep_alive: Reuse connections between requests
+
+    Returns:
+        requests.Session for the URL's host.
+    """
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc)
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _create_session(scraping_config)
+            _sessions[key] = session
+            get_logger().debug(f"Opened HTTP session for {parsed.scheme}://{parsed.netloc}")
+        return session
+
+
+def _create_session(scraping_config: dict) -> requests.Session:
+    """Create a session with a tuned connection pool.
+
+    Args:
+        scraping_config: Scraping configuration dict.
+
+    Returns:
+        Configured requests.Session.
+    """
+    pool_connections = scraping_config.get("pool_connections", 10)
+    pool_maxsize = scraping_config.get("pool_maxsize", 10)
+    keep_alive = scraping_config.get("keep_alive", True)
+
+    session = requests.Session()
+
+    # Retries are handled by the callers (with backoff and Retry-After support)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def close_sessions() -> None:
+    """Close all pooled sessions and release their connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
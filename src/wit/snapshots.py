@@ -0,0 +1,107 @@
+"""Content-addressed cache of raw fetched HTML."""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from wit.state import StateStore, site_state_path
+
+if TYPE_CHECKING:
+    from wit.config import SiteConfig
+
+
+class SnapshotStore:
+    """Gzip-compressed HTML snapshots stored by content hash.
+
+    Identical pages (across runs, URLs and sites) are stored once. Each site
+    keeps an index of which snapshots were fetched for each URL and when,
+    so output can be regenerated without refetching.
+    """
+
+    def __init__(self, root: Path, index: StateStore | None = None):
+        self.root = Path(root)
+        self.index = index
+
+    @classmethod
+    def for_site(cls, site: "SiteConfig") -> "SnapshotStore":
+        """Open the snapshot store with a site's URL index.
+
+        Args:
+            site: Site configuration.
+
+        Returns:
+            SnapshotStore under ``state_dir/snapshots``.
+        """
+        return cls(site.state_dir / "snapshots", StateStore(site_state_path(site, "snapshot-index")))
+
+    def object_path(self, digest: str) -> Path:
+        """Get the file holding a snapshot."""
+        return self.root / "objects" / digest[:2] / f"{digest[2:]}.html.gz"
+
+    def put(self, html: str) -> str:
+        """Store HTML and return its digest.
+
+        Args:
+            html: Raw page HTML.
+
+        Returns:
+            SHA-256 hex digest of the UTF-8 encoded HTML.
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so readers never see partial objects
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_name, path)
+
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Load a snapshot by digest.
+
+        Raises:
+            FileNotFoundError: If the snapshot does not exist.
+        """
+        return gzip.decompress(self.object_path(digest).read_bytes()).decode("utf-8")
+
+    def record(self, url: str, html: str) -> str:
+        """Store a fetched page and add it to the URL's history.
+
+        Args:
+            url: URL the HTML was fetched from.
+            html: Raw page HTML.
+
+        Returns:
+            Digest of the snapshot.
+        """
+        digest = self.put(html)
+        history = list(self.index.get(url) or [])
+
+        # Only record a new history entry when the page actually changed
+        if not history or history[-1][1] != digest:
+            fetched_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            history.append([fetched_at, digest])
+            self.index.set(url, history)
+
+        return digest
+
+    def latest(self) -> dict[str, str]:
+        """Get the most recent snapshot digest for every indexed URL."""
+        return {url: self.index.get(url)[-1][1] for url in self.index.keys() if self.index.get(url)}
+
+    def history(self, url: str) -> list[tuple[str, str]]:
+        """Get ``(fetched_at, digest)`` pairs for a URL, oldest first."""
+        return [tuple(entry) for entry in self.index.get(url) or []]
+
+    def save(self) -> None:
+        """Persist the URL index."""
+        self.index.save()
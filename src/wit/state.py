@@ -0,0 +1,136 @@
+"""Persistent per-site state for wit, kept between runs."""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from wit.utils import get_logger, sanitize_filename
+
+if TYPE_CHECKING:
+    from wit.config import SiteConfig
+
+
+# State kinds committed along with the content by ``--commit``. Snapshots
+# (raw page bodies) are left out: they would grow the repository quickly. So
+# is the output manifest: it records file mtimes, which differ in every
+# checkout, so a committed copy would churn on each run without helping.
+COMMITTED_STATE_KINDS = ("validators", "hashes", "lastmod")
+
+
+def site_state_path(site: "SiteConfig", kind: str) -> Path:
+    """Get the state file for a site.
+
+    Args:
+        site: Site configuration.
+        kind: Kind of state (e.g. "validators"), used as a subdirectory.
+
+    Returns:
+        Path like ``.wit/validators/docs.json``.
+    """
+    return site.state_dir / kind / f"{sanitize_filename(site.name)}.json"
+
+
+def config_fingerprint(site: "SiteConfig") -> str:
+    """Hash the settings that determine how a fetched page is rendered.
+
+    State that lets wit skip work for unchanged pages must be thrown away
+    when these settings change, otherwise old output would be kept forever.
+
+    Args:
+        site: Site configuration.
+
+    Returns:
+        Hex digest of the rendering settings and wit version.
+    """
+    from wit import __version__
+
+    payload = json.dumps(
+        [__version__, site.base_url, site.selectors, site.markdown, site.metadata],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class StateStore:
+    """Thread-safe dict persisted as a JSON file.
+
+    The file is loaded lazily and written atomically by ``save()``. When a
+    fingerprint is given and the stored one differs, the stored entries are
+    discarded.
+    """
+
+    def __init__(self, path: Path, fingerprint: str | None = None):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self._entries: dict[str, Any] | None = None
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def _load(self) -> dict[str, Any]:
+        """Load entries from disk on first access."""
+        if self._entries is not None:
+            return self._entries
+
+        entries = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if self.fingerprint is None or data.get("fingerprint") == self.fingerprint:
+                    entries = data.get("entries", {})
+                else:
+                    get_logger().debug(f"Discarding stale state {self.path} (settings changed)")
+                    self._dirty = True
+            except (OSError, ValueError) as e:
+                get_logger().warning(f"Ignoring unreadable state file {self.path}: {e}")
+
+        self._entries = entries
+        return entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get an entry."""
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an entry."""
+        with self._lock:
+            entries = self._load()
+            if entries.get(key) != value:
+                entries[key] = value
+                self._dirty = True
+
+    def discard(self, key: str) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._dirty = True
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def keys(self) -> list[str]:
+        """Get all entry keys."""
+        with self._lock:
+            return list(self._load())
+
+    def save(self) -> None:
+        """Write entries to disk if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            data = {"fingerprint": self.fingerprint, "entries": self._load()}
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, sort_keys=True, indent=0), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
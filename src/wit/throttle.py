@@ -0,0 +1,204 @@
+"""Per-host politeness scheduling for wit."""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import AsyncIterator, Callable, ContextManager, Iterator
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    Each request takes one token and blocks until one is available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token without waiting for it.
+
+        The token is reserved immediately so concurrent callers queue up
+        behind each other; the caller must wait the returned delay before
+        sending its request.
+
+        Returns:
+            Seconds the caller has to wait before using the token.
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Take one token, waiting for it if necessary.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Take one token, awaiting it without blocking the event loop.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+# One bucket per (scheme, host), shared by all sites that target the host
+_limiters: dict[tuple[str, str], TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str, scraping_config: dict) -> TokenBucket:
+    """Get the rate limiter for the host of a URL.
+
+    The ``delay`` setting is the minimum average interval between requests to
+    a host, so the bucket refills at ``1 / delay`` tokens per second. ``burst``
+    allows that many requests to go out back to back before throttling starts.
+
+    Args:
+        url: URL that is about to be fetched.
+        scraping_config: Scraping configuration dict with ``delay`` and ``burst``.
+
+    Returns:
+        TokenBucket for the URL's host.
+    """
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc)
+
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            delay = scraping_config.get("delay", 1.0)
+            rate = 1.0 / delay if delay > 0 else 0
+            limiter = TokenBucket(rate, scraping_config.get("burst", 1))
+            _limiters[key] = limiter
+        return limiter
+
+
+def reset_host_limiters() -> None:
+    """Forget all per-host rate limiters."""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+class FetchBudget:
+    """Run-wide cap on requests in flight, across all sites and fetch paths.
+
+    Page fetches, discovery fetches (crawling, sitemaps) and the asyncio
+    engine each take a slot for the duration of a request, so the global
+    ``workers`` setting bounds network concurrency however the requests
+    are made.
+
+    Threads block on the semaphore itself. Async callers wait on a future
+    that every release resolves, then try again, so they never block their
+    event loop and a task cancelled while waiting never holds a slot.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+        self._waiters_lock = threading.Lock()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one slot, waiting for it if necessary."""
+        self._slots.acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def slot_async(self) -> AsyncIterator[None]:
+        """Hold one slot, awaiting it without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Register before trying, so a release in between still wakes us
+            waiter = (loop, loop.create_future())
+            with self._waiters_lock:
+                self._waiters.add(waiter)
+            try:
+                if self._slots.acquire(blocking=False):
+                    break
+                await waiter[1]
+            finally:
+                with self._waiters_lock:
+                    self._waiters.discard(waiter)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Free a slot and wake the async callers waiting for one."""
+        self._slots.release()
+        with self._waiters_lock:
+            waiters = list(self._waiters)
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The waiter's event loop has been closed
+                pass
+
+
+def _wake(future: asyncio.Future) -> None:
+    """Resolve a waiter's future unless it is already done or cancelled."""
+    if not future.done():
+        future.set_result(None)
+
+
+_budget: FetchBudget | None = None
+
+
+def set_fetch_budget(size: int | None) -> None:
+    """Set (or with None, remove) the run-wide request budget.
+
+    Args:
+        size: Maximum requests in flight at once.
+    """
+    global _budget
+    _budget = FetchBudget(size) if size is not None else None
+
+
+def fetch_slot() -> ContextManager[None]:
+    """Context manager holding a request slot of the run-wide budget, if set."""
+    budget = _budget
+    return budget.slot() if budget is not None else nullcontext()
+
+
+def fetch_slot_async():
+    """Async context manager holding a request slot of the run-wide budget, if set."""
+    budget = _budget
+    return budget.slot_async() if budget is not None else nullcontext()
@@ -3,8 +3,9 @@
 import logging
 import re
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
-from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, urlencode
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, parse_qsl, urlencode
 
 
 # Tracking parameters to strip from URLs
@@ -150,6 +151,56 @@ def strip_tracking_params(url: str) -> str:
         return url
 
 
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(
+    url: str,
+    keep_params: list[str] | None = None,
+    drop_params: list[str] | None = None,
+) -> str:
+    """Canonicalize an absolute URL so that variants of a page compare equal.
+    
+    Lowercases the scheme and host, drops default ports and the fragment,
+    strips tracking parameters (see ``strip_tracking_params``) and sorts
+    the remaining query parameters.
+    
+    Args:
+        url: Absolute URL.
+        keep_params: If given, the only query parameters to keep.
+        drop_params: Further query parameters to remove.
+        
+    Returns:
+        Canonical URL, or the URL unchanged if it can't be parsed.
+    """
+    try:
+        parsed = urlparse(strip_tracking_params(url))
+        scheme = parsed.scheme.lower()
+        
+        host = parsed.hostname or ""
+        if ":" in host:
+            host = f"[{host}]"
+        if parsed.port is not None and parsed.port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{parsed.port}"
+        userinfo, at, _ = parsed.netloc.rpartition("@")
+        netloc = f"{userinfo}{at}{host}"
+        
+        # Query parameter names are compared case-insensitively, as tracking
+        # parameters are
+        query = parse_qsl(parsed.query, keep_blank_values=True)
+        if keep_params is not None:
+            keep = {name.lower() for name in keep_params}
+            query = [(k, v) for k, v in query if k.lower() in keep]
+        if drop_params:
+            drop = {name.lower() for name in drop_params}
+            query = [(k, v) for k, v in query if k.lower() not in drop]
+        query.sort(key=lambda param: param[0])
+        
+        return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, urlencode(query), ""))
+    except ValueError:
+        return url
+
+
 def url_to_filepath(url: str, base_url: str, output_dir: Path) -> Path:
     """Convert a URL to a local file path.
     
@@ -273,6 +324,38 @@ def extract_path(url: str) -> str:
     return parsed.path or "/"
 
 
+def parse_lastmod(value: str | None) -> datetime | None:
+    """Parse a sitemap ``<lastmod>`` (W3C datetime) into an aware datetime.
+    
+    Accepts the W3C profiles from a bare year down to fractional seconds.
+    Values without a time zone are taken as UTC.
+    
+    Args:
+        value: lastmod as written in the sitemap.
+        
+    Returns:
+        Timezone-aware datetime, or None if missing or unparseable.
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.endswith(("Z", "z")):
+        value = value[:-1] + "+00:00"
+    # "YYYY" and "YYYY-MM" mean the start of that year or month
+    if re.fullmatch(r"\d{4}", value):
+        value += "-01-01"
+    elif re.fullmatch(r"\d{4}-\d{2}", value):
+        value += "-01"
+    
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
 def format_commit_message(template: str, changed_files: list[str]) -> str:
     """Format a commit message using the template.
     
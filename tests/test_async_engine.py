@@ -0,0 +1,181 @@
+"""Tests for async_engine module."""
+
+import asyncio
+
+import pytest
+
+from wit.async_engine import scrape_urls_async, fetch_page_async, _fetch_static_async
+from wit.config import SiteConfig
+from wit.scraper import ScrapingError
+from wit.throttle import reset_host_limiters
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    """Ensure rate limiters don't leak between tests."""
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
+
+
+@pytest.fixture
+def site():
+    """Create a site config without politeness delay."""
+    return SiteConfig(
+        name="example",
+        base_url="https://example.com",
+        scraping={"delay": 0, "concurrency": 8, "engine": "async"},
+    )
+
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response."""
+
+    def __init__(self, status, body="", headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+    async def text(self):
+        return self._body
+
+
+class FakeSession:
+    """Session returning queued responses in order."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class TestScrapeUrlsAsync:
+    """Tests for scrape_urls_async function."""
+
+    def test_outcomes_in_url_order(self, site):
+        """Test that outcomes follow URL order regardless of completion order."""
+        delays = {"https://example.com/a": 0.03, "https://example.com/b": 0.0}
+
+        async def fetch(url):
+            await asyncio.sleep(delays[url])
+            return f"<p>{url}</p>"
+
+        def process(site, url, html):
+            return html
+
+        outcomes = scrape_urls_async(site, list(delays), process, fetch_func=fetch)
+
+        assert outcomes == ["<p>https://example.com/a</p>", "<p>https://example.com/b</p>"]
+
+    def test_requests_overlap(self, site):
+        """Test that requests are in flight at the same time."""
+        in_flight = 0
+        peak = 0
+
+        async def fetch(url):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "<p>x</p>"
+
+        urls = [f"https://example.com/{i}" for i in range(20)]
+        scrape_urls_async(site, urls, lambda s, u, h: None, fetch_func=fetch)
+
+        assert peak == 8
+
+    def test_errors_are_returned(self, site):
+        """Test that failures are reported per URL without aborting others."""
+        def fetch(url):
+            if url.endswith("/bad"):
+                raise ScrapingError("boom")
+            return "<p>ok</p>"
+
+        outcomes = scrape_urls_async(
+            site,
+            ["https://example.com/bad", "https://example.com/good"],
+            lambda s, u, h: u,
+            fetch_func=fetch,
+        )
+
+        assert isinstance(outcomes[0], ScrapingError)
+        assert outcomes[1] == "https://example.com/good"
+
+
+class TestFetchStaticAsync:
+    """Tests for _fetch_static_async function."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        """Skip real backoff delays."""
+        pytest.importorskip("aiohttp")
+
+        async def fake_sleep(seconds):
+            return None
+
+        monkeypatch.setattr("wit.async_engine.asyncio.sleep", fake_sleep)
+
+    def test_success(self):
+        """Test a plain successful fetch."""
+        session = FakeSession([FakeResponse(200, "<p>hi</p>")])
+
+        html = asyncio.run(_fetch_static_async("https://example.com/", 30, "test", 3, session))
+
+        assert html == "<p>hi</p>"
+
+    def test_retries_server_errors(self):
+        """Test that 5xx responses are retried."""
+        session = FakeSession([FakeResponse(503), FakeResponse(200, "ok")])
+
+        html = asyncio.run(_fetch_static_async("https://example.com/", 30, "test", 3, session))
+
+        assert html == "ok"
+        assert session.calls == 2
+
+    def test_retries_rate_limit(self):
+        """Test that 429 responses are retried."""
+        session = FakeSession([FakeResponse(429, headers={"Retry-After": "1"}), FakeResponse(200, "ok")])
+
+        html = asyncio.run(_fetch_static_async("https://example.com/", 30, "test", 3, session))
+
+        assert html == "ok"
+
+    def test_not_found(self):
+        """Test that 404 raises immediately."""
+        session = FakeSession([FakeResponse(404)])
+
+        with pytest.raises(ScrapingError, match="not found"):
+            asyncio.run(_fetch_static_async("https://example.com/", 30, "test", 3, session))
+
+        assert session.calls == 1
+
+    def test_gives_up_after_retries(self):
+        """Test that persistent failures raise ScrapingError."""
+        session = FakeSession([FakeResponse(500), FakeResponse(500)])
+
+        with pytest.raises(ScrapingError, match="after 2 attempts"):
+            asyncio.run(_fetch_static_async("https://example.com/", 30, "test", 2, session))
+
+
+class TestFetchPageAsync:
+    """Tests for fetch_page_async function."""
+
+    def test_sync_fetch_func(self):
+        """Test that plain fetch functions are supported."""
+        html = asyncio.run(fetch_page_async("https://example.com/", {}, fetch_func=lambda u: "x"))
+
+        assert html == "x"
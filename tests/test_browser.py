@@ -0,0 +1,363 @@
+"""Tests for browser module."""
+
+import asyncio
+import sys
+import threading
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wit.browser import BrowserPool, ResourcePolicy, RenderStats
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+    async def sizes(self):
+        return {"responseBodySize": 1000, "responseHeadersSize": 24}
+
+
+class FakeRoute:
+    def __init__(self, log, request):
+        self.log = log
+        self.request = request
+
+    async def abort(self):
+        self.log.append(("abort", self.request.url))
+
+    async def continue_(self):
+        self.log.append(("continue", self.request.url))
+
+
+# Subresources every fake page load requests
+SUBRESOURCES = [
+    ("https://example.com/logo.png", "image"),
+    ("https://fonts.example.net/font.woff2", "font"),
+    ("https://www.google-analytics.com/analytics.js", "script"),
+    ("https://example.com/app.js", "script"),
+    ("https://example.com/intro.mp4", "media"),
+]
+
+
+class FakePage:
+    """Async stand-in for a Playwright page."""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.url = None
+        self.routes = []
+        self.listeners = []
+        self.route_log = []
+
+    async def route(self, pattern, handler):
+        self.routes.append(handler)
+
+    async def unroute(self, pattern, handler):
+        self.routes.remove(handler)
+
+    def on(self, event, handler):
+        self.listeners.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove(handler)
+
+    async def _load_subresources(self):
+        for url, resource_type in SUBRESOURCES:
+            request = FakeRequest(url, resource_type)
+            if self.routes:
+                route = FakeRoute(self.route_log, request)
+                await self.routes[-1](route, request)
+                if self.route_log[-1][0] == "abort":
+                    continue
+            for listener in self.listeners:
+                await listener(request)
+
+    def set_default_timeout(self, timeout):
+        self.timeout = timeout
+
+    async def goto(self, url, wait_until="load"):
+        if "fail" in url:
+            raise RuntimeError("navigation failed")
+        self.tracker.enter()
+        await asyncio.sleep(0.01)
+        await self._load_subresources()
+        self.tracker.leave()
+        self.url = url
+        self.tracker.pages.append(self)
+
+    async def wait_for_timeout(self, ms):
+        return None
+
+    async def content(self):
+        return f"<html><body>{self.url}</body></html>"
+
+
+class FakeContext:
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage(self.tracker)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.closed = False
+
+    async def new_context(self, **options):
+        if self.tracker.fail_contexts:
+            raise RuntimeError("context failed")
+        self.tracker.contexts += 1
+        return FakeContext(self.tracker)
+
+    async def close(self):
+        self.closed = True
+
+
+class Tracker:
+    """Records launches and render parallelism."""
+
+    def __init__(self):
+        self.launches = 0
+        self.max_launches = None
+        self.fail_contexts = False
+        self.browsers = []
+        self.drivers = 0
+        self.contexts = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    """Install a fake playwright.async_api module."""
+    tracker = Tracker()
+
+    class FakeChromium:
+        async def launch(self, headless=True):
+            if tracker.launches == tracker.max_launches:
+                raise RuntimeError("browser failed to start")
+            tracker.launches += 1
+            browser = FakeBrowser(tracker)
+            tracker.browsers.append(browser)
+            return browser
+
+    class FakePlaywright:
+        chromium = FakeChromium()
+
+        async def stop(self):
+            tracker.drivers -= 1
+
+    class FakeManager:
+        async def start(self):
+            tracker.drivers += 1
+            return FakePlaywright()
+
+    async_api = types.ModuleType("playwright.async_api")
+    async_api.async_playwright = FakeManager
+    async_api.TimeoutError = TimeoutError
+    package = types.ModuleType("playwright")
+    package.async_api = async_api
+    monkeypatch.setitem(sys.modules, "playwright", package)
+    monkeypatch.setitem(sys.modules, "playwright.async_api", async_api)
+    return tracker
+
+
+class TestBrowserPool:
+    """Tests for BrowserPool class."""
+
+    def test_single_launch_for_many_pages(self, tracker):
+        """Test that the browser is launched once and reused."""
+        pool = BrowserPool(size=2, recycle_after=0)
+        try:
+            for i in range(5):
+                html = pool.render(f"https://example.com/{i}", 30)
+                assert f"https://example.com/{i}" in html
+        finally:
+            pool.close()
+
+        assert tracker.launches == 1
+        assert tracker.contexts == 2
+
+    def test_parallel_rendering(self, tracker):
+        """Test that up to size pages render at the same time."""
+        pool = BrowserPool(size=3, recycle_after=0)
+        try:
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                list(executor.map(lambda i: pool.render(f"https://example.com/{i}", 30), range(12)))
+        finally:
+            pool.close()
+
+        assert tracker.peak == 3
+
+    def test_recycles_browser(self, tracker):
+        """Test that the browser restarts after recycle_after pages."""
+        pool = BrowserPool(size=1, recycle_after=2)
+        try:
+            for i in range(5):
+                pool.render(f"https://example.com/{i}", 30)
+        finally:
+            pool.close()
+
+        assert tracker.launches == 3
+
+    def test_failed_relaunch_breaks_pool(self, tracker):
+        """Test that renders raise instead of hanging when recycling can't relaunch."""
+        tracker.max_launches = 1
+        pool = BrowserPool(size=1, recycle_after=1)
+        try:
+            pool.render("https://example.com/0", 30)
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for i in range(1, 3):
+                    future = executor.submit(pool.render, f"https://example.com/{i}", 30)
+                    with pytest.raises(RuntimeError, match="could not be relaunched"):
+                        future.result(timeout=5)
+        finally:
+            pool.close()
+
+    def test_failed_launch_stops_playwright(self, tracker):
+        """Test that a failed first launch doesn't leak a driver per render."""
+        tracker.max_launches = 0
+        pool = BrowserPool(size=1, recycle_after=0)
+        try:
+            for i in range(3):
+                with pytest.raises(RuntimeError, match="failed to start"):
+                    pool.render(f"https://example.com/{i}", 30)
+                assert tracker.drivers == 0
+        finally:
+            pool.close()
+
+    def test_failed_context_closes_browser(self, tracker):
+        """Test that a launch without slots raises on every render instead of hanging."""
+        tracker.fail_contexts = True
+        pool = BrowserPool(size=2, recycle_after=0)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for i in range(2):
+                    future = executor.submit(pool.render, f"https://example.com/{i}", 30)
+                    with pytest.raises(RuntimeError, match="context failed"):
+                        future.result(timeout=5)
+        finally:
+            pool.close()
+
+        assert tracker.drivers == 0
+        assert len(tracker.browsers) == 2
+        assert all(browser.closed for browser in tracker.browsers)
+
+    def test_failed_render_replaces_slot(self, tracker):
+        """Test that a failed page is replaced and the pool keeps working."""
+        pool = BrowserPool(size=1, recycle_after=0)
+        try:
+            with pytest.raises(RuntimeError):
+                pool.render("https://example.com/fail", 30)
+            html = pool.render("https://example.com/ok", 30)
+        finally:
+            pool.close()
+
+        assert "https://example.com/ok" in html
+        assert tracker.contexts == 2
+
+    def test_blocks_resources(self, tracker):
+        """Test that the policy aborts matching subresources only."""
+        policy = ResourcePolicy.from_config({
+            "types": ["image", "font"],
+            "domains": ["google-analytics.com"],
+            "patterns": ["*.mp4"],
+        })
+        pool = BrowserPool(size=1, recycle_after=0)
+        try:
+            pool.render("https://example.com/", 30, policy=policy)
+        finally:
+            pool.close()
+
+        page = tracker.pages[0]
+        assert page.route_log == [
+            ("abort", "https://example.com/logo.png"),
+            ("abort", "https://fonts.example.net/font.woff2"),
+            ("abort", "https://www.google-analytics.com/analytics.js"),
+            ("continue", "https://example.com/app.js"),
+            ("abort", "https://example.com/intro.mp4"),
+        ]
+        # Routing is removed again so the tab is clean for the next site
+        assert page.routes == []
+        assert page.listeners == []
+
+    def test_no_routing_without_policy(self, tracker):
+        """Test that pages are not intercepted when nothing is blocked."""
+        pool = BrowserPool(size=1, recycle_after=0)
+        try:
+            pool.render("https://example.com/", 30, policy=ResourcePolicy())
+        finally:
+            pool.close()
+
+        assert tracker.pages[0].route_log == []
+
+
+class TestResourcePolicy:
+    """Tests for ResourcePolicy class."""
+
+    def test_empty_policy_inactive(self):
+        """Test that an empty config blocks nothing."""
+        policy = ResourcePolicy.from_config(None)
+
+        assert policy.active is False
+        assert policy.should_block("https://example.com/a.png", "image") is False
+
+    def test_block_by_type(self):
+        """Test blocking by resource type."""
+        policy = ResourcePolicy.from_config({"types": ["Image"]})
+
+        assert policy.should_block("https://example.com/a.png", "image") is True
+        assert policy.should_block("https://example.com/a.js", "script") is False
+
+    def test_block_by_domain_includes_subdomains(self):
+        """Test that domain rules cover subdomains but not lookalikes."""
+        policy = ResourcePolicy.from_config({"domains": ["doubleclick.net"]})
+
+        assert policy.should_block("https://doubleclick.net/x", "script") is True
+        assert policy.should_block("https://ad.g.doubleclick.net/x", "script") is True
+        assert policy.should_block("https://notdoubleclick.net/x", "script") is False
+
+    def test_block_by_pattern(self):
+        """Test blocking by URL glob pattern."""
+        policy = ResourcePolicy.from_config({"patterns": ["*/tracking/*"]})
+
+        assert policy.should_block("https://example.com/tracking/pixel.gif", "image") is True
+        assert policy.should_block("https://example.com/docs/", "fetch") is False
+
+    def test_never_blocks_document(self):
+        """Test that the page itself is never blocked."""
+        policy = ResourcePolicy.from_config({"patterns": ["*"]})
+
+        assert policy.should_block("https://example.com/", "document") is False
+
+
+class TestRenderStats:
+    """Tests for RenderStats class."""
+
+    def test_summary(self):
+        """Test the per-page summary line."""
+        stats = RenderStats(blocked={"image": 3, "font": 1}, loaded_requests=2, loaded_bytes=2048)
+
+        assert stats.blocked_count == 4
+        assert stats.summary() == "blocked 4 requests (font: 1, image: 3), loaded 2 requests (2.0 KB)"
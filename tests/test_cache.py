@@ -0,0 +1,193 @@
+"""Tests for cache module."""
+
+import pytest
+import responses
+
+from wit.cache import (
+    LastmodStore,
+    OutputManifest,
+    PageHashStore,
+    PageNotModified,
+    ValidatorStore,
+    content_hash,
+)
+from wit.scraper import _fetch_static
+
+
+@pytest.fixture
+def validators(tmp_path):
+    """Create an empty validator store."""
+    return ValidatorStore(tmp_path / "validators.json")
+
+
+class TestValidatorStore:
+    """Tests for ValidatorStore class."""
+
+    def test_no_headers_for_unknown_url(self, validators):
+        """Test that unknown URLs are fetched unconditionally."""
+        assert validators.request_headers("https://example.com/") == {}
+
+    def test_staged_validators_need_commit(self, validators):
+        """Test that staged validators are only used once committed."""
+        url = "https://example.com/"
+        validators.stage(url, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+        assert validators.request_headers(url) == {}
+
+        validators.commit(url)
+
+        assert validators.request_headers(url) == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+
+    def test_commit_without_validators_forgets_url(self, validators):
+        """Test that a response without validators clears old ones."""
+        url = "https://example.com/"
+        validators.set(url, {"etag": '"v1"'})
+        validators.stage(url, {})
+        validators.commit(url)
+
+        assert url not in validators
+
+
+class TestConditionalFetch:
+    """Tests for conditional requests in _fetch_static."""
+
+    @responses.activate
+    def test_sends_validators_and_raises_on_304(self, validators):
+        """Test that a 304 answer raises PageNotModified."""
+        url = "https://example.com/page"
+        validators.set(url, {"etag": '"v1"'})
+        responses.add(responses.GET, url, status=304)
+
+        with pytest.raises(PageNotModified):
+            _fetch_static(url, 30, "test", 3, validators=validators)
+
+        assert responses.calls[0].request.headers["If-None-Match"] == '"v1"'
+
+    @responses.activate
+    def test_full_response_stages_validators(self, validators):
+        """Test that a 200 answer stages its validators."""
+        url = "https://example.com/page"
+        responses.add(responses.GET, url, body="<p>new</p>", headers={"ETag": '"v2"'})
+
+        html = _fetch_static(url, 30, "test", 3, validators=validators)
+        validators.commit(url)
+
+        assert html == "<p>new</p>"
+        assert validators.get(url) == {"etag": '"v2"'}
+
+    @responses.activate
+    def test_no_conditional_headers_without_store(self):
+        """Test that plain fetches send no validators."""
+        url = "https://example.com/page"
+        responses.add(responses.GET, url, body="ok")
+
+        _fetch_static(url, 30, "test", 3)
+
+        assert "If-None-Match" not in responses.calls[0].request.headers
+
+
+class TestPageHashStore:
+    """Tests for PageHashStore class."""
+
+    def test_content_hash(self):
+        """Test that equal text hashes equal and any change shows."""
+        assert content_hash("<p>ü</p>") == content_hash("<p>ü</p>")
+        assert content_hash("<p>ü</p>") != content_hash("<p>u</p>")
+        assert len(content_hash("")) == 32
+
+    def test_body_unchanged_after_record(self, tmp_path):
+        """Test that recorded hashes survive a save and reload."""
+        store = PageHashStore(tmp_path / "hashes.json", "fp")
+        assert not store.body_unchanged("https://a.com/", "b1")
+
+        store.record("https://a.com/", "b1", "r1")
+        store.save()
+        reloaded = PageHashStore(tmp_path / "hashes.json", "fp")
+
+        assert reloaded.body_unchanged("https://a.com/", "b1")
+        assert not reloaded.body_unchanged("https://a.com/", "b2")
+        assert reloaded.region_hash("https://a.com/") == "r1"
+
+    def test_settings_change_forgets_hashes(self, tmp_path):
+        """Test that hashes from other rendering settings are discarded."""
+        store = PageHashStore(tmp_path / "hashes.json", "fp")
+        store.record("https://a.com/", "b1", "r1")
+        store.save()
+
+        reloaded = PageHashStore(tmp_path / "hashes.json", "other")
+
+        assert not reloaded.body_unchanged("https://a.com/", "b1")
+        assert reloaded.region_hash("https://a.com/") is None
+
+
+class TestOutputManifest:
+    """Tests for OutputManifest class."""
+
+    @pytest.fixture
+    def manifest(self, tmp_path):
+        """Create an empty manifest for an output directory."""
+        return OutputManifest(tmp_path / "manifest.json", tmp_path / "content")
+
+    def test_recorded_hash(self, tmp_path, manifest):
+        """Test that a recorded hash is returned while the file is untouched."""
+        filepath = tmp_path / "content" / "docs" / "a.md"
+        filepath.parent.mkdir(parents=True)
+        filepath.write_text("body")
+
+        manifest.record(filepath, "h1")
+
+        assert manifest.body_hash(filepath) == "h1"
+        assert manifest.keys() == ["docs/a.md"]
+
+    def test_modified_file_is_stale(self, tmp_path, manifest):
+        """Test that an entry is not trusted once the file changed on disk."""
+        filepath = tmp_path / "content" / "a.md"
+        filepath.parent.mkdir()
+        filepath.write_text("body")
+        manifest.record(filepath, "h1")
+
+        filepath.write_text("edited body")
+
+        assert manifest.body_hash(filepath) is None
+
+    def test_missing_file_or_entry(self, tmp_path, manifest):
+        """Test that unknown and deleted files have no hash."""
+        filepath = tmp_path / "content" / "a.md"
+        filepath.parent.mkdir()
+        filepath.write_text("body")
+        assert manifest.body_hash(filepath) is None
+
+        manifest.record(filepath, "h1")
+        filepath.unlink()
+
+        assert manifest.body_hash(filepath) is None
+
+
+class TestLastmodStore:
+    """Tests for LastmodStore class."""
+
+    def test_unmodified_after_record(self, tmp_path):
+        """Test that only a newer lastmod counts as a change."""
+        store = LastmodStore(tmp_path / "lastmod.json", "fp")
+        assert not store.unmodified("https://a.com/", "2024-05-01")
+
+        store.record("https://a.com/", "2024-05-01T12:00:00+02:00")
+        store.save()
+        reloaded = LastmodStore(tmp_path / "lastmod.json", "fp")
+
+        assert reloaded.unmodified("https://a.com/", "2024-05-01T10:00:00Z")
+        assert reloaded.unmodified("https://a.com/", "2024-04")
+        assert not reloaded.unmodified("https://a.com/", "2024-05-01T10:00:01Z")
+        assert not reloaded.unmodified("https://a.com/", None)
+        assert not reloaded.unmodified("https://a.com/", "yesterday")
+
+    def test_record_without_lastmod_forgets(self, tmp_path):
+        """Test that a page losing its lastmod is scraped every time."""
+        store = LastmodStore(tmp_path / "lastmod.json")
+        store.record("https://a.com/", "2024-05-01")
+        store.record("https://a.com/", None)
+
+        assert "https://a.com/" not in store
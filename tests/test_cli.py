@@ -2,12 +2,23 @@
 
 import subprocess
 import tempfile
+import threading
+import time
 from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlparse
 
 import pytest
+import responses
 from click.testing import CliRunner
 
-from wit.cli import cli
+import wit.cli
+from wit.cli import cli, _scrape_site
+from wit.config import SiteConfig
+from wit.cache import PageNotModified
+from wit.pipeline import CpuPool
+from wit.scraper import ScrapingError
+from wit.utils import get_logger
 
 
 @pytest.fixture
@@ -224,6 +235,582 @@ output_dir: content
             assert "https://example.com" in result.output
 
 
+class TestScrapeSite:
+    """Tests for _scrape_site function."""
+    
+    def _make_site(self, tmp_path, **scraping):
+        return SiteConfig(
+            name="example",
+            base_url="https://example.com",
+            output_dir=tmp_path / "content",
+            pages={"urls": ["/", "/a", "/b", "/c"]},
+            scraping={"delay": 0, **scraping},
+            metadata={"include_timestamp": False},
+            state_dir=tmp_path / ".wit",
+        )
+    
+    def _fake_fetch(self, url, scraping_config, **kwargs):
+        return f"<html><body><main><h1>{url}</h1><p>Body</p></main></body></html>"
+    
+    def test_scrape_site_writes_pages(self, tmp_path, monkeypatch):
+        """Test that every page is fetched and written."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        site = self._make_site(tmp_path)
+        
+        scraped, changed, failed, files = _scrape_site(site, get_logger())
+        
+        assert (scraped, changed, failed) == (4, 4, 0)
+        assert (tmp_path / "content" / "a.md").exists()
+    
+    def test_parser_backend_gives_same_output(self, tmp_path, monkeypatch):
+        """Test that the lxml parser writes the same markdown as BeautifulSoup."""
+        pytest.importorskip("cssselect")
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        _scrape_site(self._make_site(tmp_path / "bs4"), get_logger())
+        _scrape_site(self._make_site(tmp_path / "lxml", parser="lxml"), get_logger())
+        
+        for name in ["index.md", "a.md", "b.md", "c.md"]:
+            expected = (tmp_path / "bs4" / "content" / name).read_text()
+            assert (tmp_path / "lxml" / "content" / name).read_text() == expected
+    
+    def test_cpu_pool_gives_same_output(self, tmp_path, monkeypatch):
+        """Test that converting in worker processes writes the same markdown."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        threaded = self._make_site(tmp_path / "threads", concurrency=2)
+        pooled = self._make_site(tmp_path / "pool", concurrency=2)
+        
+        _scrape_site(threaded, get_logger())
+        with CpuPool([pooled], 2) as cpu_pool:
+            scraped, changed, failed, files = _scrape_site(pooled, get_logger(), cpu_pool=cpu_pool)
+        
+        assert (scraped, changed, failed) == (4, 4, 0)
+        assert [Path(f).name for f in files] == ["index.md", "a.md", "b.md", "c.md"]
+        for name in ["index.md", "a.md", "b.md", "c.md"]:
+            expected = (tmp_path / "threads" / "content" / name).read_text()
+            assert (tmp_path / "pool" / "content" / name).read_text() == expected
+    
+    def test_concurrent_results_are_ordered(self, tmp_path, monkeypatch):
+        """Test that concurrent scraping reports files in URL order."""
+        def slow_first_fetch(url, scraping_config, **kwargs):
+            # Make earlier pages finish last
+            time.sleep({"/": 0.03, "/a": 0.02, "/b": 0.01}.get(urlparse(url).path, 0))
+            return self._fake_fetch(url, scraping_config)
+        
+        monkeypatch.setattr("wit.cli.fetch_page", slow_first_fetch)
+        site = self._make_site(tmp_path, concurrency=4)
+        
+        _, changed, _, files = _scrape_site(site, get_logger())
+        
+        assert changed == 4
+        assert [Path(f).name for f in files] == ["index.md", "a.md", "b.md", "c.md"]
+    
+    def test_unchanged_pages_not_rewritten(self, tmp_path, monkeypatch):
+        """Test that a second run reports no changes."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        site = self._make_site(tmp_path, concurrency=2)
+        
+        _scrape_site(site, get_logger())
+        _, changed, _, files = _scrape_site(site, get_logger())
+        
+        assert changed == 0
+        assert files == []
+    
+    def test_failed_pages_counted(self, tmp_path, monkeypatch):
+        """Test that fetch errors are counted without stopping the run."""
+        def fetch(url, scraping_config, **kwargs):
+            if url.endswith("/b"):
+                raise ScrapingError("boom")
+            return self._fake_fetch(url, scraping_config)
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fetch)
+        site = self._make_site(tmp_path, concurrency=3)
+        
+        scraped, changed, failed, _ = _scrape_site(site, get_logger())
+        
+        assert (scraped, failed) == (3, 1)
+    
+    def test_conditional_get_skips_not_modified(self, tmp_path, monkeypatch):
+        """Test that 304 pages are counted as unchanged and left alone."""
+        calls = []
+        
+        def fetch(url, scraping_config, validators=None):
+            calls.append(validators)
+            if validators is not None and validators.request_headers(url):
+                raise PageNotModified(url)
+            if validators is not None:
+                validators.stage(url, {"ETag": '"v1"'})
+            return self._fake_fetch(url, scraping_config)
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fetch)
+        site = self._make_site(tmp_path, conditional_get=True)
+        site.state_dir = tmp_path / ".wit"
+        
+        _scrape_site(site, get_logger())
+        (tmp_path / "content" / "a.md").write_text("edited")
+        scraped, changed, failed, _ = _scrape_site(site, get_logger())
+        
+        assert (scraped, changed, failed) == (4, 0, 0)
+        assert calls[-1] is not None
+        # The 304 short-circuits before the file comparison
+        assert (tmp_path / "content" / "a.md").read_text() == "edited"
+    
+    def test_conditional_get_refetches_missing_output(self, tmp_path, monkeypatch):
+        """Test that validators are dropped when the output file is gone."""
+        def fetch(url, scraping_config, validators=None):
+            if validators is not None and validators.request_headers(url):
+                raise PageNotModified(url)
+            if validators is not None:
+                validators.stage(url, {"ETag": '"v1"'})
+            return self._fake_fetch(url, scraping_config)
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fetch)
+        site = self._make_site(tmp_path, conditional_get=True)
+        site.state_dir = tmp_path / ".wit"
+        
+        _scrape_site(site, get_logger())
+        (tmp_path / "content" / "a.md").unlink()
+        _, changed, _, files = _scrape_site(site, get_logger())
+        
+        assert changed == 1
+        assert (tmp_path / "content" / "a.md").exists()
+
+    
+    def test_skip_unchanged_body(self, tmp_path, monkeypatch):
+        """Test that an identical body is neither parsed nor written."""
+        rendered = []
+        render_page = wit.cli.render_page
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        monkeypatch.setattr(
+            "wit.cli.render_page",
+            lambda site, url, *args: rendered.append(url) or render_page(site, url, *args),
+        )
+        site = self._make_site(tmp_path, skip_unchanged=True)
+        site.state_dir = tmp_path / ".wit"
+        
+        _scrape_site(site, get_logger())
+        (tmp_path / "content" / "a.md").write_text("edited")
+        rendered.clear()
+        scraped, changed, failed, _ = _scrape_site(site, get_logger())
+        
+        assert (scraped, changed, failed) == (4, 0, 0)
+        assert rendered == []
+        assert (tmp_path / "content" / "a.md").read_text() == "edited"
+    
+    def test_skip_unchanged_region(self, tmp_path, monkeypatch):
+        """Test that a page whose chrome changed keeps its file untouched."""
+        run = []
+        
+        def fetch(url, scraping_config, **kwargs):
+            # A nonce outside the content region changes every run
+            return self._fake_fetch(url, scraping_config).replace("<main>", f"<nav>{len(run)}</nav><main>")
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fetch)
+        site = self._make_site(tmp_path, skip_unchanged=True)
+        site.state_dir = tmp_path / ".wit"
+        
+        _scrape_site(site, get_logger())
+        (tmp_path / "content" / "a.md").write_text("edited")
+        run.append(1)
+        _, changed, _, _ = _scrape_site(site, get_logger())
+        
+        assert changed == 0
+        assert (tmp_path / "content" / "a.md").read_text() == "edited"
+    
+    def test_skip_unchanged_rewrites_missing_output(self, tmp_path, monkeypatch):
+        """Test that hashes are not trusted when the output file is gone."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        site = self._make_site(tmp_path, skip_unchanged=True)
+        site.state_dir = tmp_path / ".wit"
+        
+        _scrape_site(site, get_logger())
+        (tmp_path / "content" / "a.md").unlink()
+        _, changed, _, files = _scrape_site(site, get_logger())
+        
+        assert changed == 1
+        assert (tmp_path / "content" / "a.md").exists()
+    
+    def test_manifest_spares_reading_old_files(self, tmp_path, monkeypatch):
+        """Test that unchanged pages are detected from the manifest alone."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        site = self._make_site(tmp_path)
+        _scrape_site(site, get_logger())
+        
+        original_read_text = Path.read_text
+        
+        def read_text(path, *args, **kwargs):
+            assert path.suffix != ".md", f"read {path}"
+            return original_read_text(path, *args, **kwargs)
+        
+        with monkeypatch.context() as m:
+            m.setattr(Path, "read_text", read_text)
+            _, changed, failed, _ = _scrape_site(site, get_logger())
+        
+        assert (changed, failed) == (0, 0)
+        assert (tmp_path / ".wit" / "manifest" / "example.json").exists()
+    
+    def test_manifest_rebuilt_when_missing_or_stale(self, tmp_path, monkeypatch):
+        """Test that edited files and a lost manifest still compare correctly."""
+        monkeypatch.setattr("wit.cli.fetch_page", self._fake_fetch)
+        site = self._make_site(tmp_path)
+        _scrape_site(site, get_logger())
+        
+        (tmp_path / "content" / "a.md").write_text("edited")
+        _, changed, _, files = _scrape_site(site, get_logger())
+        assert [Path(f).name for f in files] == ["a.md"]
+        
+        (tmp_path / ".wit" / "manifest" / "example.json").unlink()
+        _, changed, _, _ = _scrape_site(site, get_logger())
+        assert changed == 0
+        assert (tmp_path / ".wit" / "manifest" / "example.json").exists()
+    
+    @responses.activate
+    def test_incremental_skips_pages_with_unchanged_lastmod(self, tmp_path, monkeypatch):
+        """Test that only pages whose sitemap lastmod moved on are fetched again."""
+        fetched = []
+        
+        def fake_fetch(url, scraping_config, **kwargs):
+            fetched.append(urlparse(url).path)
+            return self._fake_fetch(url, scraping_config)
+        
+        def serve_sitemap(lastmods):
+            entries = "".join(
+                f"<url><loc>https://example.com{path}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>"
+                for path, lastmod in lastmods.items()
+            )
+            responses.replace(
+                responses.GET, "https://example.com/sitemap.xml", body=f"<urlset>{entries}</urlset>"
+            )
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fake_fetch)
+        site = self._make_site(tmp_path, incremental=True)
+        site.pages = {"sitemap": "/sitemap.xml"}
+        responses.add(responses.GET, "https://example.com/sitemap.xml", body="")
+        
+        serve_sitemap({"/a": "2024-05-01", "/b": "2024-05-01T10:00:00Z", "/c": None})
+        assert _scrape_site(site, get_logger())[:3] == (3, 3, 0)
+        
+        fetched.clear()
+        serve_sitemap({"/a": "2024-05-01", "/b": "2024-05-02T09:00:00+02:00", "/c": None})
+        scraped, _, _, _ = _scrape_site(site, get_logger())
+        
+        # /b moved on and /c has no lastmod; /a is left alone
+        assert fetched == ["/b", "/c"]
+        assert scraped == 2
+        assert (tmp_path / ".wit" / "lastmod" / "example.json").exists()
+        
+        fetched.clear()
+        (tmp_path / "content" / "a.md").unlink()
+        _scrape_site(site, get_logger())
+        assert fetched == ["/a", "/c"]
+
+
+class TestSinglePassCrawl:
+    """Tests for fused crawl-and-scrape."""
+    
+    def test_each_page_fetched_once(self, tmp_path, monkeypatch):
+        """Test that crawled pages are scraped without refetching."""
+        links = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b">B</a>',
+            "https://example.com/a": '<a href="/">Home</a>',
+        }
+        fetched = []
+        
+        def fake_fetch(url, cfg, **kwargs):
+            fetched.append(url)
+            return f"<html><body><main><h1>{url}</h1>{links.get(url, '')}</main></body></html>"
+        
+        monkeypatch.setattr("wit.discovery.fetch_page", fake_fetch)
+        monkeypatch.setattr("wit.cli.fetch_page", fake_fetch)
+        site = SiteConfig(
+            name="example",
+            base_url="https://example.com",
+            output_dir=tmp_path / "content",
+            pages={"urls": ["/extra"], "crawl": {"max_depth": 1, "single_pass": True}},
+            scraping={"delay": 0, "concurrency": 2},
+            metadata={"include_timestamp": False},
+            state_dir=tmp_path / ".wit",
+        )
+        
+        scraped, changed, failed, files = _scrape_site(site, get_logger())
+        
+        assert (scraped, changed, failed) == (4, 4, 0)
+        assert sorted(fetched) == [
+            "https://example.com/",
+            "https://example.com/a",
+            "https://example.com/b",
+            "https://example.com/extra",
+        ]
+        assert [Path(f).name for f in files] == ["index.md", "a.md", "b.md", "extra.md"]
+        assert "https://example.com/b" in (tmp_path / "content" / "b.md").read_text()
+
+
+class TestScrapeMultiSite:
+    """Tests for scraping several sites concurrently."""
+    
+    def test_sites_run_concurrently(self, runner, tmp_path, monkeypatch):
+        """Test that a slow site does not hold up the others."""
+        intervals = {"slow": [], "fast": []}
+        
+        def fake_fetch(url, cfg, **kwargs):
+            start = time.monotonic()
+            time.sleep(0.2 if "slow.example.com" in url else 0.1)
+            intervals[urlparse(url).hostname.split(".")[0]].append((start, time.monotonic()))
+            return f"<html><body><main><p>{url}</p></main></body></html>"
+        
+        monkeypatch.setattr("wit.cli.fetch_page", fake_fetch)
+        
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("""
+workers: 4
+scraping:
+  delay: 0
+sites:
+  - name: slow
+    base_url: https://slow.example.com
+    pages:
+      urls: [/, /a]
+  - name: fast
+    base_url: https://fast.example.com
+    pages:
+      urls: [/, /a, /b, /c]
+""")
+            result = runner.invoke(cli, ["scrape"])
+            
+            assert result.exit_code == 0
+            assert "Total: 6 pages, 6 changed, 0 failed" in result.output
+            assert Path("content/fast/c.md").exists()
+            assert Path("content/slow/a.md").exists()
+            # The fast site's fetches ran while the slow site was busy
+            slow_start, slow_end = intervals["slow"][0][0], intervals["slow"][-1][1]
+            assert any(start < slow_end and end > slow_start for start, end in intervals["fast"])
+    
+    def test_workers_cap_discovery_and_page_fetches(self, runner, tmp_path, monkeypatch):
+        """Test that crawling and scraping all sites stays within the workers budget."""
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        
+        def fake_fetch_static(url, *args, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.remove(url)
+            return '<html><body><main><a href="/a">a</a><a href="/b">b</a></main></body></html>'
+        
+        class FakeSession:
+            def get(self, url, **kwargs):
+                return SimpleNamespace(text=fake_fetch_static(url), raise_for_status=lambda: None)
+        
+        # Page fetches and the crawler's own requests
+        monkeypatch.setattr("wit.scraper._fetch_static", fake_fetch_static)
+        monkeypatch.setattr("wit.discovery.get_session", lambda url, cfg: FakeSession())
+        
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("""
+workers: 2
+scraping:
+  delay: 0
+  concurrency: 2
+sites:
+""" + "".join(f"""
+  - name: s{i}
+    base_url: https://s{i}.example.com
+    pages:
+      crawl:
+        start: /
+        max_depth: 1
+        concurrency: 4
+""" for i in range(3)))
+            result = runner.invoke(cli, ["scrape"])
+            
+            assert result.exit_code == 0
+            assert "Total: 9 pages" in result.output
+            assert max(peak) == 2
+    
+    def test_changed_files_merged_in_config_order(self, tmp_path, monkeypatch):
+        """Test that changed files are committed in config order."""
+        monkeypatch.setattr(
+            "wit.cli.fetch_page",
+            lambda url, cfg, **kwargs: "<html><body><main><p>Hi</p></main></body></html>",
+        )
+        committed = []
+        monkeypatch.setattr("wit.cli.is_git_repo", lambda: True)
+        monkeypatch.setattr(
+            "wit.cli._commit_files",
+            lambda cfg, files, logger: committed.extend(files),
+        )
+        
+        runner = CliRunner()
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("""
+scraping:
+  delay: 0
+sites:
+  - name: b
+    base_url: https://b.example.com
+    pages:
+      urls: [/]
+  - name: a
+    base_url: https://a.example.com
+    pages:
+      urls: [/]
+""")
+            result = runner.invoke(cli, ["scrape", "--commit"])
+            
+            assert result.exit_code == 0
+            assert [Path(f).parent.name for f in committed] == ["b", "a"]
+
+    
+    def test_commit_contains_only_scraped_files(self, runner, tmp_path, monkeypatch):
+        """Test that --commit leaves unrelated working tree changes alone."""
+        monkeypatch.setattr(
+            "wit.cli.fetch_page",
+            lambda url, cfg, **kwargs: "<html><body><main><p>Hi</p></main></body></html>",
+        )
+        
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            subprocess.run(["git", "init"], check=True, capture_output=True)
+            Path("wit.yaml").write_text("""
+scraping:
+  delay: 0
+git:
+  message_template: "Update {changed_count} page(s)"
+sites:
+  - name: a
+    base_url: https://a.example.com
+    pages:
+      urls: [/, /x]
+""")
+            Path("notes.txt").write_text("not scraped")
+            
+            result = runner.invoke(cli, ["scrape", "--commit"])
+            
+            assert result.exit_code == 0
+            committed = subprocess.run(
+                ["git", "ls-tree", "-r", "--name-only", "HEAD"], capture_output=True, text=True, check=True,
+            ).stdout.split()
+            assert committed == ["content/a/index.md", "content/a/x.md"]
+    
+    def test_commit_leaves_out_snapshots(self, runner, tmp_path, monkeypatch):
+        """Test that raw page snapshots stay out of the content repository."""
+        monkeypatch.setattr(
+            "wit.cli.fetch_page",
+            lambda url, cfg, **kwargs: "<html><body><main><p>Hi</p></main></body></html>",
+        )
+        
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            subprocess.run(["git", "init"], check=True, capture_output=True)
+            Path("wit.yaml").write_text("""
+scraping:
+  delay: 0
+  snapshots: true
+  skip_unchanged: true
+sites:
+  - name: a
+    base_url: https://a.example.com
+    pages:
+      urls: [/]
+""")
+            
+            result = runner.invoke(cli, ["scrape", "--commit"])
+            
+            assert result.exit_code == 0
+            assert Path(".wit/snapshots").is_dir()
+            committed = subprocess.run(
+                ["git", "ls-tree", "-r", "--name-only", "HEAD"], capture_output=True, text=True, check=True,
+            ).stdout.split()
+            assert committed == [".wit/hashes/a.json", "content/a/index.md"]
+
+
+class TestRebuild:
+    """Tests for rebuild command."""
+    
+    def test_rebuild_from_snapshots(self, runner, tmp_path, monkeypatch):
+        """Test that output is regenerated from snapshots with new selectors."""
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("""
+base_url: https://example.com
+pages:
+  urls:
+    - /
+scraping:
+  delay: 0
+  snapshots: true
+selectors:
+  content: [main]
+metadata:
+  include_timestamp: false
+""")
+            monkeypatch.setattr(
+                "wit.cli.fetch_page",
+                lambda url, cfg, **kwargs: "<main><p>Main</p></main><article><p>Article</p></article>",
+            )
+            result = runner.invoke(cli, ["scrape"])
+            assert result.exit_code == 0
+            assert "Main" in Path("content/index.md").read_text()
+            
+            # Switch selectors and rebuild without any network access
+            Path("wit.yaml").write_text(Path("wit.yaml").read_text().replace("[main]", "[article]"))
+            monkeypatch.setattr("wit.cli.fetch_page", None)
+            result = runner.invoke(cli, ["rebuild", "--workers", "2"])
+            
+            assert result.exit_code == 0
+            content = Path("content/index.md").read_text()
+            assert "Article" in content
+            assert "Main" not in content
+    
+    def test_rebuild_without_snapshots(self, runner, tmp_path):
+        """Test rebuild when nothing has been cached yet."""
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("""
+base_url: https://example.com
+""")
+            result = runner.invoke(cli, ["rebuild"])
+            
+            assert result.exit_code == 0
+            assert "No snapshots found" in result.output
+
+
+class TestReplay:
+    """Tests for replay command."""
+    
+    def test_replay_snapshots_into_branch(self, runner, tmp_path, monkeypatch):
+        """Test that scraped snapshots are imported as commits on a branch."""
+        monkeypatch.setattr("wit.cli.fetch_page", lambda url, cfg, **kwargs: "<main><p>Main</p></main>")
+        
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            subprocess.run(["git", "init"], check=True, capture_output=True)
+            Path("wit.yaml").write_text("""
+base_url: https://example.com
+pages:
+  urls: [/, /a]
+scraping:
+  delay: 0
+  snapshots: true
+""")
+            assert runner.invoke(cli, ["scrape"]).exit_code == 0
+            
+            result = runner.invoke(cli, ["replay", "--branch", "history", "--workers", "2"])
+            
+            assert result.exit_code == 0, result.output
+            assert "Imported 1 commits (2 page versions) into history" in result.output
+            files = subprocess.run(
+                ["git", "ls-tree", "-r", "--name-only", "history"], capture_output=True, text=True, check=True,
+            ).stdout.split()
+            assert files == ["content/a.md", "content/index.md"]
+    
+    def test_replay_needs_git_repo(self, runner, tmp_path):
+        """Test that replay fails outside a git repository."""
+        with runner.isolated_filesystem(temp_dir=tmp_path):
+            Path("wit.yaml").write_text("base_url: https://example.com")
+            
+            result = runner.invoke(cli, ["replay", "--branch", "history"])
+            
+            assert result.exit_code == 1
+
+
 class TestScrapeUrl:
     """Tests for scrape-url command."""
     
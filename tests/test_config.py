@@ -30,6 +30,34 @@ class TestSiteConfig:
         
         assert "main" in site.selectors["content"]
         assert "nav" in site.selectors["remove"]
+    
+    def test_removal_matcher_is_cached(self):
+        """Test that remove selectors are compiled once per site."""
+        site = SiteConfig(name="example", base_url="https://example.com")
+        
+        matcher = site.removal_matcher
+        
+        assert matcher.selectors == site.selectors["remove"]
+        assert site.removal_matcher is matcher
+    
+    def test_removal_matcher_follows_changes(self):
+        """Test that changing the remove list recompiles the matcher."""
+        site = SiteConfig(name="example", base_url="https://example.com")
+        matcher = site.removal_matcher
+        
+        site.selectors["remove"] = [".ad"]
+        
+        assert site.removal_matcher is not matcher
+        assert site.removal_matcher.groups == [".ad"]
+    
+    def test_removal_matcher_not_in_equality(self):
+        """Test that the compiled matcher doesn't affect comparisons."""
+        site = SiteConfig(name="example", base_url="https://example.com")
+        other = SiteConfig(name="example", base_url="https://example.com")
+        
+        site.removal_matcher
+        
+        assert site == other
 
 
 class TestDeriveSiteName:
@@ -428,6 +456,54 @@ sites:
         
         with pytest.raises(ValueError, match="base_url"):
             load_config(config_file)
+    
+    def test_load_workers(self, tmp_path):
+        """Test the global worker budget setting."""
+        config_file = tmp_path / "wit.yaml"
+        config_file.write_text("""
+workers: 16
+sites:
+  - base_url: https://site1.com
+""")
+        
+        assert load_config(config_file).workers == 16
+    
+    def test_default_workers(self, tmp_path):
+        """Test the default worker budget."""
+        config_file = tmp_path / "wit.yaml"
+        config_file.write_text("base_url: https://example.com")
+        
+        assert load_config(config_file).workers == 8
+    
+    def test_invalid_workers_error(self, tmp_path):
+        """Test that a non-positive worker budget raises an error."""
+        config_file = tmp_path / "wit.yaml"
+        config_file.write_text("""
+base_url: https://example.com
+workers: 0
+""")
+        
+        with pytest.raises(ValueError, match="workers"):
+            load_config(config_file)
+    
+    def test_load_cpu_workers(self, tmp_path):
+        """Test the worker process setting, off by default."""
+        config_file = tmp_path / "wit.yaml"
+        config_file.write_text("base_url: https://example.com")
+        
+        assert load_config(config_file).cpu_workers == 0
+        
+        config_file.write_text("base_url: https://example.com\ncpu_workers: 4")
+        
+        assert load_config(config_file).cpu_workers == 4
+    
+    def test_invalid_cpu_workers_error(self, tmp_path):
+        """Test that a negative worker process count raises an error."""
+        config_file = tmp_path / "wit.yaml"
+        config_file.write_text("base_url: https://example.com\ncpu_workers: -1")
+        
+        with pytest.raises(ValueError, match="cpu_workers"):
+            load_config(config_file)
 
 
 class TestCreateDefaultConfig:
@@ -1,8 +1,69 @@
 """Tests for converter module."""
 
+import threading
+
 import pytest
 
-from wit.converter import html_to_markdown, add_metadata
+from bs4 import BeautifulSoup
+
+from wit.converter import _detect_language, _get_converter, html_to_markdown, soup_to_markdown, add_metadata
+
+# Labeled code blocks for language detection. Detection is a heuristic;
+# the misses below are known and may be fixed by future tuning.
+KNOWN_MISS = pytest.mark.xfail(reason="known misclassification", strict=True)
+
+LABELED_SNIPPETS = [
+    ("import os\nimport sys\n\nprint(os.getcwd())", "python"),
+    ("from pathlib import Path\n\ndef read(path):\n    return Path(path).read_text()", "python"),
+    ("def greet(name):\n    return f'Hello {name}'", "python"),
+    ("class Config:\n    def __init__(self):\n        self.debug = False", "python"),
+    ("if __name__ == '__main__':\n    main()", "python"),
+    ("print('hello world')", "python"),
+    ("const express = require('express');\nconst app = express();", "javascript"),
+    ("let count = 0;\ncount += 1;", "javascript"),
+    ("function add(a, b) {\n  return a + b;\n}", "javascript"),
+    pytest.param("import React from 'react';\nexport default App;", "javascript", marks=KNOWN_MISS),
+    ("export const handler = async (event) => {\n  return event;\n};", "javascript"),
+    ("public class Main {\n    public static void main(String[] args) {}\n}", "java"),
+    pytest.param("import java.util.List;\nimport java.util.ArrayList;", "java", marks=KNOWN_MISS),
+    ("private final String name;\nprotected int count;", "java"),
+    pytest.param("package main\n\nimport \"fmt\"\n\nfunc main() {\n\tfmt.Println(\"hi\")\n}", "go", marks=KNOWN_MISS),
+    ("func add(a int, b int) int {\n\treturn a + b\n}", "go"),
+    ("type Server struct {\n\tAddr string\n}", "go"),
+    ("fn main() {\n    println!(\"hi\");\n}", "rust"),
+    pytest.param("use std::collections::HashMap;\nlet mut map = HashMap::new();", "rust", marks=KNOWN_MISS),
+    ("pub struct Point {\n    x: i32,\n}\nimpl Point {}", "rust"),
+    ("require 'json'\nputs JSON.generate({a: 1})", "ruby"),
+    ("module Greeter\n  def self.hi\n    puts 'hi'\n  end\nend", "ruby"),
+    ("puts 'Hello'", "ruby"),
+    ("<?php\necho 'Hello';", "php"),
+    ("$name = 'World';\necho \"Hello $name\";", "php"),
+    pytest.param("namespace App\\Http;\n\nuse Illuminate\\Http\\Request;", "php", marks=KNOWN_MISS),
+    ("#!/bin/bash\nset -e\nnpm install", "bash"),
+    ("#!/usr/bin/env bash\necho \"done\"", "bash"),
+    pytest.param("export PATH=$HOME/bin:$PATH\necho $PATH", "bash", marks=KNOWN_MISS),
+    ("echo 'installing'\npip install wit", "bash"),
+    ("if [ -f config.yml ]; then\n  cat config.yml\nfi", "bash"),
+    ("SELECT id, name FROM users WHERE active = 1;", "sql"),
+    ("CREATE TABLE pages (\n  id INTEGER PRIMARY KEY\n);", "sql"),
+    ("insert into logs (msg) values ('hi');", "sql"),
+    ("UPDATE users SET name = 'x' WHERE id = 1;", "sql"),
+    ("<!DOCTYPE html>\n<html>\n<body></body>\n</html>", "html"),
+    ("<html lang=\"en\">\n<head><title>T</title></head>", "html"),
+    (".container {\n  display: flex;\n}", "css"),
+    ("#header {\n  color: red;\n}", "css"),
+    ("@media (max-width: 600px) {\n  body { margin: 0; }\n}", "css"),
+    ("body {\n  font-family: sans-serif;\n}", "css"),
+    ("{\"name\": \"wit\", \"version\": \"1.0.0\"}", "json"),
+    ("[1, 2, 3]", "json"),
+    pytest.param("{\n  \"a\": 1,\n  \"b\": [true, false]\n}", "json", marks=KNOWN_MISS),
+    ("site:\n  name: docs\n  base_url: https://example.com", "yaml"),
+    ("- name: checkout\n  uses: actions/checkout@v4", "yaml"),
+    ("<?xml version=\"1.0\"?>\n<urlset></urlset>", "xml"),
+    ("<project>\n  <modelVersion>4.0.0</modelVersion>\n</project>", "xml"),
+    ("Just some prose that is not code.", ""),
+    ("x + y = z", ""),
+]
 
 
 class TestHtmlToMarkdown:
@@ -191,6 +252,71 @@ class TestHtmlToMarkdown:
         assert "\n\n\n\n" not in result
 
 
+class TestSoupToMarkdown:
+    """Tests for soup_to_markdown function."""
+    
+    @pytest.mark.parametrize("options", [
+        {},
+        {"heading_style": "setext", "strip_links": True, "include_images": False},
+    ])
+    def test_matches_html_to_markdown(self, options):
+        """Test that converting a tree gives the same result as its HTML."""
+        html = (
+            "<main><h1>Title</h1><p>Text &amp; <b>bold</b> <a href='/x?utm_source=a&id=1'>link</a></p>"
+            "<img src='a.png' alt='A'><ul><li>one<ul><li>nested</li></ul></li></ul>"
+            "<pre><code class='language-python'>print(1)</code></pre></main>"
+        )
+        soup = BeautifulSoup(html, "lxml")
+        content = soup.main.extract()
+        tree = BeautifulSoup("", "html.parser")
+        tree.append(content)
+        
+        assert soup_to_markdown(tree, options) == html_to_markdown(html, options)
+
+
+class TestConverterReuse:
+    """Tests for converters cached per markdown options."""
+    
+    def test_reused_for_same_options(self):
+        """Test that equal options give the same converter."""
+        first = _get_converter("atx", False, True, "auto", True)
+        
+        assert _get_converter("atx", False, True, "auto", True) is first
+        assert _get_converter("setext", False, True, "auto", True) is not first
+    
+    def test_options_do_not_leak_between_sites(self):
+        """Test that one site's options don't affect another's output."""
+        html = "<h1>T</h1><p><a href='/x'>link</a> <img src='a.png' alt='A'></p>"
+        
+        stripped = html_to_markdown(html, {"strip_links": True, "include_images": False})
+        default = html_to_markdown(html, {})
+        
+        assert "](/x)" not in stripped and "![A]" not in stripped
+        assert "[link](/x)" in default and "![A](a.png)" in default
+        assert html_to_markdown(html, {"strip_links": True, "include_images": False}) == stripped
+    
+    def test_one_converter_per_thread(self):
+        """Test that threads never share a converter."""
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(_get_converter("atx", False, True, "auto", True)))
+        thread.start()
+        thread.join()
+        
+        assert seen[0] is not _get_converter("atx", False, True, "auto", True)
+    
+    def test_concurrent_conversions(self):
+        """Test that conversions in many threads give the same results."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        pages = [f"<h2>Page {i}</h2><p><a href='/p{i}?utm_source=x'>p{i}</a></p>" for i in range(50)]
+        expected = [html_to_markdown(page, {}) for page in pages]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda page: html_to_markdown(page, {}), pages * 4))
+        
+        assert results == expected * 4
+
+
 class TestAddMetadata:
     """Tests for add_metadata function."""
     
@@ -264,3 +390,31 @@ class TestAddMetadata:
         )
         
         assert '\\"quotes\\"' in result
+
+
+class TestDetectLanguage:
+    """Tests for code language detection."""
+    
+    @pytest.mark.parametrize("code,language", LABELED_SNIPPETS)
+    def test_labeled_snippets(self, code, language):
+        """Test detection against hand-labeled code blocks."""
+        assert _detect_language(code) == language
+    
+    def test_first_listed_language_wins(self):
+        """Test that a line of a higher-precedence language decides."""
+        code = "SELECT 1;\nimport os"
+        
+        assert _detect_language(code) == "python"
+    
+    def test_matches_at_line_starts_only(self):
+        """Test that keywords in the middle of a line are ignored."""
+        assert _detect_language("x = 1  # import os, def f") == ""
+    
+    def test_results_are_cached(self):
+        """Test that repeated snippets are looked up, not scanned again."""
+        _detect_language.cache_clear()
+        
+        _detect_language("echo hi")
+        _detect_language("echo hi")
+        
+        assert _detect_language.cache_info().hits == 1
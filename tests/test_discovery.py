@@ -1,6 +1,10 @@
 """Tests for discovery module."""
 
+import gzip
+import io
+
 import pytest
+import requests
 
 from wit.config import WitConfig, SiteConfig
 from wit.discovery import (
@@ -9,8 +13,19 @@ from wit.discovery import (
     discover_from_urls,
     discover_from_sitemap,
     discover_from_crawl,
+    discover_sitemap_entries,
+    SitemapEntry,
     _should_include_url,
 )
+from wit.throttle import reset_host_limiters
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    """Ensure rate limiters don't leak between tests."""
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
 
 
 class TestShouldIncludeUrl:
@@ -177,6 +192,228 @@ class TestDiscoverFromSitemap:
         
         assert "https://example.com/page" in urls
         assert "https://other-site.com/page" not in urls
+    
+    def test_gzipped_sitemap_index(self):
+        """Test that gzipped sitemaps and child sitemaps are decompressed."""
+        sitemap_index = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <sitemapindex>
+            <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc></sitemap>
+        </sitemapindex>
+        """
+        sub_sitemap = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>https://example.com/a</loc><lastmod>2024-01-01</lastmod></url>
+            <url><loc>https://example.com/b</loc></url>
+        </urlset>
+        """
+        
+        def mock_fetch(url):
+            if "sitemap-1" in url:
+                return gzip.compress(sub_sitemap)
+            return gzip.compress(sitemap_index)
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml.gz",
+            {"delay": 0, "timeout": 30, "user_agent": "test"},
+            mock_fetch
+        )
+        
+        assert urls == ["https://example.com/a", "https://example.com/b"]
+    
+    def test_truncated_sitemap_keeps_parsed_urls(self):
+        """Test that a sitemap cut off mid-download still yields its earlier URLs."""
+        sitemap_xml = """<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>https://example.com/a</loc></url>
+            <url><loc>https://example.com/b</loc></url>
+            <url><loc>https://exa"""
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml",
+            {"timeout": 30, "user_agent": "test"},
+            lambda url: sitemap_xml
+        )
+        
+        assert urls == ["https://example.com/a", "https://example.com/b"]
+    
+    def test_truncated_gzipped_sitemap_keeps_parsed_urls(self):
+        """Test that a .xml.gz cut off mid-download still yields its earlier URLs."""
+        urls_xml = "".join(f"<url><loc>https://example.com/{i}</loc></url>" for i in range(2000))
+        body = gzip.compress(f"<urlset>{urls_xml}</urlset>".encode())
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml.gz",
+            {"timeout": 30, "user_agent": "test"},
+            lambda url: body[: len(body) // 2]
+        )
+        
+        assert urls
+        assert urls == [f"https://example.com/{i}" for i in range(len(urls))]
+    
+    def test_sitemap_download_failing_keeps_parsed_urls(self, monkeypatch):
+        """Test that a connection dropped mid-read still yields the URLs read before."""
+        urls_xml = "".join(f"<url><loc>https://example.com/{i}</loc></url>" for i in range(2000))
+        body = f"<urlset>{urls_xml}</urlset>".encode()
+        
+        class DroppingStream(io.RawIOBase):
+            """Sends the first half of the body, then drops the connection."""
+            
+            def __init__(self):
+                self.sent = 0
+            
+            def readable(self):
+                return True
+            
+            def readinto(self, buffer):
+                if self.sent >= len(body) // 2:
+                    raise requests.ConnectionError("connection reset")
+                chunk = body[self.sent:self.sent + min(len(buffer), 4096)]
+                buffer[: len(chunk)] = chunk
+                self.sent += len(chunk)
+                return len(chunk)
+        
+        class FakeResponse:
+            raw = DroppingStream()
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc_info):
+                return False
+            
+            def raise_for_status(self):
+                pass
+        
+        class FakeSession:
+            def get(self, url, **kwargs):
+                return FakeResponse()
+        
+        monkeypatch.setattr("wit.discovery.get_session", lambda url, cfg: FakeSession())
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml",
+            {"timeout": 30, "user_agent": "test"},
+        )
+        
+        assert urls
+        assert urls == [f"https://example.com/{i}" for i in range(len(urls))]
+    
+    def test_sitemap_index_fetched_concurrently_in_order(self):
+        """Test that child sitemaps are fetched together and merged in index order."""
+        import time
+        
+        children = [f"https://example.com/sitemap-{i}.xml" for i in range(8)]
+        sitemap_index = "<sitemapindex>" + "".join(
+            f"<sitemap><loc>{child}</loc></sitemap>" for child in children
+        ) + "</sitemapindex>"
+        
+        def mock_fetch(url):
+            if url.endswith("/sitemap.xml"):
+                return sitemap_index
+            i = children.index(url)
+            # Earlier sitemaps finish last
+            time.sleep(0.08 - 0.01 * i)
+            return f"<urlset><url><loc>https://example.com/p{i}</loc></url></urlset>"
+        
+        started = time.monotonic()
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml",
+            {"delay": 0, "timeout": 30, "user_agent": "test"},
+            mock_fetch,
+            concurrency=8,
+        )
+        
+        assert urls == [f"https://example.com/p{i}" for i in range(8)]
+        # Serially the children take 0.36s
+        assert time.monotonic() - started < 0.25
+    
+    def test_sitemap_fetches_wait_for_host_limiter(self, monkeypatch):
+        """Test that every sitemap fetch takes a token from its host's limiter."""
+        acquired = []
+        
+        class FakeLimiter:
+            def __init__(self, url):
+                self.url = url
+            
+            def acquire(self):
+                acquired.append(self.url)
+        
+        monkeypatch.setattr("wit.discovery.get_host_limiter", lambda url, cfg: FakeLimiter(url))
+        
+        def mock_fetch(url):
+            if url.endswith("/sitemap.xml"):
+                return "<sitemapindex><sitemap><loc>https://example.com/a.xml</loc></sitemap></sitemapindex>"
+            return "<urlset><url><loc>https://example.com/a</loc></url></urlset>"
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml",
+            {"timeout": 30, "user_agent": "test"},
+            mock_fetch,
+            concurrency=4,
+        )
+        
+        assert urls == ["https://example.com/a"]
+        assert acquired == ["https://example.com/sitemap.xml", "https://example.com/a.xml"]
+    
+    def test_sitemap_index_cycles_and_depth(self):
+        """Test that each sitemap is read once and deep nesting is cut off."""
+        fetched = []
+        documents = {
+            # Refers to itself and to a child that refers back to it
+            "https://example.com/sitemap.xml": ["/sitemap.xml", "/a.xml", "/nested-1.xml"],
+            "https://example.com/a.xml": ["/sitemap.xml", "/a.xml#dup"],
+            "https://example.com/nested-1.xml": ["/nested-2.xml"],
+            "https://example.com/nested-2.xml": ["/nested-3.xml"],
+            "https://example.com/nested-3.xml": ["/nested-4.xml"],
+        }
+        
+        def mock_fetch(url):
+            fetched.append(url)
+            refs = "".join(f"<sitemap><loc>https://example.com{ref}</loc></sitemap>" for ref in documents[url])
+            return f"<sitemapindex>{refs}<url><loc>{url}.page</loc></url></sitemapindex>"
+        
+        urls = discover_from_sitemap(
+            "https://example.com",
+            "/sitemap.xml",
+            {"delay": 0, "timeout": 30, "user_agent": "test"},
+            mock_fetch,
+            concurrency=2,
+        )
+        
+        assert sorted(fetched) == sorted(documents)
+        assert urls == [f"{url}.page" for url in documents]
+    
+    def test_sitemap_entry_metadata(self):
+        """Test that lastmod, changefreq and priority are kept per URL."""
+        sitemap_xml = """<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url>
+                <loc>https://example.com/a</loc>
+                <lastmod>2024-05-06T10:20:00Z</lastmod>
+                <changefreq>daily</changefreq>
+                <priority>0.8</priority>
+            </url>
+            <url><loc>https://example.com/b</loc><priority>high</priority></url>
+        </urlset>
+        """
+        
+        entries = discover_sitemap_entries(
+            "https://example.com",
+            "/sitemap.xml",
+            {"timeout": 30, "user_agent": "test"},
+            lambda url: sitemap_xml
+        )
+        
+        assert entries == [
+            SitemapEntry("https://example.com/a", "2024-05-06T10:20:00Z", "daily", 0.8),
+            SitemapEntry("https://example.com/b"),
+        ]
 
 
 class TestDiscoverFromCrawl:
@@ -341,6 +578,132 @@ class TestDiscoverFromCrawl:
         assert "https://example.com/" in urls
         assert "https://example.com/internal" in urls
         assert "https://other.com/page" not in urls
+    
+    def test_crawl_hands_pages_to_callback(self):
+        """Test that every discovered page is fetched once and passed on."""
+        pages = {
+            "https://example.com/": '<a href="/level1">L1</a>',
+            "https://example.com/level1": '<a href="/level1/level2">L2</a>',
+        }
+        fetched = []
+        received = {}
+        
+        def mock_fetch(url):
+            fetched.append(url)
+            return f"<html><body>{pages.get(url, '')}</body></html>"
+        
+        urls = discover_from_crawl(
+            base_url="https://example.com",
+            start="/",
+            max_depth=1,
+            max_pages=10,
+            include=[],
+            exclude=[],
+            scraping_config={"timeout": 30, "user_agent": "test", "delay": 0},
+            fetch_func=mock_fetch,
+            on_page=lambda url, html: received.__setitem__(url, html),
+        )
+        
+        assert urls == ["https://example.com/", "https://example.com/level1"]
+        # Pages at max_depth are fetched too, but their links are not followed
+        assert fetched == urls
+        assert "/level1/level2" in received["https://example.com/level1"]
+    
+    def test_concurrent_crawl_matches_serial_order(self):
+        """Test that concurrent fetching discovers the same pages in BFS order."""
+        import random
+        import time
+        
+        rng = random.Random(0)
+        pages = {
+            f"https://example.com/p{i}": "".join(
+                f'<a href="/p{rng.randrange(60)}">x</a>' for _ in range(rng.randint(0, 5))
+            )
+            for i in range(50)
+        }
+        
+        def mock_fetch(url):
+            # Make pages finish out of order
+            time.sleep(rng.random() / 500)
+            return pages.get(url, "")
+        
+        def crawl(concurrency):
+            return discover_from_crawl(
+                base_url="https://example.com",
+                start="/p0",
+                max_depth=4,
+                max_pages=25,
+                include=[],
+                exclude=["/p1"],
+                scraping_config={"delay": 0},
+                fetch_func=mock_fetch,
+                concurrency=concurrency,
+            )
+        
+        serial = crawl(1)
+        
+        assert len(serial) == 25
+        assert crawl(8) == serial
+        assert crawl(8) == serial
+    
+    def test_crawl_fetches_url_variants_once(self):
+        """Test that links to the same page are canonicalized and queued once."""
+        fetched = []
+        pages = {
+            "https://example.com/": (
+                '<a href="/a">a</a><a href="/a/">a/</a><a href="/a#x">a#x</a>'
+                '<a href="/a?utm_source=feed">tracked</a><a href="HTTPS://EXAMPLE.COM:443/a">loud</a>'
+                '<a href="/b?page=2&session=1">b</a><a href="/b?session=2&page=2">b again</a>'
+            ),
+        }
+        
+        def mock_fetch(url):
+            fetched.append(url)
+            return pages.get(url, "")
+        
+        urls = discover_from_crawl(
+            base_url="https://example.com",
+            start="/",
+            max_depth=1,
+            max_pages=10,
+            include=[],
+            exclude=[],
+            scraping_config={"delay": 0},
+            fetch_func=mock_fetch,
+            on_page=lambda url, html: None,
+            query={"drop": ["session"]},
+        )
+        
+        assert urls == ["https://example.com/", "https://example.com/a", "https://example.com/b?page=2"]
+        assert fetched == urls
+    
+    def test_concurrent_crawl_overlaps_fetches(self):
+        """Test that pages of one level are fetched at the same time."""
+        import time
+        
+        links = "".join(f'<a href="/p{i}">x</a>' for i in range(8))
+        
+        def mock_fetch(url):
+            time.sleep(0.05)
+            return links if url == "https://example.com/" else ""
+        
+        started = time.monotonic()
+        urls = discover_from_crawl(
+            base_url="https://example.com",
+            start="/",
+            max_depth=1,
+            max_pages=10,
+            include=[],
+            exclude=[],
+            scraping_config={"delay": 0},
+            fetch_func=mock_fetch,
+            on_page=lambda url, html: None,
+            concurrency=8,
+        )
+        
+        assert len(urls) == 9
+        # 0.1s for the start page and one round of 8; serially 0.45s
+        assert time.monotonic() - started < 0.3
 
 
 class TestDiscoverPagesForSite:
@@ -2,6 +2,7 @@
 
 import subprocess
 import tempfile
+from datetime import datetime, timezone
 from pathlib import Path
 
 import pytest
@@ -12,6 +13,8 @@ from wit.git import (
     get_added_or_modified_files,
     stage_files,
     commit_changes,
+    commit_paths,
+    FastImport,
     is_git_repo,
     get_repo_root,
     GitError,
@@ -189,6 +192,121 @@ class TestCommitChanges:
         assert result.stdout == "Custom Bot <custom@bot.com>"
 
 
+class TestCommitPaths:
+    """Tests for commit_paths function."""
+    
+    def _git(self, *args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout
+    
+    def test_commits_only_given_paths(self, git_repo):
+        """Test that other changes in the working tree are left alone."""
+        (git_repo / "content").mkdir()
+        (git_repo / "content" / "a.md").write_text("a")
+        (git_repo / "other.txt").write_text("not mine")
+        
+        sha = commit_paths(["content/a.md"], "Update a", "Test Bot", "test@bot.com")
+        
+        assert sha is not None
+        assert self._git("log", "-1", "--pretty=format:%h %s %an <%ae>") == f"{sha} Update a Test Bot <test@bot.com>"
+        assert self._git("show", "--name-only", "--pretty=format:", "HEAD").split() == ["content/a.md"]
+        assert "?? other.txt" in self._git("status", "--porcelain")
+        assert "content" not in self._git("status", "--porcelain")
+    
+    def test_modified_and_deleted_files(self, git_repo):
+        """Test that edits and deletions of tracked files are committed."""
+        (git_repo / "a.md").write_text("a")
+        commit_paths(["a.md"], "Add a")
+        
+        (git_repo / "a.md").unlink()
+        (git_repo / "README.md").write_text("# Changed")
+        commit_paths(["a.md", "README.md"], "Change")
+        
+        assert self._git("ls-tree", "--name-only", "HEAD").split() == ["README.md"]
+        assert self._git("show", "HEAD:README.md") == "# Changed"
+        assert self._git("rev-list", "--count", "HEAD").strip() == "3"
+    
+    def test_directory_expands_to_changed_files(self, git_repo):
+        """Test that a directory commits its changed, non-ignored files."""
+        (git_repo / ".gitignore").write_text("*.tmp\n")
+        (git_repo / "state").mkdir()
+        (git_repo / "state" / "hashes.json").write_text("{}")
+        (git_repo / "state" / "x.tmp").write_text("ignored")
+        
+        commit_paths([".gitignore", "state"], "Add state")
+        
+        assert self._git("ls-tree", "-r", "--name-only", "HEAD").split() == [
+            ".gitignore", "README.md", "state/hashes.json",
+        ]
+    
+    def test_no_changes(self, git_repo):
+        """Test that unchanged paths make no commit."""
+        assert commit_paths(["README.md"], "Nothing") is None
+        assert self._git("rev-list", "--count", "HEAD").strip() == "1"
+    
+    def test_unborn_branch(self, tmp_path, monkeypatch):
+        """Test the first commit of a new repository."""
+        subprocess.run(["git", "init"], cwd=tmp_path, check=True, capture_output=True)
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.md").write_text("a")
+        
+        sha = commit_paths(["a.md"], "First")
+        
+        assert sha is not None
+        assert self._git("log", "--pretty=format:%s") == "First"
+
+
+
+class TestFastImport:
+    """Tests for FastImport class."""
+    
+    WHEN = datetime(2024, 1, 31, 12, 0, tzinfo=timezone.utc)
+    
+    def _git(self, *args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout
+    
+    def test_new_branch(self, git_repo):
+        """Test that commits land on a new branch without touching the checkout."""
+        with FastImport("history") as fast_import:
+            fast_import.commit({"content/a.md": b"v1", "content/b.md": b"b"}, "First", "Bot", "bot@x", self.WHEN)
+            fast_import.commit({"content/a.md": b"v2", "content/b.md": None}, "Second", "Bot", "bot@x", self.WHEN)
+        
+        assert fast_import.commits == 2
+        assert self._git("log", "--pretty=format:%s|%an <%ae>|%at", "history").split("\n") == [
+            f"Second|Bot <bot@x>|{int(self.WHEN.timestamp())}",
+            f"First|Bot <bot@x>|{int(self.WHEN.timestamp())}",
+        ]
+        assert self._git("ls-tree", "-r", "--name-only", "history").split() == ["content/a.md"]
+        assert self._git("show", "history:content/a.md") == "v2"
+        assert self._git("status", "--porcelain") == ""
+        assert not (git_repo / "content").exists()
+    
+    def test_continues_existing_branch(self, git_repo):
+        """Test that an existing branch keeps its history and files."""
+        self._git("branch", "history")
+        
+        with FastImport("history") as fast_import:
+            fast_import.commit({"a.md": b"a"}, "Add a", "Bot", "bot@x", self.WHEN)
+        
+        assert self._git("log", "--pretty=format:%s", "history").split("\n") == ["Add a", "Initial commit"]
+        assert self._git("ls-tree", "--name-only", "history").split() == ["README.md", "a.md"]
+    
+    def test_error_leaves_branch_alone(self, git_repo):
+        """Test that an aborted import does not create the branch."""
+        with pytest.raises(RuntimeError):
+            with FastImport("history") as fast_import:
+                fast_import.commit({"a.md": b"a"}, "Add a", "Bot", "bot@x", self.WHEN)
+                raise RuntimeError("boom")
+        
+        assert subprocess.run(["git", "rev-parse", "--verify", "-q", "history"], capture_output=True).returncode != 0
+    
+    def test_checked_out_branch_refused(self, git_repo):
+        """Test that the current branch can't be imported into."""
+        current = self._git("symbolic-ref", "--short", "HEAD").strip()
+        
+        with pytest.raises(GitError, match="checked out"):
+            FastImport(current)
+
+
 class TestIsGitRepo:
     """Tests for is_git_repo function."""
     
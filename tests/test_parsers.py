@@ -0,0 +1,224 @@
+"""Tests for parsers module."""
+
+import pytest
+
+from wit.parsers import PARSERS, RemovalMatcher, get_parser
+from wit.scraper import ScrapingError
+
+# Pages every backend must extract exactly like BeautifulSoup
+CORPUS = [
+    "<html><body><nav>N</nav><main><h1>T <span>x</span></h1><p>Hi &amp; &lt;b&gt; &nbsp; <b>w</b></p></main>"
+    "<footer>F</footer></body></html>",
+    "<main class='  a   b ' id=x data-q='say \"hi\"' title=\"it's\" alt='both \" and &apos;'><p>x</p></main>",
+    "<main><input type=checkbox checked disabled><option selected>o</option><br><hr/><img src=a.png alt=''></main>",
+    "<main><input disabled=\"disabled\"><p>Explicit boolean attribute</p></main>",
+    "<main><!-- comment --><script>if (a < b && c > d) x();</script><style>p > a { x: '&' }</style><p>t</p></main>",
+    "<main><table><tr><th>a</th></tr><tr><td>1</td></tr></table><table><tbody><tr><td>2</td></tr></tbody></table></main>",
+    "<main><p>unclosed<p>another<ul><li>a<li>b</ul></main>",
+    "<main><pre><code class='language-py'>def f():\n    return 1 &lt; 2</code></pre></main>",
+    "<body><div class=content><h1><script>x</script>Title<!-- c --></h1> text</div></body>",
+    "<html><head><title>T</title></head><body>no main at all <a href='/a'>a</a></body></html>",
+    "<main><meta charset='latin-1'><meta http-equiv='Content-Type' content='text/html; charset=ISO-8859-1'></main>",
+    "<main><template><p>t</p></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby></main>",
+    "<main><svg viewBox='0 0 1 1'><path d='M0 0'/></svg><a rel='nofollow  noopener' href='x'>l</a></main>",
+    "<main><div class='ad'>ad<div class='ad'>nested ad</div></div>tail text<span class=sidebar>s</span>after</main>",
+    "<article><h2>A</h2><p>x</p></article><main><p>m</p></main>",
+    "<main><p>ümlaut — “quotes”  nbsp</p><textarea>a < b & c\n\n</textarea></main>",
+    "<main>\n  <p>\n   ws\n  </p>\n\n</main>",
+    '<?xml version="1.0" encoding="UTF-8"?><html><body><main>x</main></body></html>',
+    "",
+    "<!-- only a comment -->",
+]
+
+SELECTORS = [
+    {
+        "content": ["main", "article", ".content", "body"],
+        "remove": ["nav", "footer", "script", "style", ".ad", ".sidebar", "noscript"],
+        "title": "h1",
+    },
+    {"content": ["article", "main"], "remove": [], "title": "h2"},
+    {},
+    {"content": ["main > p:first-child", "div.content"], "remove": ["[data-q]"], "title": "title"},
+    {"content": ["main", "div"], "remove": ["b", "p", "script"], "title": "h1"},
+]
+
+
+@pytest.fixture(params=[name for name in PARSERS if name != "bs4"])
+def backend(request):
+    """Get each optional backend, skipping those not installed."""
+    try:
+        return get_parser(request.param)
+    except ScrapingError:
+        pytest.skip(f"{request.param} parser not installed")
+
+
+class TestParserBackends:
+    """Tests comparing backends with BeautifulSoup."""
+
+    @pytest.mark.parametrize("html", CORPUS)
+    @pytest.mark.parametrize("selectors", SELECTORS)
+    def test_extract_matches_bs4(self, backend, html, selectors):
+        """Test that extraction gives identical content and title."""
+        assert backend.extract(html, selectors) == get_parser("bs4").extract(html, selectors)
+
+    @pytest.mark.parametrize("html", CORPUS)
+    def test_links_match_bs4(self, backend, html):
+        """Test that link extraction gives identical hrefs."""
+        assert backend.links(html) == get_parser("bs4").links(html)
+
+    def test_unsupported_selector_falls_back(self, backend):
+        """Test that selectors only soupsieve understands still work."""
+        html = "<main><p>keep</p><p>drop me</p></main>"
+        selectors = {"content": ["main"], "remove": ['p:-soup-contains("drop")']}
+
+        content, _ = backend.extract(html, selectors)
+
+        assert content == "<main><p>keep</p></main>"
+
+
+class TestStreamingExtraction:
+    """Tests for the lxml backend's streaming extraction of large pages."""
+
+    @pytest.fixture
+    def lxml_parser(self, monkeypatch):
+        """Get the lxml backend streaming every page in tiny chunks."""
+        try:
+            parser = get_parser("lxml")
+        except ScrapingError:
+            pytest.skip("lxml parser not installed")
+        monkeypatch.setattr("wit.parsers.STREAM_THRESHOLD", 0)
+        monkeypatch.setattr("wit.parsers._STREAM_CHUNK_SIZE", 7)
+        return parser
+
+    @pytest.mark.parametrize("html", CORPUS)
+    @pytest.mark.parametrize("selectors", SELECTORS)
+    def test_matches_bs4(self, lxml_parser, html, selectors):
+        """Test that streaming gives identical content and title."""
+        assert lxml_parser.extract(html, selectors) == get_parser("bs4").extract(html, selectors)
+
+    def test_stops_after_content(self, lxml_parser, monkeypatch):
+        """Test that parsing stops once the content and title are complete."""
+        import wit.parsers
+
+        seen = []
+        pull_events = wit.parsers._pull_events
+
+        def counting_events(html):
+            for event in pull_events(html):
+                seen.append(event[1].tag)
+                yield event
+
+        monkeypatch.setattr("wit.parsers._pull_events", counting_events)
+        html = "<body><nav><h1>menu</h1></nav><main><h1>T</h1><p>x</p></main>" + "<p>rest</p>" * 100 + "</body>"
+        selectors = {"content": ["main", "body"], "remove": ["nav"], "title": "h1"}
+
+        assert lxml_parser.extract(html, selectors) == ("<main><h1>T</h1><p>x</p></main>", "T")
+        assert "p" in seen and len(seen) < 20
+
+    def test_lower_priority_content_waits_for_the_end(self, lxml_parser):
+        """Test that a later selector's match wins only if the first never matches."""
+        html = "<body><article>a</article><p>x</p><main>m</main></body>"
+        selectors = {"content": ["main", "article"], "title": "h1"}
+
+        assert lxml_parser.extract(html, selectors) == ("<main>m</main>", None)
+        assert lxml_parser.extract(html.replace("main", "div"), selectors) == ("<article>a</article>", None)
+
+
+class TestRemovalMatcher:
+    """Tests for RemovalMatcher class."""
+
+    def test_plain_selectors_share_one_pass(self):
+        """Test that order-independent selectors are matched together."""
+        matcher = RemovalMatcher(["nav", "footer", ".ad", "div > aside", "[data-x]"])
+
+        assert matcher.groups == ["nav, footer, .ad, div > aside, [data-x]"]
+
+    def test_order_sensitive_selectors_keep_their_place(self):
+        """Test that sibling and pseudo-class selectors get their own pass."""
+        matcher = RemovalMatcher(["nav", "footer", "p:first-child", "h2 + p", "script", "style"])
+
+        assert matcher.groups == ["nav, footer", "p:first-child", "h2 + p", "script, style"]
+
+    def test_empty(self):
+        """Test that no selectors means no passes."""
+        assert RemovalMatcher([]).groups == []
+
+    @pytest.mark.parametrize("name", PARSERS)
+    def test_same_result_as_sequential_removal(self, name):
+        """Test that earlier removals are seen by order-sensitive selectors."""
+        try:
+            parser = get_parser(name)
+        except ScrapingError:
+            pytest.skip(f"{name} parser not installed")
+        html = "<main><nav>n</nav><p>first</p><p>second</p></main>"
+        selectors = {"content": ["main"], "remove": ["nav", "p:first-child"]}
+
+        content, _ = parser.extract(html, selectors, RemovalMatcher(selectors["remove"]))
+
+        # Once nav is gone, the first paragraph is the first child
+        assert content == "<main><p>second</p></main>"
+
+    def test_plain_selectors_are_looked_up(self):
+        """Test that tag, class and id selectors are matched while walking."""
+        step, = RemovalMatcher(["NAV", ".ad", "#cookie", "div > aside", "[data-x]"]).passes
+
+        assert step.tags == {"nav"}
+        assert step.classes == {"ad"}
+        assert step.ids == {"cookie"}
+        assert step.css == "div > aside, [data-x]"
+
+    @pytest.mark.parametrize("name", PARSERS)
+    def test_walk_matches_css(self, name):
+        """Test that walked selectors match exactly what CSS would."""
+        try:
+            parser = get_parser(name)
+        except ScrapingError:
+            pytest.skip(f"{name} parser not installed")
+        html = (
+            "<main><div class='x AD'>case</div><div class='ads'>prefix</div>"
+            "<div class=' ad\tother'>ad</div><NAV>n</NAV><p id=Cookie>c</p><p id=cookie>x</p>tail</main>"
+        )
+        selectors = {"content": ["main"], "remove": ["nav", ".ad", "#cookie"]}
+
+        content, _ = parser.extract(html, selectors, RemovalMatcher(selectors["remove"]))
+
+        assert content == (
+            '<main><div class="x AD">case</div><div class="ads">prefix</div><p id="Cookie">c</p>tail</main>'
+        )
+
+    def test_pickle(self):
+        """Test that a matcher can be sent to worker processes."""
+        import pickle
+
+        matcher = RemovalMatcher(["nav", "p:first-child"])
+
+        copy = pickle.loads(pickle.dumps(matcher))
+
+        assert copy.passes == matcher.passes
+
+
+class TestGetParser:
+    """Tests for get_parser function."""
+
+    def test_default_is_bs4(self):
+        """Test the default backend."""
+        assert get_parser().name == "bs4"
+
+    def test_instances_are_shared(self):
+        """Test that backends are created once."""
+        assert get_parser("bs4") is get_parser("bs4")
+
+    def test_unknown_parser(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError, match="Unknown parser"):
+            get_parser("html5lib")
+
+    def test_missing_dependency(self, monkeypatch):
+        """Test the install hint when a backend's library is missing."""
+        import sys
+
+        monkeypatch.setattr("wit.parsers._parsers", {})
+        monkeypatch.setitem(sys.modules, "selectolax.lexbor", None)
+
+        with pytest.raises(ScrapingError, match=r"wit\[selectolax\]"):
+            get_parser("selectolax")
@@ -0,0 +1,105 @@
+"""Tests for pipeline module."""
+
+import threading
+
+import pytest
+
+from wit.config import SiteConfig
+from wit.pipeline import CpuPool, render_page
+
+HTML = "<html><head><title>T</title></head><body><nav>menu</nav><main><h1>Hello</h1><p>Wörld</p></main></body></html>"
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Create a site configuration."""
+    return SiteConfig(
+        name="example",
+        base_url="https://example.com",
+        output_dir=tmp_path / "content",
+        selectors={"content": ["main"], "remove": ["nav"]},
+        metadata={"include_timestamp": False},
+    )
+
+
+class TestRenderPage:
+    """Tests for render_page function."""
+
+    def test_render(self, site):
+        """Test that a page is extracted, converted and given metadata."""
+        markdown = render_page(site, "https://example.com/", HTML).markdown
+
+        assert "# Hello" in markdown
+        assert "Wörld" in markdown
+        assert "menu" not in markdown
+        assert "https://example.com/" in markdown
+
+    def test_region_hash_only_when_skipping_unchanged(self, site):
+        """Test that the content region is hashed only when it is used."""
+        assert render_page(site, "https://example.com/", HTML).region_hash is None
+
+        site.scraping["skip_unchanged"] = True
+        page = render_page(site, "https://example.com/", HTML)
+
+        assert page.region_hash is not None
+        assert page.markdown is not None
+
+    def test_unchanged_region_is_not_converted(self, site):
+        """Test that only the page chrome changing skips conversion."""
+        site.scraping["skip_unchanged"] = True
+        region_hash = render_page(site, "https://example.com/", HTML).region_hash
+
+        page = render_page(site, "https://example.com/", HTML.replace("menu", "other menu"), region_hash)
+
+        assert page == (None, region_hash)
+
+
+class TestCpuPool:
+    """Tests for CpuPool class."""
+
+    def test_same_output_as_in_process(self, site):
+        """Test that worker processes render exactly like the calling process."""
+        other = SiteConfig(
+            name="other",
+            base_url="https://other.com",
+            selectors={"content": ["main"], "remove": ["p"]},
+            metadata={"include_timestamp": False},
+        )
+
+        with CpuPool([site, other], 2) as pool:
+            futures = [pool.submit(s, f"{s.base_url}/", HTML) for s in [site, other] * 3]
+            results = [future.result() for future in futures]
+
+        assert results == [render_page(s, f"{s.base_url}/", HTML) for s in [site, other] * 3]
+        assert "Wörld" not in results[1].markdown
+
+    def test_then_runs_on_writer_thread(self, site):
+        """Test that follow-up work runs on a writer thread, not the pool's result thread."""
+        threads = []
+
+        def then(page):
+            threads.append(threading.current_thread().name)
+            return page.markdown.upper()
+
+        with CpuPool([site], 1) as pool:
+            futures = [pool.submit(site, f"https://example.com/{i}", HTML, then=then) for i in range(3)]
+            results = [future.result() for future in futures]
+
+        assert all("WÖRLD" in result for result in results)
+        assert len(threads) == 3
+        assert all(name.startswith("wit-writer") for name in threads)
+
+    def test_errors_are_raised_from_result(self, site):
+        """Test that a failure in a worker surfaces on the page's future."""
+        unknown = SiteConfig(name="unknown", base_url="https://unknown.com")
+
+        with CpuPool([site], 1) as pool:
+            future = pool.submit(unknown, "https://unknown.com/", HTML)
+
+            with pytest.raises(KeyError):
+                future.result()
+
+    def test_workers_start_with_the_pool(self, site):
+        """Test that worker processes exist before any page is submitted."""
+        with CpuPool([site], 2) as pool:
+            assert len(pool._executor._processes) == 2
@@ -0,0 +1,162 @@
+"""Tests for replay module."""
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wit.config import SiteConfig
+from wit.git import FastImport, GitError
+from wit.replay import RENDER_AHEAD, SnapshotEvent, group_events, history_events, replay_history
+from wit.snapshots import SnapshotStore
+
+GIT = {"author_name": "Bot", "author_email": "bot@x", "message_template": "Update {changed_count} page(s)"}
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Create an empty git repository and work inside it."""
+    subprocess.run(["git", "init"], cwd=tmp_path, check=True, capture_output=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_site(name="docs"):
+    """Create a site configuration with relative paths."""
+    return SiteConfig(
+        name=name,
+        base_url=f"https://{name}.example.com",
+        output_dir=f"content/{name}",
+        selectors={"content": ["main"]},
+        state_dir=".wit",
+    )
+
+
+def record(site, url, fetches):
+    """Store snapshots for a URL as fetched at the given times."""
+    snapshots = SnapshotStore.for_site(site)
+    history = [[fetched_at, snapshots.put(html)] for fetched_at, html in fetches]
+    snapshots.index.set(url, history)
+    snapshots.save()
+
+
+def event(fetched_at):
+    """Create an event at a time."""
+    return SnapshotEvent(fetched_at, None, "https://x.com/", "d")
+
+
+def git(*args):
+    """Run git and return its output."""
+    return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that counts submitted tasks."""
+
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestGroupEvents:
+    """Tests for group_events function."""
+
+    def test_per_run(self):
+        """Test that a gap between fetches starts a new commit."""
+        events = [event("2024-01-01T10:00:00Z"), event("2024-01-01T10:05:00Z"), event("2024-01-01T14:00:00Z")]
+
+        assert [len(group) for group in group_events(events, "run")] == [2, 1]
+
+    def test_per_day(self):
+        """Test that fetches are grouped by UTC day."""
+        events = [event("2024-01-01T10:00:00Z"), event("2024-01-01T23:59:00Z"), event("2024-01-02T00:01:00Z")]
+
+        assert [len(group) for group in group_events(events, "day")] == [2, 1]
+
+    def test_unknown_grouping(self):
+        """Test that an unknown grouping is rejected."""
+        with pytest.raises(ValueError, match="grouping"):
+            group_events([], "week")
+
+
+class TestReplayHistory:
+    """Tests for replay_history function."""
+
+    def test_history_events_sorted(self, repo):
+        """Test that fetches of all sites are merged by time."""
+        docs, blog = make_site("docs"), make_site("blog")
+        record(docs, "https://docs.example.com/", [("2024-01-02T00:00:00Z", "a"), ("2024-01-03T00:00:00Z", "b")])
+        record(blog, "https://blog.example.com/", [("2024-01-01T00:00:00Z", "c")])
+
+        events = history_events([docs, blog])
+
+        assert [(e.fetched_at[:10], e.site.name) for e in events] == [
+            ("2024-01-01", "blog"), ("2024-01-02", "docs"), ("2024-01-03", "docs"),
+        ]
+
+    def test_replay(self, repo):
+        """Test that each run becomes a commit with only the changed pages."""
+        site = make_site()
+        record(site, "https://docs.example.com/", [
+            ("2024-01-01T10:00:00Z", "<main><p>v1</p></main>"),
+            ("2024-01-02T10:00:00Z", "<main><p>v2</p></main>"),
+        ])
+        record(site, "https://docs.example.com/a", [
+            ("2024-01-01T10:01:00Z", "<main><p>a</p></main>"),
+            # Only the page chrome changed, so the markdown is the same
+            ("2024-01-02T10:01:00Z", "<nav>x</nav><main><p>a</p></main>"),
+        ])
+
+        with ThreadPoolExecutor(2) as executor:
+            commits, pages = replay_history([site], "history", executor, GIT)
+
+        assert (commits, pages) == (2, 3)
+        assert git("log", "--pretty=format:%s %aI", "history").split("\n") == [
+            "Update 1 page(s) 2024-01-02T10:01:00+00:00",
+            "Update 2 page(s) 2024-01-01T10:01:00+00:00",
+        ]
+        index = git("show", "history:content/docs/index.md")
+        assert "scraped_at: 2024-01-02T10:00:00Z" in index
+        assert "v2" in index
+        assert not (repo / "content").exists()
+
+    def test_no_snapshots(self, repo):
+        """Test that there is nothing to import without snapshots."""
+        with ThreadPoolExecutor(1) as executor:
+            assert replay_history([make_site()], "history", executor, GIT) == (0, 0)
+
+    def test_renders_a_window_ahead(self, repo, monkeypatch):
+        """Test that renders are submitted only a few groups ahead of the commits."""
+        site = make_site()
+        record(site, "https://docs.example.com/", [
+            (f"2024-01-0{day}T10:00:00Z", f"<main><p>v{day}</p></main>") for day in range(1, 8)
+        ])
+        executor = CountingExecutor(2)
+        submitted_at_commit = []
+        original_commit = FastImport.commit
+
+        def commit(self, *args, **kwargs):
+            submitted_at_commit.append(executor.submitted)
+            return original_commit(self, *args, **kwargs)
+
+        monkeypatch.setattr(FastImport, "commit", commit)
+        with executor:
+            commits, _ = replay_history([site], "history", executor, GIT)
+
+        assert commits == 7
+        assert submitted_at_commit == [min(i + 1 + RENDER_AHEAD, 7) for i in range(7)]
+
+    def test_refused_branch_renders_nothing(self, repo):
+        """Test that a checked-out branch is refused before any page is rendered."""
+        site = make_site()
+        record(site, "https://docs.example.com/", [("2024-01-01T10:00:00Z", "<main><p>v1</p></main>")])
+        branch = git("symbolic-ref", "--short", "HEAD").strip()
+        executor = CountingExecutor(1)
+
+        with executor, pytest.raises(GitError):
+            replay_history([site], branch, executor, GIT)
+
+        assert executor.submitted == 0
+
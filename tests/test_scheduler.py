@@ -0,0 +1,122 @@
+"""Tests for scheduler module."""
+
+import threading
+import time
+
+import pytest
+
+from wit.scheduler import FairScheduler
+
+
+class TestFairScheduler:
+    """Tests for FairScheduler class."""
+
+    def test_runs_tasks(self):
+        """Test that results and exceptions reach the futures."""
+        def fail():
+            raise ValueError("boom")
+
+        with FairScheduler(2) as scheduler:
+            ok = scheduler.submit("a", lambda x: x * 2, 21)
+            err = scheduler.submit("a", fail)
+
+        assert ok.result() == 42
+        with pytest.raises(ValueError, match="boom"):
+            err.result()
+
+    def test_per_key_limit(self):
+        """Test that a key never runs more tasks than its limit."""
+        lock = threading.Lock()
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        def task(key):
+            with lock:
+                running[key] += 1
+                peak[key] = max(peak[key], running[key])
+            time.sleep(0.01)
+            with lock:
+                running[key] -= 1
+
+        with FairScheduler(4) as scheduler:
+            for _ in range(10):
+                scheduler.submit("a", task, "a", limit=1)
+                scheduler.submit("b", task, "b", limit=3)
+
+        assert peak == {"a": 1, "b": 3}
+
+    def test_global_budget(self):
+        """Test that no more than max_workers tasks run at once."""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def task():
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+        with FairScheduler(3) as scheduler:
+            for key in "abcd":
+                for _ in range(5):
+                    scheduler.submit(key, task)
+
+        assert state["peak"] == 3
+
+    def test_round_robin_between_keys(self):
+        """Test that a key with a long queue does not starve the others."""
+        order = []
+        started = threading.Event()
+        gate = threading.Event()
+
+        def block():
+            started.set()
+            gate.wait()
+
+        with FairScheduler(1) as scheduler:
+            # Hold the only worker while the queues fill up
+            scheduler.submit("big", block)
+            started.wait()
+            for i in range(5):
+                scheduler.submit("big", order.append, f"big{i}")
+            scheduler.submit("small", order.append, "small0")
+            scheduler.submit("small", order.append, "small1")
+            gate.set()
+
+        assert order[:4] == ["small0", "big0", "small1", "big1"]
+
+    def test_throttled_task_does_not_hold_worker(self):
+        """Test that a task waiting for its throttle lets other keys run."""
+        order = []
+
+        with FairScheduler(1) as scheduler:
+            slow = scheduler.submit("slow", order.append, "slow", throttle=lambda: 0.5)
+            for i in range(3):
+                scheduler.submit("fast", order.append, f"fast{i}")
+
+        assert slow.done()
+        assert order == ["fast0", "fast1", "fast2", "slow"]
+
+    def test_throttle_asked_once_per_task(self):
+        """Test that each task takes its throttle's delay exactly once."""
+        calls = []
+
+        def throttle():
+            calls.append(1)
+            return 0.01
+
+        with FairScheduler(2) as scheduler:
+            futures = [scheduler.submit("a", lambda i: i, i, throttle=throttle) for i in range(5)]
+
+        assert [future.result() for future in futures] == list(range(5))
+        assert len(calls) == 5
+
+    def test_submit_after_shutdown(self):
+        """Test that a shut down scheduler rejects new tasks."""
+        scheduler = FairScheduler(1)
+        scheduler.shutdown()
+
+        with pytest.raises(RuntimeError):
+            scheduler.submit("a", print)
@@ -2,7 +2,7 @@
 
 import pytest
 
-from wit.scraper import extract_content, ScrapingError
+from wit.scraper import extract_content, extract_content_tree, ScrapingError
 
 
 class TestExtractContent:
@@ -225,3 +225,32 @@ class TestExtractContent:
         
         # Should have found content using default selectors
         assert content  # Not empty
+
+
+class TestExtractContentTree:
+    """Tests for extract_content_tree function."""
+    
+    def test_matches_extract_content(self):
+        """Test that the tree serializes to the same HTML as extract_content."""
+        html = """
+        <html>
+            <body>
+                <nav>Navigation</nav>
+                <main><h1>Title</h1><p>Content &amp; more</p><script>x()</script></main>
+            </body>
+        </html>
+        """
+        selectors = {"content": ["main"], "remove": ["nav", "script"], "title": "h1"}
+        
+        tree, title = extract_content_tree(html, selectors)
+        
+        assert (str(tree), title) == extract_content(html, selectors)
+    
+    def test_content_is_only_child(self):
+        """Test that the content element is detached from the page."""
+        html = "<html><body><header>Head</header><article><p>Body</p></article></body></html>"
+        
+        tree, _ = extract_content_tree(html, {"content": ["article"], "remove": []})
+        
+        assert [child.name for child in tree.children] == ["article"]
+        assert "Head" not in tree.get_text()
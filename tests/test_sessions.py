@@ -0,0 +1,60 @@
+"""Tests for sessions module."""
+
+import pytest
+
+from wit.sessions import get_session, close_sessions
+
+
+@pytest.fixture(autouse=True)
+def clean_sessions():
+    """Ensure every test starts and ends without pooled sessions."""
+    close_sessions()
+    yield
+    close_sessions()
+
+
+class TestGetSession:
+    """Tests for get_session function."""
+
+    def test_same_host_reuses_session(self):
+        """Test that URLs on the same host share one session."""
+        first = get_session("https://example.com/a", {})
+        second = get_session("https://example.com/b/c", {})
+
+        assert first is second
+
+    def test_different_hosts_get_different_sessions(self):
+        """Test that each host gets its own session."""
+        first = get_session("https://example.com/", {})
+        second = get_session("https://docs.example.com/", {})
+
+        assert first is not second
+
+    def test_scheme_is_part_of_key(self):
+        """Test that http and https use separate sessions."""
+        first = get_session("http://example.com/", {})
+        second = get_session("https://example.com/", {})
+
+        assert first is not second
+
+    def test_pool_size_applied(self):
+        """Test that pool settings are applied to the adapter."""
+        session = get_session("https://example.com/", {"pool_connections": 4, "pool_maxsize": 32})
+        adapter = session.get_adapter("https://example.com/")
+
+        assert adapter._pool_connections == 4
+        assert adapter._pool_maxsize == 32
+
+    def test_keep_alive_disabled(self):
+        """Test that disabling keep-alive closes connections after each request."""
+        session = get_session("https://example.com/", {"keep_alive": False})
+
+        assert session.headers["Connection"] == "close"
+
+    def test_close_sessions(self):
+        """Test that closing sessions forces new ones to be created."""
+        first = get_session("https://example.com/", {})
+        close_sessions()
+        second = get_session("https://example.com/", {})
+
+        assert first is not second
@@ -0,0 +1,60 @@
+"""Tests for snapshots module."""
+
+import pytest
+
+from wit.config import SiteConfig
+from wit.snapshots import SnapshotStore
+from wit.state import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a snapshot store with an index."""
+    return SnapshotStore(tmp_path / "snapshots", StateStore(tmp_path / "index.json"))
+
+
+class TestSnapshotStore:
+    """Tests for SnapshotStore class."""
+
+    def test_put_and_get(self, store):
+        """Test storing and loading a snapshot."""
+        digest = store.put("<html><body>Hello ü</body></html>")
+
+        assert store.get(digest) == "<html><body>Hello ü</body></html>"
+
+    def test_content_addressed(self, store):
+        """Test that identical HTML is stored once."""
+        first = store.put("<p>same</p>")
+        second = store.put("<p>same</p>")
+
+        assert first == second
+        assert len(list(store.root.rglob("*.html.gz"))) == 1
+
+    def test_snapshots_are_compressed(self, store):
+        """Test that snapshots take less space than the raw HTML."""
+        html = "<p>repetitive content</p>" * 1000
+        digest = store.put(html)
+
+        assert store.object_path(digest).stat().st_size < len(html) / 10
+
+    def test_record_history(self, store):
+        """Test that history only grows when the page changes."""
+        url = "https://example.com/"
+        store.record(url, "<p>v1</p>")
+        store.record(url, "<p>v1</p>")
+        store.record(url, "<p>v2</p>")
+
+        history = store.history(url)
+        assert len(history) == 2
+        assert store.get(history[-1][1]) == "<p>v2</p>"
+        assert store.latest() == {url: history[-1][1]}
+
+    def test_for_site_persists_index(self, tmp_path):
+        """Test that a site's index survives a reload."""
+        site = SiteConfig(name="docs", base_url="https://example.com", state_dir=tmp_path)
+        store = SnapshotStore.for_site(site)
+        digest = store.record("https://example.com/a", "<p>a</p>")
+        store.save()
+
+        reloaded = SnapshotStore.for_site(site)
+        assert reloaded.latest() == {"https://example.com/a": digest}
@@ -0,0 +1,91 @@
+"""Tests for state module."""
+
+import json
+
+import pytest
+
+from wit.config import SiteConfig
+from wit.state import StateStore, config_fingerprint, site_state_path
+
+
+class TestStateStore:
+    """Tests for StateStore class."""
+
+    def test_roundtrip(self, tmp_path):
+        """Test that entries survive a save and reload."""
+        path = tmp_path / "state" / "site.json"
+        store = StateStore(path)
+        store.set("https://example.com/", {"etag": '"abc"'})
+        store.save()
+
+        reloaded = StateStore(path)
+        assert reloaded.get("https://example.com/") == {"etag": '"abc"'}
+        assert "https://example.com/" in reloaded
+        assert len(reloaded) == 1
+
+    def test_missing_file_is_empty(self, tmp_path):
+        """Test that a missing state file behaves like an empty store."""
+        store = StateStore(tmp_path / "missing.json")
+
+        assert store.get("anything") is None
+        assert store.keys() == []
+
+    def test_save_only_when_dirty(self, tmp_path):
+        """Test that an unchanged store does not touch the disk."""
+        path = tmp_path / "site.json"
+        StateStore(path).save()
+
+        assert not path.exists()
+
+    def test_fingerprint_mismatch_discards_entries(self, tmp_path):
+        """Test that entries recorded under other settings are dropped."""
+        path = tmp_path / "site.json"
+        store = StateStore(path, fingerprint="old")
+        store.set("key", 1)
+        store.save()
+
+        assert StateStore(path, fingerprint="old").get("key") == 1
+        assert StateStore(path, fingerprint="new").get("key") is None
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        """Test that an unreadable state file is treated as empty."""
+        path = tmp_path / "site.json"
+        path.write_text("{not json")
+
+        assert StateStore(path).get("key") is None
+
+    def test_discard(self, tmp_path):
+        """Test removing entries."""
+        path = tmp_path / "site.json"
+        store = StateStore(path)
+        store.set("key", 1)
+        store.discard("key")
+        store.save()
+
+        assert json.loads(path.read_text())["entries"] == {}
+
+
+class TestSiteState:
+    """Tests for site_state_path and config_fingerprint."""
+
+    def test_state_path(self, tmp_path):
+        """Test the per-site state file location."""
+        site = SiteConfig(name="docs", base_url="https://docs.example.com", state_dir=tmp_path)
+
+        assert site_state_path(site, "validators") == tmp_path / "validators" / "docs.json"
+
+    def test_fingerprint_tracks_rendering_settings(self):
+        """Test that selector or markdown changes change the fingerprint."""
+        base = SiteConfig(name="a", base_url="https://example.com")
+        same = SiteConfig(name="a", base_url="https://example.com")
+        other = SiteConfig(name="a", base_url="https://example.com", selectors={"content": ["article"]})
+
+        assert config_fingerprint(base) == config_fingerprint(same)
+        assert config_fingerprint(base) != config_fingerprint(other)
+
+    def test_fingerprint_ignores_scraping_settings(self):
+        """Test that fetch-only settings keep the fingerprint."""
+        base = SiteConfig(name="a", base_url="https://example.com")
+        other = SiteConfig(name="a", base_url="https://example.com", scraping={"delay": 5})
+
+        assert config_fingerprint(base) == config_fingerprint(other)
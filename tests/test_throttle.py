@@ -0,0 +1,228 @@
+"""Tests for throttle module."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wit.throttle import (
+    FetchBudget,
+    TokenBucket,
+    fetch_slot,
+    get_host_limiter,
+    reset_host_limiters,
+    set_fetch_budget,
+)
+
+
+class FakeClock:
+    """Manually advanced clock whose sleep moves time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def clean_limiters():
+    """Ensure every test starts without shared limiters."""
+    reset_host_limiters()
+    yield
+    reset_host_limiters()
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket class."""
+
+    def test_first_request_is_immediate(self):
+        """Test that a full bucket does not wait."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire() == 0.0
+        assert clock.sleeps == []
+
+    def test_waits_for_refill(self):
+        """Test that requests are spaced by 1 / rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire()
+        waited = bucket.acquire()
+
+        assert waited == pytest.approx(0.5)
+
+    def test_refills_over_time(self):
+        """Test that idle time refills the bucket."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire()
+        clock.now += 5
+        assert bucket.acquire() == 0.0
+
+    def test_burst_capacity(self):
+        """Test that capacity allows back-to-back requests."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=3, clock=clock, sleep=clock.sleep)
+
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.acquire() == pytest.approx(1.0)
+
+    def test_queued_callers_are_spaced(self):
+        """Test that reservations stack up for waiting callers."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, clock=clock, sleep=lambda s: None)
+
+        bucket.acquire()
+        assert bucket.acquire() == pytest.approx(1.0)
+        assert bucket.acquire() == pytest.approx(2.0)
+
+    def test_zero_rate_never_waits(self):
+        """Test that a zero rate disables limiting."""
+        bucket = TokenBucket(rate=0)
+
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() == 0.0
+
+
+class TestGetHostLimiter:
+    """Tests for get_host_limiter function."""
+
+    def test_same_host_shares_limiter(self):
+        """Test that pages on one host share a bucket."""
+        first = get_host_limiter("https://example.com/a", {"delay": 1.0})
+        second = get_host_limiter("https://example.com/b", {"delay": 1.0})
+
+        assert first is second
+
+    def test_different_hosts(self):
+        """Test that each host is limited independently."""
+        first = get_host_limiter("https://a.example.com/", {"delay": 1.0})
+        second = get_host_limiter("https://b.example.com/", {"delay": 1.0})
+
+        assert first is not second
+
+    def test_rate_from_delay(self):
+        """Test that delay is converted to a refill rate."""
+        limiter = get_host_limiter("https://example.com/", {"delay": 0.25, "burst": 4})
+
+        assert limiter.rate == pytest.approx(4.0)
+        assert limiter.capacity == 4
+
+    def test_zero_delay_disables_limit(self):
+        """Test that delay 0 means no throttling."""
+        limiter = get_host_limiter("https://example.com/", {"delay": 0})
+
+        assert limiter.rate == 0
+
+
+class PeakCounter:
+    """Counts how many callers are inside at once."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+class TestFetchBudget:
+    """Tests for FetchBudget class and the run-wide budget."""
+
+    def test_threads_share_slots(self):
+        """Test that no more than size threads hold a slot at once."""
+        budget = FetchBudget(2)
+        counter = PeakCounter()
+
+        def fetch(_):
+            with budget.slot(), counter:
+                time.sleep(0.01)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(fetch, range(12)))
+
+        assert counter.peak == 2
+
+    def test_async_tasks_share_slots_with_threads(self):
+        """Test that async requests count against the same slots as threads."""
+        budget = FetchBudget(2)
+        counter = PeakCounter()
+
+        async def fetch():
+            async with budget.slot_async():
+                with counter:
+                    await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(fetch() for _ in range(6)))
+
+        def thread_fetch(_):
+            with budget.slot(), counter:
+                time.sleep(0.01)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            threads = executor.map(thread_fetch, range(6))
+            asyncio.run(main())
+            list(threads)
+
+        assert counter.peak == 2
+
+    def test_async_waiter_woken_by_release(self):
+        """Test that a waiting task gets the slot a thread frees, and a cancelled one never holds it."""
+        budget = FetchBudget(1)
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with budget.slot():
+                held.set()
+                release.wait()
+
+        async def main():
+            cancelled = asyncio.ensure_future(budget.slot_async().__aenter__())
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+
+            async def fetch():
+                async with budget.slot_async():
+                    return "fetched"
+
+            waiting = asyncio.ensure_future(fetch())
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+            release.set()
+            return await asyncio.wait_for(waiting, timeout=5)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(hold)
+            held.wait()
+            assert asyncio.run(main()) == "fetched"
+
+        assert budget._waiters == set()
+        assert budget._slots.acquire(blocking=False)
+
+    def test_no_budget_by_default(self):
+        """Test that fetch_slot doesn't limit anything without a budget."""
+        set_fetch_budget(1)
+        set_fetch_budget(None)
+
+        with fetch_slot(), fetch_slot():
+            pass
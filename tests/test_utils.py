@@ -1,10 +1,12 @@
 """Tests for utils module."""
 
+from datetime import datetime, timezone
 from pathlib import Path
 
 import pytest
 
 from wit.utils import (
+    canonicalize_url,
     normalize_url,
     strip_tracking_params,
     url_to_filepath,
@@ -13,6 +15,7 @@ from wit.utils import (
     matches_pattern,
     extract_path,
     format_commit_message,
+    parse_lastmod,
 )
 
 
@@ -134,6 +137,57 @@ class TestStripTrackingParams:
         assert result == url
 
 
+class TestCanonicalizeUrl:
+    """Tests for canonicalize_url function."""
+    
+    def test_variants_compare_equal(self):
+        """Test that fragments, tracking params and default ports are dropped."""
+        expected = "https://example.com/a"
+        
+        assert canonicalize_url("https://example.com/a") == expected
+        assert canonicalize_url("https://example.com/a#section") == expected
+        assert canonicalize_url("https://example.com/a?utm_source=news&fbclid=x") == expected
+        assert canonicalize_url("HTTPS://Example.COM:443/a") == expected
+    
+    def test_keeps_path_case_and_other_ports(self):
+        """Test that only the scheme and host are lowercased."""
+        assert canonicalize_url("http://Example.com:8080/Docs/A") == "http://example.com:8080/Docs/A"
+        assert canonicalize_url("https://example.com") == "https://example.com/"
+    
+    def test_query_params_sorted(self):
+        """Test that parameter order doesn't matter."""
+        assert canonicalize_url("https://example.com/?b=2&a=1") == canonicalize_url("https://example.com/?a=1&b=2")
+    
+    def test_keep_and_drop_params(self):
+        """Test per-site query parameter rules."""
+        url = "https://example.com/list?page=2&sort=name&Session=abc"
+        
+        assert canonicalize_url(url, keep_params=["page"]) == "https://example.com/list?page=2"
+        assert canonicalize_url(url, drop_params=["session"]) == "https://example.com/list?page=2&sort=name"
+        assert canonicalize_url(url, keep_params=[]) == "https://example.com/list"
+
+
+class TestParseLastmod:
+    """Tests for parse_lastmod function."""
+    
+    @pytest.mark.parametrize("value,expected", [
+        ("2024", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        ("2024-05", datetime(2024, 5, 1, tzinfo=timezone.utc)),
+        ("2024-05-06", datetime(2024, 5, 6, tzinfo=timezone.utc)),
+        ("2024-05-06T10:20Z", datetime(2024, 5, 6, 10, 20, tzinfo=timezone.utc)),
+        ("2024-05-06T12:20:00+02:00", datetime(2024, 5, 6, 10, 20, tzinfo=timezone.utc)),
+    ])
+    def test_w3c_datetimes(self, value, expected):
+        """Test the W3C datetime profiles used in sitemaps."""
+        assert parse_lastmod(value) == expected
+    
+    def test_missing_or_invalid(self):
+        """Test that unusable values give None."""
+        assert parse_lastmod(None) is None
+        assert parse_lastmod("") is None
+        assert parse_lastmod("last tuesday") is None
+
+
 class TestUrlToFilepath:
     """Tests for url_to_filepath function."""
     